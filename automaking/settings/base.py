@@ -4,8 +4,9 @@ Django base settings for automaking project.
 """
 from pathlib import Path
 import os
+import tempfile
 from django.core.exceptions import ImproperlyConfigured
-from decouple import AutoConfig
+from decouple import AutoConfig, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -57,6 +58,12 @@ if USE_S3_STORAGE:
     # Ensure custom storage is used globally
     DEFAULT_FILE_STORAGE = 'core.storage.SupabaseStorage'
 
+# 고아 파일 정리 (python manage.py collect_orphans)
+# 이보다 최근에 올라온 파일은 생성/수정 중일 수 있으므로 지우지 않음
+STORAGE_GC_GRACE_HOURS = config('STORAGE_GC_GRACE_HOURS', default=24, cast=float)
+# True 이면 삭제/수정 요청에서 파일을 바로 지우지 않고 정리 작업에 맡김 (요청 지연 감소)
+STORAGE_DEFER_DELETES = config('STORAGE_DEFER_DELETES', default=False, cast=bool)
+
 # Google Cloud TTS 설정 (환경 변수에서 로드)
 def get_google_cloud_credentials():
     """Google Cloud 서비스 계정 credentials를 환경 변수에서 가져오기"""
@@ -94,6 +101,121 @@ def get_google_cloud_credentials():
 
 GOOGLE_CLOUD_CREDENTIALS_JSON = get_google_cloud_credentials()
 
+# 음성/문장 생성 제공자 ('google': 실제 API, 'stub': 로컬 스텁 - 벤치마크/개발용)
+TTS_PROVIDER = config('TTS_PROVIDER', default='google')
+GEMINI_PROVIDER = config('GEMINI_PROVIDER', default='google')
+
+# 외부 API 호출 복원력 정책 (호출 타임아웃/전체 데드라인/재시도/서킷 브레이커, 시간 단위: 초)
+RESILIENCE = {
+    'tts': {
+        'timeout': 10.0,
+        'deadline': 30.0,
+        'max_attempts': 4,
+        'base_delay': 0.2,
+        'max_delay': 2.0,
+        'failure_threshold': 5,
+        'recovery_timeout': 30.0,
+    },
+    'gemini': {
+        'timeout': 60.0,
+        'deadline': 90.0,
+        'max_attempts': 3,
+        'base_delay': 0.5,
+        'max_delay': 4.0,
+        'failure_threshold': 3,
+        'recovery_timeout': 60.0,
+    },
+}
+
+# TTS 헤지 요청: 합성 호출이 관측 지연의 percentile 백분위수를 넘기면 중복 요청을 보내고 먼저 온 응답 사용
+TTS_HEDGING = {
+    'enabled': config('TTS_HEDGING_ENABLED', default=False, cast=bool),
+    'percentile': 95,
+    'min_samples': 20,
+    'max_hedge_ratio': 0.1,  # 전체 요청 대비 헤지 요청 비율 상한
+    'max_workers': 8,
+}
+
+# 비동기 생성 뷰 (ASGI + Uvicorn 워커로 실행할 때 켜세요)
+ASYNC_GENERATION = config('ASYNC_GENERATION', default=False, cast=bool)
+GENERATION_TTS_CONCURRENCY = config('GENERATION_TTS_CONCURRENCY', default=8, cast=int)  # 작업당 동시 합성 수
+GENERATION_CPU_WORKERS = config('GENERATION_CPU_WORKERS', default=2, cast=int)  # pydub 작업 스레드 수
+
+# MP3 구간 병렬 인코딩: 문장 세트 경계에서 나눠 구간마다 ffmpeg 프로세스로 동시에 인코딩
+GENERATION_SEGMENTED_ENCODE = config('GENERATION_SEGMENTED_ENCODE', default=True, cast=bool)
+GENERATION_ENCODE_WORKERS = config('GENERATION_ENCODE_WORKERS', default=0, cast=int)  # 0이면 CPU 코어 수
+GENERATION_ENCODE_MIN_SEGMENT_SECONDS = 60  # 이보다 짧은 구간으로는 나누지 않음
+
+# 말하기 속도 버전: 합성한 클립에서 음높이를 유지한 채 속도만 바꿔 추가 MP3 를 만듦 (TTS 재호출 없음)
+# 합성 속도(0.8)와 같은 기준의 값 목록. 예: GENERATION_RATE_VARIANTS=0.6,1.0
+GENERATION_RATE_VARIANTS = config('GENERATION_RATE_VARIANTS', default='', cast=Csv(float))
+
+# 저비트레이트 렌디션 (음성용 Opus/AAC). 상세 페이지에서 브라우저가 지원하는 가장 작은 형식을 고름
+GENERATION_RENDITIONS = config('GENERATION_RENDITIONS', default='opus,aac', cast=Csv())
+
+# 보관함 복습 트랙: 보관함의 오디오들에서 문장 구간을 골라 섞어 이어 붙임 (TTS/Gemini 호출 없음)
+REVIEW_MIX_SENTENCES = config('REVIEW_MIX_SENTENCES', default=20, cast=int)  # 기본 문장 수
+REVIEW_MIX_MAX_SENTENCES = config('REVIEW_MIX_MAX_SENTENCES', default=100, cast=int)
+REVIEW_MIX_FETCH_WORKERS = config('REVIEW_MIX_FETCH_WORKERS', default=8, cast=int)  # 동시 범위 요청 수
+
+# 로컬 디스크 오디오 캐시: 재생할 파일을 서버 디스크에 캐시하고 nginx 가 X-Accel-Redirect 로 바로 보냄
+# accel_prefix 는 deployment/nginx.conf 의 internal location 과 맞추고, 비우면 Django 가 직접 파일로 응답 (개발용)
+AUDIO_DISK_CACHE = {
+    'enabled': config('AUDIO_DISK_CACHE_ENABLED', default=False, cast=bool),
+    'dir': config('AUDIO_DISK_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'automaking_audio_cache')),
+    'max_mb': config('AUDIO_DISK_CACHE_MAX_MB', default=2048, cast=int),
+    'accel_prefix': config('AUDIO_DISK_CACHE_ACCEL_PREFIX', default='/_audio_cache/'),
+}
+
+# 콜드 티어 (python manage.py tier_cold_audios): 생성 후 min_age_days 가 지났고 idle_days 동안 접근이 없으며
+# 조회수가 max_views 이하인 오디오를 {prefix}/ 아래(또는 bucket)로 옮김. 다시 접근하면 원래 위치로 되돌림
+# bitrate 를 주면 (예: 24k) 옮길 때 MP3 를 그 비트레이트로 다시 인코딩
+AUDIO_COLD_TIER = {
+    'min_age_days': config('AUDIO_COLD_MIN_AGE_DAYS', default=30, cast=int),
+    'idle_days': config('AUDIO_COLD_IDLE_DAYS', default=14, cast=int),
+    'max_views': config('AUDIO_COLD_MAX_VIEWS', default=5, cast=int),
+    'prefix': config('AUDIO_COLD_PREFIX', default='cold'),
+    'bucket': config('AUDIO_COLD_BUCKET', default=''),
+    'bitrate': config('AUDIO_COLD_BITRATE', default=''),
+}
+
+# 원문/번역/타임스탬프 압축 저장 (core.fields.CompressedTextField)
+# 사전 파일은 train_text_dictionary 로 만들고 쉼표로 나열. 마지막 사전으로 압축하고, 읽을 때는 모든 사전을 씀
+TEXT_COMPRESSION_DICTIONARIES = config('TEXT_COMPRESSION_DICTIONARIES', default='', cast=Csv())
+TEXT_COMPRESSION_LEVEL = config('TEXT_COMPRESSION_LEVEL', default=6, cast=int)
+
+# TXT 업로드 제한 (초과 시 400)
+UPLOAD_MAX_BYTES = config('UPLOAD_MAX_BYTES', default=512 * 1024, cast=int)
+UPLOAD_MAX_SENTENCES = config('UPLOAD_MAX_SENTENCES', default=300, cast=int)
+
+# 생성 작업 메모리 예산 (워커 프로세스 단위). 추정 메모리가 예산을 넘으면 거부하고, 여유가 없으면 대기
+GENERATION_MEMORY = {
+    'budget_mb': config('GENERATION_MEMORY_BUDGET_MB', default=1024, cast=int),
+    'queue_timeout': 30.0,  # 예산이 빌 때까지 기다리는 최대 시간 (초)
+    'avg_clip_seconds': 3.0,  # 합성 전 추정에 쓰는 문장 클립 평균 길이 (초)
+    'tracemalloc': config('GENERATION_MEMORY_TRACEMALLOC', default=False, cast=bool),
+}
+
+# 생성 진행 상황(SSE): 생성 요청과 진행 스트림이 다른 워커에서 처리될 수 있으므로 프로세스 간 공유 캐시 사용
+GENERATION_PROGRESS_TIMEOUT = 300  # 진행 스트림 최대 유지 시간 (초, ASGI 의 SSE 에서만 사용)
+GENERATION_JOB_STALE_SECONDS = 600  # 이 시간 동안 갱신되지 않은 진행 중 작업은 중단된 것으로 보고 재실행 허용
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'progress': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PROGRESS_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'automaking_progress')),
+        'TIMEOUT': 600,
+    },
+    # 보관함 재생목록(core.playlist): 보관함/오디오가 바뀐 워커에서 지우면 다른 워커도 바로 새 목록을 보도록 공유
+    'playlist': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PLAYLIST_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'automaking_playlist')),
+        'TIMEOUT': 300,
+    },
+}
+
 
 BASE_INSTALLED_APPS = [
     "django.contrib.admin",
@@ -144,8 +266,13 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "core.middleware.QueryCountHeaderMiddleware",
+    "core.middleware.ReplicaReadMiddleware",
 ]
 
+# 응답에 X-DB-Query-Count 헤더 추가 (부하 테스트 시에만 켜세요)
+QUERY_COUNT_HEADER = config('QUERY_COUNT_HEADER', default=False, cast=bool)
+
 ROOT_URLCONF = "automaking.urls"
 
 TEMPLATES = [
@@ -165,6 +292,16 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "automaking.wsgi.application"
 
+# 읽기 전용 복제본 (core.dbrouting). DATABASES 에 정의한 복제본 alias 목록은 환경별 설정에서 채움
+DATABASE_ROUTERS = ['core.dbrouting.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_READS = {
+    'max_lag_seconds': config('REPLICA_MAX_LAG_SECONDS', default=5, cast=float),
+    'pin_seconds': config('REPLICA_PIN_SECONDS', default=15, cast=int),  # 쓰기 요청 뒤 primary 에서 읽는 시간
+    'check_interval_seconds': config('REPLICA_CHECK_INTERVAL_SECONDS', default=5, cast=float),
+    'retry_seconds': config('REPLICA_RETRY_SECONDS', default=30, cast=float),  # 지연/장애 복제본을 빼 두는 시간
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -18,6 +18,17 @@ DATABASES = {
     }
 }
 
+# 복제본 별칭 (테스트에서는 default 의 미러). 라우팅은 DATABASE_REPLICAS 에 넣을 때만 켜짐
+# 로컬에서 확인할 때: db.sqlite3 를 복사한 파일을 LOCAL_REPLICA_DB 로 지정
+# (복사본은 갱신되지 않으므로 뒤처진 복제본처럼 동작)
+DATABASES['replica'] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": config('LOCAL_REPLICA_DB', default=str(BASE_DIR / "db.sqlite3")),
+    "TEST": {"MIRROR": "default"},
+}
+if config('LOCAL_REPLICA_DB', default=''):
+    DATABASE_REPLICAS = ['replica']
+
 # Static files
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
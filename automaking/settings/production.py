@@ -30,6 +30,19 @@ DATABASES = {
     }
 }
 
+# 읽기 전용 복제본 (Supabase Read Replica). 호스트를 쉼표로 나열하면 replica_1, replica_2 ... 로 등록
+# 홈/오디오 목록/보관함 상세의 읽기만 복제본으로 보냄 (core.dbrouting)
+for index, host in enumerate(filter(None, os.environ.get('SUPABASE_DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'connect_timeout': 3,  # 복제본이 죽었을 때 오래 기다리지 않고 primary 로
+        },
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
 # Static files
 STATIC_ROOT = os.environ.get('STATIC_ROOT', '/var/www/automaking/static/')
 STATIC_URL = '/static/'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, AudioContent, Collection, UserProfile
+from .models import Category, AudioContent, AudioVariant, Collection, UserProfile, GenerationJob, ReviewMix, UsageLedger
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -25,12 +25,19 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'created_at']
     search_fields = ['name']
 
+class AudioVariantInline(admin.TabularInline):
+    model = AudioVariant
+    extra = 0
+    fields = ['speaking_rate', 'codec', 'file', 'file_size', 'created_at']
+    readonly_fields = ['speaking_rate', 'codec', 'file', 'file_size', 'created_at']
+
 @admin.register(AudioContent)
 class AudioContentAdmin(admin.ModelAdmin):
     list_display = ['title', 'user', 'category', 'view_count', 'created_at']
     list_filter = ['category', 'created_at']
     search_fields = ['title', 'user__username']
-    readonly_fields = ['view_count', 'created_at', 'updated_at']
+    readonly_fields = ['view_count', 'file_size', 'created_at', 'updated_at']
+    inlines = [AudioVariantInline]
 
 @admin.register(Collection)
 class CollectionAdmin(admin.ModelAdmin):
@@ -42,3 +49,42 @@ class CollectionAdmin(admin.ModelAdmin):
     def audio_count(self, obj):
         return obj.audio_contents.count()
     audio_count.short_description = '오디오 수'
+
+@admin.register(ReviewMix)
+class ReviewMixAdmin(admin.ModelAdmin):
+    list_display = ['collection', 'seed', 'sentence_count', 'file_size', 'created_at']
+    search_fields = ['collection__name', 'collection__user__username']
+    readonly_fields = ['signature', 'file_size', 'created_at']
+
+@admin.register(UsageLedger)
+class UsageLedgerAdmin(admin.ModelAdmin):
+    list_display = [
+        'user', 'audio_count', 'storage_mb', 'duration_minutes', 'sentence_count', 'tts_characters',
+        'updated_at', 'reconciled_at',
+    ]
+    search_fields = ['user__username', 'user__email']
+    ordering = ['-storage_bytes']
+    readonly_fields = [
+        'user', 'audio_count', 'storage_bytes', 'duration_seconds', 'sentence_count', 'tts_characters',
+        'updated_at', 'reconciled_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False  # 생성/수정/삭제 때 자동 집계 (reconcile_usage 로 다시 계산)
+
+    def storage_mb(self, obj):
+        return f"{obj.storage_bytes / 1024 / 1024:.1f}"
+    storage_mb.short_description = '용량 (MB)'
+    storage_mb.admin_order_field = 'storage_bytes'
+
+    def duration_minutes(self, obj):
+        return f"{obj.duration_seconds / 60:.1f}"
+    duration_minutes.short_description = '재생 시간 (분)'
+    duration_minutes.admin_order_field = 'duration_seconds'
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['idempotency_key', 'user', 'status', 'audio', 'created_at', 'updated_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['idempotency_key', 'user__username']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,161 @@
+"""
+비동기 생성 뷰 (ASGI 전용)
+process_file_view / generate_sentences_view 와 같은 동작을 하지만,
+TTS/Gemini/스토리지 대기 중에 워커를 점유하지 않아 한 워커가 여러 생성 작업을 동시에 처리합니다.
+Uvicorn 워커(automaking.asgi:application)로 실행할 때 사용하세요.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseRedirect
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from .decorators import idempotent_generation, premium_required
+from .memory import MemoryBudgetError, ageneration_memory
+from .models import Category
+from .pipeline import (
+    UPLOAD_SOURCE_LANGUAGE, UploadError, arun_generation, asave_audio_content, check_upload, parse_generated_text,
+    stream_uploaded_sentences,
+)
+from .progress import ProgressReporter
+from .providers import get_sentence_provider, get_tts_provider
+from .resilience import ProviderUnavailableError
+from .views import PROVIDER_UNAVAILABLE_MESSAGE, memory_budget_response, provider_unavailable_response
+
+logger = logging.getLogger(__name__)
+
+
+async def aget_category(category_id):
+    if not category_id:
+        return None
+    return await Category.objects.filter(id=int(category_id)).afirst()
+
+
+@login_required
+@premium_required
+@idempotent_generation
+async def process_file_view_async(request):
+    """process_file_view 의 비동기 버전 (프리미엄 멤버 전용)"""
+    if request.method != 'POST':
+        return HttpResponseRedirect(reverse('upload'))
+    user = await request.auser()
+    progress = ProgressReporter(request.POST.get('job_id'), user.id)
+
+    # 1. 파일 검증
+    if 'input_file' not in request.FILES:
+        return HttpResponse("파일을 첨부해주세요.", status=400)
+    uploaded_file = request.FILES['input_file']
+    if not uploaded_file.name.endswith('.txt'):
+        return HttpResponse("TXT 파일만 업로드할 수 있습니다.", status=400)
+
+    # 2. 파일 검사 및 파싱 (임시 파일 읽기는 별도 스레드에서)
+    try:
+        await sync_to_async(check_upload, thread_sensitive=False)(uploaded_file)
+        sentences_to_process = await sync_to_async(list, thread_sensitive=False)(
+            stream_uploaded_sentences(uploaded_file)
+        )
+    except UploadError as e:
+        return HttpResponse(str(e), status=400)
+    except Exception as e:
+        return HttpResponse(f"파일 처리 중 오류 발생: {e}", status=500)
+
+    # 3. TTS 제공자 생성
+    try:
+        tts = get_tts_provider()
+        original_voice_config = tts.get_voice(UPLOAD_SOURCE_LANGUAGE)
+    except Exception as e:
+        return HttpResponse(f"API 클라이언트 초기화 오류: {e}", status=500)
+
+    # 4. 문장 동시 합성 → 조립/인코딩(스레드 풀) → 저장 (워커 메모리 예산 안에서)
+    try:
+        async with ageneration_memory(len(sentences_to_process), f"upload user={user.id}"):
+            mp3_bytes, sync_data, variants = await arun_generation(
+                tts, sentences_to_process, original_voice_config, progress
+            )
+            if mp3_bytes is None:
+                progress('error', message="생성된 오디오 클립이 없습니다.")
+                return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
+
+            # 5. DB 저장 및 스토리지 업로드
+            title = request.POST.get('title', 'Untitled')
+            category = await aget_category(request.POST.get('category'))
+            audio_obj = await asave_audio_content(
+                user, title, category, UPLOAD_SOURCE_LANGUAGE, sentences_to_process, sync_data, mp3_bytes,
+                progress=progress, variants=variants
+            )
+    except MemoryBudgetError as e:
+        logger.warning(f"메모리 예산으로 생성 거부: {e}")
+        progress('error', message=str(e))
+        return memory_budget_response(e)
+    except ProviderUnavailableError as e:
+        logger.error(f"TTS 제공자 장애로 생성 중단: {e}")
+        progress('error', message=PROVIDER_UNAVAILABLE_MESSAGE)
+        return provider_unavailable_response()
+    progress('done', audio_id=audio_obj.id, url=reverse('audio_detail', args=[audio_obj.id]))
+    request.generated_audio = audio_obj
+    return redirect('audio_detail', audio_id=audio_obj.id)
+
+
+@login_required
+@premium_required
+@idempotent_generation
+async def generate_sentences_view_async(request):
+    """generate_sentences_view 의 비동기 버전 (프리미엄 멤버 전용)"""
+    if request.method != 'POST':
+        return HttpResponseRedirect(reverse('upload'))
+
+    title = request.POST.get('title', 'AI 생성 문장')
+    category_id = request.POST.get('category')
+    source_language = request.POST.get('source_language')
+    target_word = request.POST.get('target_word')
+    sentence_count = int(request.POST.get('sentence_count', 5))
+    user = await request.auser()
+    progress = ProgressReporter(request.POST.get('job_id'), user.id)
+
+    try:
+        generated_text = await get_sentence_provider().agenerate_sentences(
+            source_language, target_word, sentence_count
+        )
+        sentences_to_process = parse_generated_text(generated_text)
+        if not sentences_to_process:
+            progress('error', message="문장 생성에 실패했습니다. 다시 시도해주세요.")
+            return HttpResponse("문장 생성에 실패했습니다. 다시 시도해주세요.", status=500)
+        progress('gemini_done', count=len(sentences_to_process))
+
+        try:
+            tts = get_tts_provider()
+            original_voice_config = tts.get_voice(source_language)
+        except Exception as e:
+            return HttpResponse(f"TTS 클라이언트 초기화 오류: {e}", status=500)
+
+        async with ageneration_memory(len(sentences_to_process), f"ai user={user.id}"):
+            mp3_bytes, sync_data, variants = await arun_generation(
+                tts, sentences_to_process, original_voice_config, progress
+            )
+            if mp3_bytes is None:
+                progress('error', message="생성된 오디오 클립이 없습니다.")
+                return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
+
+            category = await aget_category(category_id)
+            audio_obj = await asave_audio_content(
+                user, title, category, source_language, sentences_to_process, sync_data, mp3_bytes,
+                progress=progress, variants=variants
+            )
+        progress('done', audio_id=audio_obj.id, url=reverse('audio_detail', args=[audio_obj.id]))
+        request.generated_audio = audio_obj
+        return redirect('audio_detail', audio_id=audio_obj.id)
+
+    except MemoryBudgetError as e:
+        logger.warning(f"메모리 예산으로 생성 거부: {e}")
+        progress('error', message=str(e))
+        return memory_budget_response(e)
+    except ProviderUnavailableError as e:
+        logger.error(f"AI 문장 생성 제공자 장애: {e}")
+        progress('error', message=PROVIDER_UNAVAILABLE_MESSAGE)
+        return provider_unavailable_response()
+    except Exception as e:
+        logger.error(f"AI 문장 생성 오류: {e}")
+        progress('error', message="문장 생성 중 오류가 발생했습니다.")
+        return HttpResponse(f"문장 생성 중 오류가 발생했습니다: {e}", status=500)
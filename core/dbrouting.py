@@ -0,0 +1,169 @@
+"""
+읽기 전용 복제본(read replica) 라우팅
+@replica_reads 를 붙인 뷰(홈, 오디오 목록, 보관함 상세)의 읽기 쿼리를 settings.DATABASE_REPLICAS 의 복제본으로 보내고,
+그 밖의 모든 쿼리와 쓰기는 기본 DB(primary)로 보냅니다.
+
+- 자기가 쓴 내용 읽기: 쓰기 요청(POST 등)을 보낸 브라우저에는 REPLICA_READS['pin_seconds'] 동안 쿠키를 남겨
+  그동안은 복제본을 쓰지 않습니다. 복제본 뷰 안에서 쓰기가 일어나면 그 요청의 나머지 읽기도 primary 로 보냅니다.
+- 상태 확인: 복제본 뷰를 처리하기 전에 복제본의 지연(PostgreSQL 은 마지막 WAL 재생 시각)을 확인하고
+  프로세스 안에 check_interval_seconds 동안 기억합니다. 지연이 max_lag_seconds 를 넘거나 연결할 수 없으면
+  retry_seconds 동안 그 복제본을 빼고, 쓸 수 있는 복제본이 없으면 primary 를 씁니다.
+- 세션/사용자는 복제본을 고르기 전에 primary 에서 읽습니다. (로그인 직후 복제본에 세션이 아직 없을 수 있음)
+- migrate 는 복제본에서 실행하지 않습니다.
+라우팅 상태는 ReplicaReadMiddleware 가 요청마다 만듭니다. (요청 밖의 커맨드/작업은 항상 primary)
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# PostgreSQL 복제본의 지연(초). 받은 WAL 을 모두 재생했으면 0, primary 에 연결하면 (복구 중이 아님) 0
+POSTGRESQL_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class _RequestState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None  # 이 요청에서 읽기에 쓸 복제본 alias
+        self.wrote = False
+
+
+_state = ContextVar('replica_read_state', default=None)
+_health = {}  # alias -> (다시 확인할 시각, 쓸 수 있는지)
+
+
+def get_config():
+    return settings.REPLICA_READS
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def use_replica(request):
+    """
+    요청의 읽기에 쓸 복제본을 고릅니다. 쓰기 요청이거나 primary 고정 쿠키가 있거나
+    ReplicaReadMiddleware 밖(라우팅 상태 없음)이면 primary 를 그대로 씁니다.
+    """
+    state = _state.get()
+    if state is None or request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+        return
+    # 세션/사용자는 primary 에서 먼저 읽어 둠
+    request.user.is_authenticated
+    state.replica = choose_replica()
+
+
+def replica_reads(view_func):
+    """
+    이 뷰의 읽기 쿼리를 복제본으로 보냅니다. (login_required 등 다른 데코레이터보다 바깥에 붙임, 비동기 뷰도 지원)
+    미들웨어의 process_view 대신 뷰에서 고르므로, 복제본을 쓰지 않는 뷰는 ASGI 에서도 스레드를 거치지 않습니다.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # 사용자 조회와 복제본 상태 확인은 DB 를 쓰므로 동기 컨텍스트에서 실행
+            await sync_to_async(use_replica)(request)
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        use_replica(request)
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def replica_lag(alias):
+    """복제본의 지연(초). PostgreSQL 이 아니면 (로컬 SQLite 복제본) 연결만 확인하고 0"""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRESQL_LAG_SQL)
+        else:
+            cursor.execute('SELECT 0')
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    cached = _health.get(alias)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    config = get_config()
+    try:
+        lag = replica_lag(alias)
+        healthy = lag <= config['max_lag_seconds']
+        if not healthy:
+            logger.warning(f"복제본 지연 {lag:.1f}초, {config['retry_seconds']}초 동안 primary 사용 (db: {alias})")
+    except DatabaseError as e:
+        healthy = False
+        logger.warning(f"복제본 연결 실패, {config['retry_seconds']}초 동안 primary 사용 (db: {alias}): {e}")
+        connections[alias].close()
+    interval = config['check_interval_seconds'] if healthy else config['retry_seconds']
+    _health[alias] = (now + interval, healthy)
+    return healthy
+
+
+def choose_replica():
+    """쓸 수 있는 복제본 하나 (없으면 None)"""
+    healthy = [alias for alias in get_replicas() if is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def begin_request():
+    """요청의 라우팅 상태를 만듭니다. 반환값은 end_request 에 넘김"""
+    state = _RequestState()
+    return state, _state.set(state)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+class ReplicaRouter:
+    """settings.DATABASE_ROUTERS 에 등록. 복제본 뷰의 읽기만 복제본으로, 나머지는 모두 primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS  # 트랜잭션 안의 읽기는 같은 DB 에서
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # 복제본에서 읽은 객체를 저장해도 primary 에 쓰도록 항상 지정
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
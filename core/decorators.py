@@ -2,41 +2,117 @@
 커스텀 데코레이터 - 권한 체크
 """
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
 from django.http import HttpResponseForbidden, JsonResponse
-from django.shortcuts import render
+from django.shortcuts import redirect, render
+
+
+def _premium_denied_response(request):
+    """프리미엄 멤버가 아니면 거부 응답을, 통과하면 None을 반환합니다."""
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden("로그인이 필요합니다.")
+    
+    # UserProfile이 없는 경우 자동 생성
+    if not hasattr(request.user, 'profile'):
+        from .models import UserProfile
+        UserProfile.objects.create(user=request.user)
+    
+    if not request.user.profile.can_upload:
+        # JSON 요청인 경우
+        if request.headers.get('Content-Type') == 'application/json' or request.META.get('HTTP_ACCEPT') == 'application/json':
+            return JsonResponse({
+                'error': '프리미엄 멤버십이 필요한 기능입니다.',
+                'membership_required': True
+            }, status=403)
+        
+        # HTML 요청인 경우
+        return render(request, 'core/membership_required.html', status=403)
+    
+    return None
 
 
 def premium_required(view_func):
     """
     프리미엄 멤버십이 필요한 뷰에 사용하는 데코레이터
-    로그인 + 프리미엄 멤버십 확인
+    로그인 + 프리미엄 멤버십 확인 (비동기 뷰도 지원)
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # 권한 확인은 DB 조회가 필요하므로 동기 컨텍스트에서 실행
+            response = await sync_to_async(_premium_denied_response)(request)
+            if response is not None:
+                return response
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return HttpResponseForbidden("로그인이 필요합니다.")
-        
-        # UserProfile이 없는 경우 자동 생성
-        if not hasattr(request.user, 'profile'):
-            from .models import UserProfile
-            UserProfile.objects.create(user=request.user)
-        
-        if not request.user.profile.can_upload:
-            # JSON 요청인 경우
-            if request.headers.get('Content-Type') == 'application/json' or request.META.get('HTTP_ACCEPT') == 'application/json':
-                return JsonResponse({
-                    'error': '프리미엄 멤버십이 필요한 기능입니다.',
-                    'membership_required': True
-                }, status=403)
-            
-            # HTML 요청인 경우
-            return render(request, 'core/membership_required.html', status=403)
-        
+        response = _premium_denied_response(request)
+        if response is not None:
+            return response
         return view_func(request, *args, **kwargs)
     
     return wrapper
 
 
+def _duplicate_generation_response(request, job):
+    """이미 완료된 작업이면 결과로 이동하고, 진행 중이면 진행 상황 페이지를 보여줍니다."""
+    if job.audio_id:
+        return redirect('audio_detail', audio_id=job.audio_id)
+    return render(request, 'core/generation_pending.html', {
+        'job_id': job.idempotency_key,
+        'async_generation': settings.ASYNC_GENERATION,
+    }, status=202)
+
+
+def idempotent_generation(view_func):
+    """
+    생성 POST 를 멱등 키(job_id)로 보호하는 데코레이터 (비동기 뷰도 지원)
+    중복 요청은 다시 생성하지 않고 기존 결과로 이동하거나 진행 중인 작업에 연결합니다.
+    뷰는 생성에 성공하면 request.generated_audio 에 AudioContent 를 넣어야 합니다.
+    """
+    from .jobs import claim_job, finish_job
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return await view_func(request, *args, **kwargs)
+            user = await request.auser()
+            job, existing = await sync_to_async(claim_job)(user, request.POST.get('job_id'))
+            if existing is not None:
+                return await sync_to_async(_duplicate_generation_response)(request, existing)
+            audio = None
+            try:
+                response = await view_func(request, *args, **kwargs)
+                audio = getattr(request, 'generated_audio', None)
+                return response
+            finally:
+                await sync_to_async(finish_job)(job, audio)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+        job, existing = claim_job(request.user, request.POST.get('job_id'))
+        if existing is not None:
+            return _duplicate_generation_response(request, existing)
+        audio = None
+        try:
+            response = view_func(request, *args, **kwargs)
+            audio = getattr(request, 'generated_audio', None)
+            return response
+        finally:
+            finish_job(job, audio)
+
+    return wrapper
+
+
 def owner_or_premium_required(view_func):
     """
     본인 게시물이거나 프리미엄 멤버인 경우에만 수정/삭제 가능
@@ -0,0 +1,143 @@
+"""
+로컬 디스크 오디오 캐시
+재생할 오디오 파일을 서버 디스크에 캐시해 두고 nginx 가 X-Accel-Redirect 로 바로 보내게 합니다.
+(매 재생마다 서명 URL 을 만들고 다른 리전의 스토리지에서 받는 대신 sendfile 로 전송)
+
+- 키는 스토리지 파일 이름입니다. 수정하면 새 이름으로 올리므로 (core.editing) 캐시된 파일이 바뀔 일이 없습니다.
+- 없으면 스토리지에서 조각 단위로 받아 임시 파일에 쓴 뒤 os.replace 로 옮깁니다. (동시에 채워도 안전)
+- 읽을 때마다 수정 시각을 갱신하고, 전체 크기가 한도를 넘으면 오래 읽지 않은 파일부터 지웁니다. (LRU)
+  여러 워커가 같은 디렉터리를 쓰므로 크기는 디렉터리를 훑어 계산하되, 채운 양이 한도의 일부를 넘을 때만 훑습니다.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .storage import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+EVICT_TARGET_RATIO = 0.9  # 한도를 넘으면 이 비율까지 줄임
+SCAN_EVERY_RATIO = 0.05  # 이 프로세스가 한도의 이 비율만큼 채울 때마다 디렉터리를 훑음
+STALE_FILL_SECONDS = 3600  # 이보다 오래된 채우기 임시 파일은 중단된 것으로 봄
+
+_lock = threading.Lock()
+_filled_since_scan = 0
+
+
+def get_config():
+    return settings.AUDIO_DISK_CACHE
+
+
+def is_enabled():
+    return get_config()['enabled']
+
+
+def cache_path(name):
+    """스토리지 파일 이름 → 캐시 디렉터리 안의 상대 경로 (하위 디렉터리 256개로 분산, 확장자 유지)"""
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+    return os.path.join(digest[:2], digest + os.path.splitext(name)[1])
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def ensure_cached(field_file):
+    """
+    파일을 캐시에 두고 캐시 디렉터리 기준 상대 경로를 돌려줍니다.
+    이미 있으면 마지막 접근 시각만 갱신합니다.
+    """
+    config = get_config()
+    relative = cache_path(field_file.name)
+    path = os.path.join(config['dir'], relative)
+    if os.path.exists(path):
+        _touch(path)
+        return relative
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.fill-')
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter_chunks(field_file.storage, field_file.name):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    _record_fill(size)
+    return relative
+
+
+def _record_fill(size):
+    global _filled_since_scan
+    max_bytes = get_config()['max_mb'] * 1024 * 1024
+    with _lock:
+        _filled_since_scan += size
+        if _filled_since_scan < max_bytes * SCAN_EVERY_RATIO:
+            return
+        _filled_since_scan = 0
+    evict(max_bytes)
+
+
+def _cached_files(directory):
+    """
+    (마지막 접근 시각, 크기, 경로) 목록. 채우는 중인 임시 파일은 제외하고,
+    워커가 죽어 오래 남은 임시 파일은 지웁니다.
+    """
+    files = []
+    stale_before = time.time() - STALE_FILL_SECONDS
+    for sub in os.scandir(directory):
+        if not sub.is_dir():
+            continue
+        for entry in os.scandir(sub.path):
+            try:
+                stat = entry.stat()
+                if entry.name.startswith('.fill-'):
+                    if stat.st_mtime < stale_before:
+                        os.unlink(entry.path)
+                    continue
+            except OSError:
+                continue  # 다른 워커가 방금 지움
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    return files
+
+
+def evict(max_bytes=None):
+    """전체 크기가 한도를 넘으면 오래 읽지 않은 파일부터 지웁니다. 반환값: (지운 파일 수, 지운 바이트)"""
+    config = get_config()
+    max_bytes = config['max_mb'] * 1024 * 1024 if max_bytes is None else max_bytes
+    if not os.path.isdir(config['dir']):
+        return 0, 0
+    files = _cached_files(config['dir'])
+    total = sum(size for _, size, _ in files)
+    if total <= max_bytes:
+        return 0, 0
+
+    removed, removed_bytes = 0, 0
+    target = max_bytes * EVICT_TARGET_RATIO
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        removed_bytes += size
+    logger.info(f"오디오 디스크 캐시 정리: {removed}개 {removed_bytes / 1024 / 1024:.1f}MB 삭제")
+    return removed, removed_bytes
+
@@ -0,0 +1,268 @@
+"""
+문장 하나 수정
+수정한 문장만 다시 합성해 기존 MP3 에서 그 문장 세트 구간만 바꿔 끼웁니다. (TTS 호출 1회)
+
+- 앞/뒤 문장은 다시 인코딩하지 않고 MP3 프레임을 그대로 복사합니다.
+  자르는 위치는 문장 세트 사이 무음의 가운데 프레임 경계입니다. 디지털 무음 프레임은 본문 데이터를 쓰지 않으므로
+  비트 저장소(main_data_begin)가 앞 프레임을 가리켜도 잘라낸 뒤 그대로 디코딩됩니다.
+- 새 문장 세트는 plan_lesson 과 같은 배치(공백 - 원문 × 3 - 공백)로 따로 인코딩하고,
+  앞 무음을 조절해 새 문장의 시작이 원래 시작 위치에 오도록 맞춥니다.
+- 뒤 문장들의 start/end 는 실제 프레임 수로 계산한 길이 차이만큼 옮깁니다.
+"""
+import itertools
+import json
+
+import numpy as np
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from pydub.utils import ratio_to_db
+
+from .encoding import (
+    CODECS, LAME_DELAY_SAMPLES, count_mp3_samples, decode_mp3_to_pcm, encode_mp3_from_mp3, encode_pcm_to_mp3,
+    encode_rendition_from_mp3, is_info_frame, iter_mp3_frames,
+)
+from .models import AudioContent
+from .orphans import discard_file
+from .playlist import invalidate_playlists, sync_duration
+from .pipeline import (
+    PCM_SAMPLE_WIDTH, SET_BREAK_MS, SPEAKING_RATE, RenderedVariant, build_audio_filename, build_variant,
+    build_variant_filename, normalize_gain_db, plan_lesson, synthesize_clip,
+)
+from .tiering import ensure_hot
+from .usage import record_usage
+from .waveform import compute_peaks, pack_peaks
+
+
+class EditError(ValueError):
+    """수정할 수 없는 요청 (잘못된 문장 번호, 빈 문장, 읽을 수 없는 MP3 등)"""
+
+
+class EditConflictError(EditError):
+    """수정하는 사이에 다른 수정이 먼저 저장된 경우"""
+
+
+def _frame_index_at(frames, sample):
+    """sample 위치를 넘지 않는 마지막 프레임 경계의 프레임 번호"""
+    cursor = 0
+    for i, frame in enumerate(frames):
+        if cursor + frame.samples > sample:
+            return i
+        cursor += frame.samples
+    return len(frames)
+
+
+def _join_frames(data, frames):
+    return b''.join(data[frame.offset:frame.offset + frame.length] for frame in frames)
+
+
+def _matched_gain_db(data, frames, clip_peak):
+    """
+    원래 문장 구간을 디코딩해 재생 피크를 재고, 새 클립이 같은 크기로 재생되도록 게인(dB)을 정합니다.
+    저장된 파일에는 원래 게인이 남아 있지 않으므로 실제 소리 크기를 기준으로 삼고, 정규화 게인을 넘지 않게 합니다.
+    """
+    limit = normalize_gain_db(clip_peak)
+    pcm = decode_mp3_to_pcm(_join_frames(data, frames), frames[0].channels) if frames else b''
+    old_peak = 0.0
+    if pcm:
+        samples = np.frombuffer(pcm, dtype=f'<i{PCM_SAMPLE_WIDTH}').astype(np.int32)
+        old_peak = float(np.abs(samples).max()) / (1 << (8 * PCM_SAMPLE_WIDTH - 1))
+    if old_peak <= 0 or clip_peak <= 0:
+        return limit
+    return min(limit, ratio_to_db(old_peak / clip_peak))
+
+
+def splice_sentence(mp3_bytes, sync_data, index, sentence_pair, clip):
+    """
+    MP3 의 index 번째 문장 세트를 새 클립으로 바꿉니다.
+    반환값: (새 MP3 바이트, 새 sync_data)
+    """
+    frames = list(iter_mp3_frames(mp3_bytes))
+    if not frames:
+        raise EditError("MP3 프레임을 찾을 수 없습니다.")
+    # pydub 으로 만든 예전 파일은 Xing/Info 프레임(인코더 지연 정보)이 있음. 떼어내면 재생기가 지연을 잘라내지 않으므로
+    # 기존 타임스탬프를 지연만큼 뒤로 옮김
+    shift = 0.0
+    if is_info_frame(mp3_bytes, frames[0]):
+        frames = frames[1:]
+        shift = LAME_DELAY_SAMPLES / frames[0].sample_rate
+    frame_rate, channels = frames[0].sample_rate, frames[0].channels
+    sync_data = [dict(entry, start=entry['start'] + shift, end=entry['end'] + shift) for entry in sync_data]
+    entry = sync_data[index]
+
+    # 자를 위치: 앞/뒤 문장 세트 사이 무음의 가운데 (첫 문장은 파일 처음, 마지막 문장은 파일 끝)
+    if index > 0:
+        head_cut = _frame_index_at(frames, (sync_data[index - 1]['end'] + entry['start']) / 2 * frame_rate)
+    else:
+        head_cut = 0
+    if index + 1 < len(sync_data):
+        tail_cut = _frame_index_at(frames, (entry['end'] + sync_data[index + 1]['start']) / 2 * frame_rate)
+        tail_cut = max(head_cut, tail_cut)
+    else:
+        tail_cut = len(frames)
+    head_samples = sum(frame.samples for frame in frames[:head_cut])
+    tail_samples = sum(frame.samples for frame in frames[:tail_cut])
+
+    plan, _ = plan_lesson([(sentence_pair, clip)], frame_rate=frame_rate, channels=channels)
+    plan.gain_db = _matched_gain_db(mp3_bytes, frames[head_cut:tail_cut], clip.peak)
+
+    # 앞 무음: 새 문장 시작이 원래 시작 위치에 오도록 (인코더 지연 포함)
+    lead = max(0, int(round(entry['start'] * frame_rate)) - head_samples - LAME_DELAY_SAMPLES)
+    # 뒤 무음: 뒤 문장까지의 간격이 SET_BREAK_MS 가 되도록 (뒤쪽 프레임에 남은 무음만큼 덜 넣음)
+    trail = 0
+    if tail_cut < len(frames):
+        remaining = int(round(sync_data[index + 1]['start'] * frame_rate)) - tail_samples
+        trail = max(0, int(round(SET_BREAK_MS * frame_rate / 1000)) - remaining)
+    block = encode_pcm_to_mp3(
+        itertools.chain(plan._silence(lead), plan.render(), plan._silence(trail)), frame_rate, channels
+    )
+
+    start = head_samples + LAME_DELAY_SAMPLES + lead
+    delta = (head_samples + count_mp3_samples(block) - tail_samples) / frame_rate
+    new_entry = dict(
+        entry,
+        text=sentence_pair['text'],
+        translation=sentence_pair['translation'],
+        start=round(start / frame_rate, 3),
+        end=round((start + plan.total_samples) / frame_rate, 3),
+    )
+    new_sync = [
+        dict(item, start=round(item['start'], 3), end=round(item['end'], 3)) for item in sync_data[:index]
+    ] + [new_entry] + [
+        dict(item, start=round(item['start'] + delta, 3), end=round(item['end'] + delta, 3))
+        for item in sync_data[index + 1:]
+    ]
+    new_mp3 = _join_frames(mp3_bytes, frames[:head_cut]) + block + _join_frames(mp3_bytes, frames[tail_cut:])
+    return new_mp3, new_sync
+
+
+def _line_index(lines, sync_data, index):
+    """
+    sync_data 의 index 번째 문장이 original_text 의 몇 번째 줄인지 찾습니다.
+    합성에 실패한 문장은 sync_data 에 없으므로 줄과 순서대로 맞춰 봅니다.
+    """
+    if len(lines) == len(sync_data):
+        return index
+    line = 0
+    for i, entry in enumerate(sync_data):
+        while line < len(lines) and lines[line].strip() != entry['text'].strip():
+            line += 1
+        if line >= len(lines):
+            break
+        if i == index:
+            return line
+        line += 1
+    return index if index < len(lines) else None
+
+
+def replace_line(text, line, value):
+    lines = text.split('\n')
+    if line is not None and line < len(lines):
+        lines[line] = value
+    return '\n'.join(lines)
+
+
+def rebuild_variants(audio_obj, mp3_bytes, sync_data):
+    """
+    수정된 MP3 로 기존 파생 파일(속도 버전/렌디션/파형)을 다시 만듭니다. (클립 없이 MP3 에서 변환)
+    반환값: RenderedVariant 목록. 만들지 못한 파생 파일은 빠지며, 호출한 쪽에서 기존 파일과 함께 정리합니다.
+    """
+    rendered = []
+    for variant in audio_obj.variants.all():
+        if variant.codec == 'peaks':
+            frame = next(iter_mp3_frames(mp3_bytes))
+            peaks = compute_peaks([decode_mp3_to_pcm(mp3_bytes, frame.channels)], frame.sample_rate, frame.channels)
+            rendered.append(RenderedVariant(variant.speaking_rate, 'peaks', pack_peaks(peaks, sync_data)))
+        elif variant.codec == 'mp3':
+            tempo = variant.speaking_rate / SPEAKING_RATE
+            content = encode_mp3_from_mp3(mp3_bytes, tempo)
+            delay = LAME_DELAY_SAMPLES / next(iter_mp3_frames(content)).sample_rate
+            # 원본 t 초 → t / tempo + 인코더 지연 (원본에 이미 있던 지연도 함께 늘어남)
+            rate_sync = [
+                dict(entry, start=round(entry['start'] / tempo + delay, 3), end=round(entry['end'] / tempo + delay, 3))
+                for entry in sync_data
+            ]
+            rendered.append(RenderedVariant(variant.speaking_rate, 'mp3', content, rate_sync))
+        elif variant.codec in CODECS:
+            content = encode_rendition_from_mp3(variant.codec, [mp3_bytes])
+            rendered.append(RenderedVariant(variant.speaking_rate, variant.codec, content))
+    return rendered
+
+
+def edit_sentence(audio_obj, index, text, translation, tts, voice):
+    """
+    오디오의 index 번째 문장을 수정합니다.
+    새 MP3 와 파생 파일을 새 이름으로 올린 뒤 DB 를 바꾸고, 그 다음에 이전 파일을 지웁니다.
+    DB 갱신은 읽었을 때의 파일 이름이 그대로일 때만 하므로, 동시에 들어온 수정은 EditConflictError 로 거절됩니다.
+    """
+    text, translation = text.strip(), translation.strip()
+    if not text:
+        raise EditError("문장을 비워둘 수 없습니다.")
+    sync_data = json.loads(audio_obj.sync_data or '[]')
+    if not 0 <= index < len(sync_data):
+        raise EditError("잘못된 문장 번호입니다.")
+    if not audio_obj.audio_file:
+        raise EditError("오디오 파일이 없습니다.")
+
+    ensure_hot([audio_obj])
+    old_name = audio_obj.audio_file.name
+    with audio_obj.audio_file.open('rb') as f:
+        mp3_bytes = f.read()
+    sentence_pair = {'text': text, 'translation': translation}
+    clip = synthesize_clip(tts, text, voice)
+    new_mp3, new_sync = splice_sentence(mp3_bytes, sync_data, index, sentence_pair, clip)
+    variants = rebuild_variants(audio_obj, new_mp3, new_sync)
+
+    line = _line_index(audio_obj.original_text.split('\n'), sync_data, index)
+    original_text = replace_line(audio_obj.original_text, line, text)
+    translated_text = replace_line(audio_obj.translated_text, line, translation)
+
+    storage = audio_obj.audio_file.storage
+    new_name = storage.save(audio_obj.audio_file.field.generate_filename(
+        audio_obj, build_audio_filename()
+    ), ContentFile(new_mp3))
+    old_variants = list(audio_obj.variants.all())
+    new_variants = []
+    try:
+        for variant in variants:
+            variant_obj = build_variant(audio_obj, variant)
+            variant_obj.file.save(build_variant_filename(new_name, variant), ContentFile(variant.content), save=False)
+            new_variants.append(variant_obj)
+        with transaction.atomic():
+            updated = AudioContent.objects.filter(pk=audio_obj.pk, audio_file=old_name).update(
+                audio_file=new_name,
+                sync_data=json.dumps(new_sync),
+                original_text=original_text,
+                translated_text=translated_text,
+                file_size=len(new_mp3),
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                raise EditConflictError("다른 수정이 먼저 저장되었습니다. 새로고침 후 다시 시도해주세요.")
+            # unique_together(오디오, 속도, 코덱) 때문에 이전 행을 먼저 지우고 새 행을 저장
+            audio_obj.variants.filter(pk__in=[variant.pk for variant in old_variants]).delete()
+            for variant_obj in new_variants:
+                variant_obj.save()
+    except Exception:
+        storage.delete(new_name)
+        for variant_obj in new_variants:
+            variant_obj.file.storage.delete(variant_obj.file.name)
+        raise
+
+    # DB 가 바뀐 뒤에 이전 파일 정리 (QuerySet.delete 는 모델 delete() 를 부르지 않으므로 파일을 직접 지움)
+    discard_file(storage, old_name)
+    for variant in old_variants:
+        discard_file(variant.file.storage, variant.file.name)
+
+    record_usage(
+        audio_obj.user_id,
+        storage_bytes=(len(new_mp3) + sum(len(variant.content) for variant in variants))
+        - (len(mp3_bytes) + sum(variant.file_size for variant in old_variants)),
+        duration_seconds=sync_duration(new_sync) - sync_duration(sync_data),
+        tts_characters=len(text),
+    )
+
+    # 보관함 재생목록의 길이/URL 이 바뀜
+    invalidate_playlists(list(audio_obj.collections.values_list('pk', flat=True)))
+    audio_obj.refresh_from_db()
+    return audio_obj, new_sync
@@ -0,0 +1,221 @@
+"""
+보관함 내보내기 (ZIP 스트리밍)
+보관함의 MP3 와 항목별 대본/타임스탬프 파일을 ZIP 으로 묶어 바로 흘려보냅니다.
+
+- 압축하지 않는(STORED) ZIP 을 직접 씁니다. MP3 는 더 줄지 않으므로 압축할 이유가 없고,
+  그 덕분에 파일 크기만으로 전체 길이를 미리 계산해 Content-Length 를 줄 수 있습니다.
+- CRC 는 데이터를 흘려보낸 뒤 데이터 디스크립터에 씁니다. MP3 는 스토리지에서 조각 단위로 읽으므로
+  보관함 크기와 상관없이 메모리 사용량이 일정합니다.
+- 같은 보관함이면 항상 같은 바이트가 나오므로 (시각은 오디오 수정 시각 사용) Range 요청으로 이어받을 수 있습니다.
+  건너뛰는 파일의 CRC 는 캐시에 있으면 쓰고, 없으면 읽어서 계산만 합니다.
+"""
+import hashlib
+import json
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .storage import iter_chunks
+from .tiering import ensure_hot
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_DESCRIPTOR = struct.Struct('<IIII')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+_FLAGS = 0x0808  # 데이터 디스크립터 사용 + UTF-8 파일 이름
+_VERSION = 20
+ZIP_MAX_BYTES = 0xFFFFFFFF  # ZIP64 없이 쓸 수 있는 최대 크기
+
+CRC_CACHE_TIMEOUT = None  # 스토리지 파일 이름은 수정 시 바뀌므로 (core.editing) 이름별 CRC 는 만료되지 않음
+SIZE_PROBE_WORKERS = 8
+
+
+class ExportTooLargeError(ValueError):
+    """ZIP64 가 필요한 크기 (4GB 이상)"""
+
+
+class ZipEntry(NamedTuple):
+    name: str
+    size: int
+    date_time: tuple  # (년, 월, 일, 시, 분, 초)
+    read: Callable  # read(start) -> 바이트 조각 이터레이터
+    crc: Optional[int] = None  # 미리 알고 있으면 이어받기 때 읽지 않고 건너뜀
+    crc_key: Optional[str] = None  # 계산한 CRC 를 저장할 캐시 키
+
+
+def _dos_time(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), (max(year, 1980) - 1980) << 9 | (month << 5) | day
+
+
+def zip_size(entries):
+    """stream_zip 이 만들 ZIP 의 전체 바이트 수"""
+    total = 0
+    for entry in entries:
+        name_length = len(entry.name.encode('utf-8'))
+        total += _LOCAL_HEADER.size + name_length + entry.size + _DESCRIPTOR.size
+        total += _CENTRAL_HEADER.size + name_length
+    return total + _END_RECORD.size
+
+
+def _crc_of(entry):
+    crc = 0
+    for chunk in entry.read(0):
+        crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def stream_zip(entries, start=0, end=None):
+    """
+    항목들을 STORED ZIP 으로 흘려보냅니다. [start, end) 바이트 구간만 내보낼 수 있습니다. (end 는 제외)
+    """
+    end = zip_size(entries) if end is None else end
+    offset = 0
+    central = []
+
+    def window(data, position):
+        """position 에서 시작하는 data 중 [start, end) 에 걸치는 부분"""
+        low, high = max(start, position), min(end, position + len(data))
+        return data[low - position:high - position] if low < high else b''
+
+    for entry in entries:
+        if offset >= end:
+            return
+        name = entry.name.encode('utf-8')
+        mod_time, mod_date = _dos_time(entry.date_time)
+        header_offset = offset
+        header = _LOCAL_HEADER.pack(
+            0x04034B50, _VERSION, _FLAGS, 0, mod_time, mod_date, 0, 0, 0, len(name), 0
+        ) + name
+        part = window(header, offset)
+        if part:
+            yield part
+        offset += len(header)
+        if offset >= end:
+            return
+
+        data_end = offset + entry.size
+        if data_end <= start:
+            # 이어받기로 건너뛰는 파일: CRC 만 필요 (캐시에 있으면 읽지 않음)
+            crc = entry.crc if entry.crc is not None else _crc_of(entry)
+        else:
+            # CRC 를 알고 있으면 필요한 위치부터 읽고, 모르면 처음부터 읽으며 계산
+            skip = max(0, start - offset) if entry.crc is not None else 0
+            crc, position = 0, offset + skip
+            for chunk in entry.read(skip):
+                chunk = chunk[:data_end - position]
+                crc = zlib.crc32(chunk, crc)
+                part = window(chunk, position)
+                if part:
+                    yield part
+                position += len(chunk)
+                if position >= end:
+                    break
+            if position != data_end and position < end:
+                raise IOError(f"{entry.name}: 파일 크기가 바뀌었습니다. ({entry.size} -> {position - offset})")
+            if skip or position < data_end:
+                crc = entry.crc
+        if entry.crc is None and crc is not None and entry.crc_key:
+            cache.set(entry.crc_key, crc, CRC_CACHE_TIMEOUT)
+        offset = data_end
+        if offset >= end:
+            return
+
+        descriptor = _DESCRIPTOR.pack(0x08074B50, crc, entry.size, entry.size)
+        part = window(descriptor, offset)
+        if part:
+            yield part
+        offset += len(descriptor)
+
+        central.append(_CENTRAL_HEADER.pack(
+            0x02014B50, _VERSION, _VERSION, _FLAGS, 0, mod_time, mod_date, crc, entry.size, entry.size,
+            len(name), 0, 0, 0, 0, 0, header_offset,
+        ) + name)
+
+    directory = b''.join(central)
+    trailer = directory + _END_RECORD.pack(0x06054B50, 0, 0, len(central), len(central), len(directory), offset, 0)
+    part = window(trailer, offset)
+    if part:
+        yield part
+
+
+# -----------------------------------------------------------
+# 보관함 항목
+# -----------------------------------------------------------
+
+def _memory_entry(name, data, date_time):
+    return ZipEntry(name, len(data), date_time, lambda start: iter([data[start:]]), zlib.crc32(data))
+
+
+def _storage_entry(name, field_file, size, date_time):
+    storage, storage_name = field_file.storage, field_file.name
+    crc_key = f"export_crc:{storage_name}"
+    return ZipEntry(
+        name, size, date_time, lambda start: iter_chunks(storage, storage_name, start),
+        cache.get(crc_key), crc_key,
+    )
+
+
+def invalidate_file_cache(name):
+    """파일 이름은 그대로인데 내용이 바뀌었을 때 (콜드 티어 재인코딩) 캐시한 크기/CRC 를 지웁니다."""
+    cache.delete_many([f"export_size:{name}", f"export_crc:{name}"])
+
+
+def build_transcript(audio):
+    """업로드 TXT 와 같은 형식의 대본 (원문/번역 줄 쌍, 빈 줄로 구분). 다시 업로드할 수 있습니다."""
+    originals = (audio.original_text or '').split('\n')
+    translations = (audio.translated_text or '').split('\n')
+    pairs = [
+        f"{text.strip()}\n{translations[i].strip() if i < len(translations) else ''}"
+        for i, text in enumerate(originals) if text.strip()
+    ]
+    return '\n\n'.join(pairs) + '\n'
+
+
+def _file_sizes(audios):
+    """MP3 크기 (스토리지 HEAD 요청은 병렬로, 결과는 파일 이름별로 캐시)"""
+    def size_of(audio):
+        key = f"export_size:{audio.audio_file.name}"
+        size = cache.get(key)
+        if size is None:
+            size = audio.audio_file.storage.size(audio.audio_file.name)
+            cache.set(key, size, CRC_CACHE_TIMEOUT)
+        return size
+
+    with ThreadPoolExecutor(max_workers=SIZE_PROBE_WORKERS) as executor:
+        return list(executor.map(size_of, audios))
+
+
+def collection_entries(collection):
+    """보관함의 항목별 MP3, 대본(.txt), 타임스탬프(.json) ZIP 항목 목록"""
+    audios = [audio for audio in collection.audio_contents.order_by('pk') if audio.audio_file]
+    ensure_hot(audios)
+    entries = []
+    for number, (audio, size) in enumerate(zip(audios, _file_sizes(audios)), start=1):
+        stem = f"{number:02d}-{slugify(audio.title, allow_unicode=True) or f'audio-{audio.pk}'}"
+        date_time = timezone.localtime(audio.updated_at).timetuple()[:6]
+        try:
+            sync_data = json.loads(audio.sync_data or '[]')
+        except ValueError:
+            sync_data = []
+        entries.append(_storage_entry(f"{stem}.mp3", audio.audio_file, size, date_time))
+        entries.append(_memory_entry(f"{stem}.txt", build_transcript(audio).encode('utf-8'), date_time))
+        entries.append(_memory_entry(
+            f"{stem}.json", json.dumps(sync_data, ensure_ascii=False, indent=2).encode('utf-8'), date_time
+        ))
+    if zip_size(entries) > ZIP_MAX_BYTES:
+        raise ExportTooLargeError("보관함이 너무 커서 한 번에 내려받을 수 없습니다.")
+    return entries
+
+
+def entries_etag(entries):
+    """ZIP 내용이 같으면 같은 값 (이어받기 If-Range 확인용)"""
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(f"{entry.name}:{entry.size}:{entry.date_time}:{entry.crc_key or entry.crc}\n".encode())
+    return f'"{digest.hexdigest()[:32]}"'
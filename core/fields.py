@@ -0,0 +1,112 @@
+"""
+압축 텍스트 필드
+원문/번역/타임스탬프처럼 큰 텍스트를 zlib 로 압축해 바이너리 컬럼에 저장하고, 읽을 때 문자열로 풀어 줍니다.
+모델 코드에서는 TextField 와 똑같이 문자열로 다룹니다.
+
+- 저장 형식: 첫 바이트 0 = 압축하지 않은 UTF-8 (짧거나 압축 효과가 없는 값), 1 = zlib 스트림
+- 공유 사전(settings.TEXT_COMPRESSION_DICTIONARIES)을 쓰면 짧은 행도 잘 줄어듭니다.
+  (train_text_dictionary 커맨드로 만든 파일) 새로 쓰는 값은 마지막 사전으로 압축하고,
+  읽을 때는 zlib 헤더의 사전 id(adler32)로 어느 사전인지 찾으므로 사전을 바꿔도 예전 행을 그대로 읽습니다.
+- 압축한 바이트로는 검색(icontains 등)할 수 없으므로 검색하는 필드에는 쓰지 않습니다.
+"""
+import functools
+import zlib
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+RAW = 0
+ZLIB = 1
+MIN_COMPRESS_BYTES = 64  # 이보다 짧으면 압축하지 않음 (zlib 헤더가 더 큼)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dictionaries(paths):
+    dictionaries = {}
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise ImproperlyConfigured(f"텍스트 압축 사전을 읽을 수 없습니다: {path} ({e})")
+        dictionaries[zlib.adler32(data)] = data
+    return dictionaries, (data if paths else None)
+
+
+def get_dictionaries():
+    """(사전 id -> 사전, 새 값에 쓸 사전)"""
+    return _load_dictionaries(tuple(getattr(settings, 'TEXT_COMPRESSION_DICTIONARIES', ())))
+
+
+def compress_text(value):
+    data = value.encode('utf-8')
+    if len(data) >= MIN_COMPRESS_BYTES:
+        _, dictionary = get_dictionaries()
+        level = getattr(settings, 'TEXT_COMPRESSION_LEVEL', 6)
+        compressor = zlib.compressobj(level, zdict=dictionary) if dictionary else zlib.compressobj(level)
+        compressed = compressor.compress(data) + compressor.flush()
+        if len(compressed) < len(data):
+            return bytes([ZLIB]) + compressed
+    return bytes([RAW]) + data
+
+
+def decompress_text(value):
+    value = bytes(value)  # PostgreSQL bytea 는 memoryview 로 옴
+    if not value:
+        return ''
+    if value[0] == RAW:
+        return value[1:].decode('utf-8')
+    if value[0] != ZLIB:
+        raise ValueError(f"알 수 없는 압축 형식: {value[0]}")
+    stream = value[1:]
+    if stream[1] & 0x20:
+        # FDICT: 헤더 다음 4바이트가 사전의 adler32
+        dictionary_id = int.from_bytes(stream[2:6], 'big')
+        dictionary = get_dictionaries()[0].get(dictionary_id)
+        if dictionary is None:
+            raise ImproperlyConfigured(f"텍스트 압축 사전이 없습니다. (id {dictionary_id:08x}, TEXT_COMPRESSION_DICTIONARIES 확인)")
+        decompressor = zlib.decompressobj(zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(stream) + decompressor.flush()).decode('utf-8')
+
+
+class CompressedTextField(models.BinaryField):
+    """문자열을 압축해 저장하는 TextField 대체 필드"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('editable') is True:
+            del kwargs['editable']
+        else:
+            kwargs['editable'] = False
+        return name, path, args, kwargs
+
+    def get_default(self):
+        default = super().get_default()
+        return '' if default == b'' else default
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decompress_text(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return compress_text(str(value))
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.CharField, 'widget': forms.Textarea, **kwargs})
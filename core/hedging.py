@@ -0,0 +1,140 @@
+"""
+헤지(hedged) 요청
+느린 호출이 관측 지연의 특정 백분위수를 넘기면 같은 요청을 한 번 더 보내고
+먼저 도착한 응답을 사용합니다. 헤지 비율은 예산(max_hedge_ratio)으로 제한합니다.
+"""
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from . import metrics
+from .utils import percentile
+
+DEFAULT_HEDGING = {
+    'enabled': False,
+    'percentile': 95,  # 관측 지연의 이 백분위수가 지나도 응답이 없으면 헤지 요청 발행
+    'min_samples': 20,  # 관측 표본이 이보다 적으면 헤지하지 않음
+    'max_hedge_ratio': 0.1,  # 전체 요청 대비 헤지 요청 비율 상한
+    'max_workers': 8,
+}
+
+
+def get_hedging_config():
+    conf = dict(DEFAULT_HEDGING)
+    conf.update(getattr(settings, 'TTS_HEDGING', {}))
+    return conf
+
+
+class HedgeBudget:
+    """전체 요청 대비 헤지 요청 비율을 제한하는 예산 (프로세스 단위)"""
+
+    def __init__(self, max_ratio):
+        self.max_ratio = max_ratio
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self):
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+
+class Hedger:
+    """
+    호출을 스레드 풀에서 실행하고, hedge_delay 가 지나도록 끝나지 않으면
+    예산 안에서 중복 호출을 발행하여 먼저 성공한 결과를 반환합니다.
+    """
+
+    def __init__(self, name, hedge_percentile, min_samples, max_hedge_ratio, max_workers):
+        self.name = name
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.budget = HedgeBudget(max_hedge_ratio)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"hedge-{name}")
+
+    def hedge_delay(self):
+        """관측된 호출 지연의 백분위수 (표본이 부족하면 None → 헤지하지 않음)"""
+        samples = metrics.latency_samples(f"{self.name}.latency")
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, self.hedge_percentile)
+
+    def call(self, func):
+        self.budget.record_request()
+        primary = self._executor.submit(func)
+        delay = self.hedge_delay()
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.budget.try_acquire():
+            if not done:
+                metrics.increment(f"{self.name}.hedge.skipped_budget")
+            return primary.result()
+
+        metrics.increment(f"{self.name}.hedge.requests")
+        hedge = self._executor.submit(func)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.increment(f"{self.name}.hedge.wins")
+                    # 늦게 끝나는 쪽은 백그라운드에서 완료되도록 둠 (gRPC 동기 호출은 취소 불가)
+                    return future.result()
+        # 두 요청 모두 실패한 경우 원 요청의 오류를 전달
+        return primary.result()
+
+    async def acall(self, afunc):
+        """call 의 비동기 버전. 먼저 성공한 쪽을 사용하고 남은 요청은 취소합니다."""
+        self.budget.record_request()
+        primary = asyncio.ensure_future(afunc())
+        delay = self.hedge_delay()
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self.budget.try_acquire():
+            if not done:
+                metrics.increment(f"{self.name}.hedge.skipped_budget")
+            return await primary
+
+        metrics.increment(f"{self.name}.hedge.requests")
+        hedge = asyncio.ensure_future(afunc())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.increment(f"{self.name}.hedge.wins")
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name):
+    with _hedgers_lock:
+        if name not in _hedgers:
+            conf = get_hedging_config()
+            _hedgers[name] = Hedger(
+                name, conf['percentile'], conf['min_samples'], conf['max_hedge_ratio'], conf['max_workers']
+            )
+        return _hedgers[name]
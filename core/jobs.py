@@ -0,0 +1,73 @@
+"""
+생성 요청 멱등성
+업로드 폼이 보낸 job_id 를 멱등 키로 사용하여, 같은 사용자의 같은 키에 대한 생성 작업을 한 번만 실행합니다.
+- 처음 보는 키: pending 으로 기록하고 실행
+- 완료된 키: 기존 결과로 이동
+- 실행 중인 키: 진행 중인 작업에 연결 (진행 상황 페이지)
+- 실패했거나 오래 멈춰 있는 pending 키: 다시 실행
+브라우저 재전송이나 nginx proxy_read_timeout 으로 끊긴 요청의 재시도가 TTS 작업을 중복 실행하지 않도록 합니다.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics
+from .models import GenerationJob
+from .progress import is_valid_job_id
+
+logger = logging.getLogger(__name__)
+
+
+def _reclaim(job):
+    """실패/결과 삭제/오래된 pending 작업을 다시 pending 으로 가져옵니다. 다른 요청과 경합하면 False."""
+    stale_before = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_STALE_SECONDS)
+    reclaimable = (
+        Q(status=GenerationJob.STATUS_FAILED)
+        | Q(status=GenerationJob.STATUS_DONE, audio__isnull=True)
+        | Q(status=GenerationJob.STATUS_PENDING, updated_at__lt=stale_before)
+    )
+    return GenerationJob.objects.filter(reclaimable, pk=job.pk).update(
+        status=GenerationJob.STATUS_PENDING, audio=None, updated_at=timezone.now()
+    ) == 1
+
+
+def claim_job(user, key):
+    """
+    멱등 키로 생성 작업을 점유합니다.
+    반환값: (실행할 작업, 기존 작업) 중 하나만 값이 있음.
+    키가 없거나 형식이 잘못되면 (None, None) → 멱등성 없이 그대로 실행
+    """
+    if not is_valid_job_id(key):
+        return None, None
+
+    try:
+        with transaction.atomic():
+            return GenerationJob.objects.create(user=user, idempotency_key=key), None
+    except IntegrityError:
+        pass
+
+    job = GenerationJob.objects.get(user=user, idempotency_key=key)
+    if job.status == GenerationJob.STATUS_DONE and job.audio_id:
+        metrics.increment('generation.idempotent.completed')
+        return None, job
+    if _reclaim(job):
+        metrics.increment('generation.idempotent.retried')
+        job.refresh_from_db()
+        return job, None
+
+    metrics.increment('generation.idempotent.attached')
+    logger.info(f"중복 생성 요청을 진행 중인 작업에 연결: user={user.id} key={key}")
+    return None, job
+
+
+def finish_job(job, audio=None):
+    """생성 결과를 기록합니다. audio 가 없으면 실패로 기록하여 다음 재시도가 다시 실행할 수 있게 합니다."""
+    if job is None:
+        return
+    job.status = GenerationJob.STATUS_DONE if audio else GenerationJob.STATUS_FAILED
+    job.audio = audio
+    job.save(update_fields=['status', 'audio', 'updated_at'])
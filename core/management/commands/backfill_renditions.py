@@ -0,0 +1,112 @@
+"""
+기존 오디오의 저비트레이트 렌디션 백필
+렌디션(Opus/AAC)이 없는 AudioContent 의 MP3 를 스토리지에서 읽어 ffmpeg 로 변환하고
+원본 옆에 형제 파일로 저장합니다. 이미 있는 렌디션은 건너뛰므로 중단 후 다시 실행해도 됩니다.
+
+예) python manage.py backfill_renditions --codecs opus,aac --limit 1000 --workers 4
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+
+from core.encoding import RENDITION_CODECS, EncodingError, encode_rendition_from_mp3
+from core.models import AudioContent
+from core.pipeline import SPEAKING_RATE, RenderedVariant, build_variant, build_variant_filename
+from core.usage import record_usage
+
+
+def encode_and_upload(audio, codecs):
+    """MP3 를 한 번 내려받아 렌디션마다 변환/업로드합니다. DB 저장은 호출한 쪽에서 합니다."""
+    with audio.audio_file.open('rb') as f:
+        mp3_bytes = f.read()
+    variant_objs = []
+    errors = []
+    for codec in codecs:
+        try:
+            rendition = RenderedVariant(SPEAKING_RATE, codec, encode_rendition_from_mp3(codec, [mp3_bytes]))
+        except EncodingError as e:
+            errors.append(f"{codec}: {e}")
+            continue
+        variant_obj = build_variant(audio, rendition)
+        variant_obj.file.save(
+            build_variant_filename(audio.audio_file.name, rendition), ContentFile(rendition.content), save=False
+        )
+        variant_objs.append(variant_obj)
+    return len(mp3_bytes), variant_objs, errors
+
+
+class Command(BaseCommand):
+    help = "렌디션(Opus/AAC)이 없는 기존 오디오에 저비트레이트 렌디션을 만들어 저장합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codecs', help='만들 렌디션 (쉼표 구분, 기본: settings.GENERATION_RENDITIONS)')
+        parser.add_argument('--limit', type=int, help='처리할 최대 오디오 수')
+        parser.add_argument('--batch-size', type=int, default=100, help='한 번에 조회할 오디오 수')
+        parser.add_argument('--workers', type=int, default=2, help='동시에 변환할 오디오 수 (ffmpeg 프로세스)')
+        parser.add_argument('--dry-run', action='store_true', help='대상만 세고 변환하지 않음')
+
+    def handle(self, *args, **options):
+        codecs = options['codecs'].split(',') if options['codecs'] else list(settings.GENERATION_RENDITIONS)
+        codecs = [codec.strip() for codec in codecs if codec.strip()]
+        unknown = [codec for codec in codecs if codec not in RENDITION_CODECS]
+        if unknown or not codecs:
+            raise CommandError(f"지원하는 렌디션: {', '.join(RENDITION_CODECS)} (입력: {', '.join(unknown) or '없음'})")
+
+        totals = {'audios': 0, 'mp3_bytes': 0, 'failed': 0, **{f'{codec}_bytes': 0 for codec in codecs}}
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for batch in self._pending_batches(codecs, options['batch_size'], options['limit']):
+                if options['dry_run']:
+                    totals['audios'] += len(batch)
+                    continue
+                futures = [(audio, executor.submit(encode_and_upload, audio, missing)) for audio, missing in batch]
+                for audio, future in futures:
+                    try:
+                        mp3_size, variant_objs, errors = future.result()
+                    except Exception as e:
+                        errors, variant_objs, mp3_size = [str(e)], [], 0
+                    for variant_obj in variant_objs:
+                        variant_obj.save()
+                        totals[f'{variant_obj.codec}_bytes'] += variant_obj.file_size
+                    record_usage(audio.user_id, storage_bytes=sum(variant_obj.file_size for variant_obj in variant_objs))
+                    if errors:
+                        totals['failed'] += 1
+                        self.stderr.write(f"audio {audio.id}: {'; '.join(errors)}")
+                    totals['audios'] += 1
+                    totals['mp3_bytes'] += mp3_size
+                self.stdout.write(f"{totals['audios']}개 처리")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"렌디션이 필요한 오디오: {totals['audios']}개"))
+            return
+        summary = [f"오디오 {totals['audios']}개 (실패 {totals['failed']}개)"]
+        for codec in codecs:
+            size = totals[f'{codec}_bytes']
+            ratio = f" (MP3 대비 {size / totals['mp3_bytes']:.0%})" if totals['mp3_bytes'] else ''
+            summary.append(f"{codec} {size / 1024 / 1024:.1f}MB{ratio}")
+        self.stdout.write(self.style.SUCCESS(', '.join(summary)))
+
+    def _pending_batches(self, codecs, batch_size, limit):
+        """렌디션이 하나라도 빠진 오디오를 (오디오, 빠진 렌디션 목록) 배치로 돌려줍니다. (pk 순 페이지네이션)"""
+        last_pk = 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            audios = list(
+                AudioContent.objects.exclude(audio_file='').exclude(audio_file__isnull=True)
+                .filter(pk__gt=last_pk).order_by('pk').prefetch_related('variants')[:batch_size]
+            )
+            if not audios:
+                return
+            last_pk = audios[-1].pk
+            batch = []
+            for audio in audios:
+                existing = {variant.codec for variant in audio.variants.all()}
+                missing = [codec for codec in codecs if codec not in existing]
+                if missing:
+                    batch.append((audio, missing))
+            if remaining is not None:
+                batch = batch[:remaining]
+                remaining -= len(batch)
+            if batch:
+                yield batch
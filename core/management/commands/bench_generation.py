@@ -0,0 +1,201 @@
+"""
+음성 생성 파이프라인 벤치마크
+스텁 TTS/Gemini 제공자로 N문장 작업을 반복 실행하여
+처리량, 단계별 p50/p99, 최대 RSS를 JSON으로 출력합니다.
+
+예) python manage.py bench_generation --jobs 10 --sentences 40 --output bench.json
+"""
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+
+from core import metrics, pipeline
+from core.memory import MB, MemoryTracker, estimate_job_bytes
+from core.providers import get_tts_provider, get_sentence_provider
+from core.resilience import ProviderUnavailableError, breaker_states
+from core.utils import percentile
+
+STAGES = ['gemini', 'parse', 'synthesize', 'assemble', 'export', 'variants', 'renditions', 'peaks', 'storage']
+
+
+def peak_rss_bytes():
+    """프로세스 최대 RSS (Linux는 KB, macOS는 바이트 단위로 보고됨)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "스텁 제공자로 음성 생성 파이프라인을 벤치마크하고 결과를 JSON으로 출력합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=5, help='실행할 작업 수')
+        parser.add_argument('--sentences', type=int, default=20, help='작업당 문장 수')
+        parser.add_argument('--source', choices=['file', 'gemini'], default='file',
+                            help='문장 입력 경로 (file: TXT 업로드, gemini: AI 생성)')
+        parser.add_argument('--tts-latency', type=float, default=0.3, help='TTS 호출 지연 (초)')
+        parser.add_argument('--tts-jitter', type=float, default=0.1, help='TTS 지연 지터 (초)')
+        parser.add_argument('--tts-error-rate', type=float, default=0.0, help='TTS 오류율 (0~1)')
+        parser.add_argument('--tts-slow-rate', type=float, default=0.0, help='꼬리 지연 호출 비율 (0~1)')
+        parser.add_argument('--tts-slow-latency', type=float, default=5.0, help='꼬리 지연 호출의 지연 (초)')
+        parser.add_argument('--hedge', action='store_true', help='TTS 헤지 요청 사용')
+        parser.add_argument('--hedge-percentile', type=float, help='헤지 발행 기준 백분위수 (기본: settings.TTS_HEDGING)')
+        parser.add_argument('--min-clip-ms', type=int, default=1500, help='최소 클립 길이 (ms)')
+        parser.add_argument('--max-clip-ms', type=int, default=4000, help='최대 클립 길이 (ms)')
+        parser.add_argument('--gemini-latency', type=float, default=1.0, help='Gemini 호출 지연 (초)')
+        parser.add_argument('--gemini-jitter', type=float, default=0.2, help='Gemini 지연 지터 (초)')
+        parser.add_argument('--seed', type=int, default=0, help='스텁 난수 시드')
+        parser.add_argument('--tracemalloc', action='store_true', help='작업별 파이썬 할당 최대치도 측정')
+        parser.add_argument('--output', help='결과 JSON 파일 경로 (기본: 표준 출력)')
+
+    def handle(self, *args, **options):
+        if options['jobs'] < 1 or options['sentences'] < 1:
+            raise CommandError("--jobs 와 --sentences 는 1 이상이어야 합니다.")
+
+        tts = get_tts_provider(
+            'stub',
+            hedged=options['hedge'],
+            slow_rate=options['tts_slow_rate'],
+            slow_latency=options['tts_slow_latency'],
+            latency=options['tts_latency'],
+            jitter=options['tts_jitter'],
+            error_rate=options['tts_error_rate'],
+            min_clip_ms=options['min_clip_ms'],
+            max_clip_ms=options['max_clip_ms'],
+            seed=options['seed'],
+        )
+        if options['hedge'] and options['hedge_percentile']:
+            tts.hedger.hedge_percentile = options['hedge_percentile']
+        sentence_provider = get_sentence_provider(
+            'stub',
+            latency=options['gemini_latency'],
+            jitter=options['gemini_jitter'],
+            seed=options['seed'],
+        )
+
+        stage_times = defaultdict(list)
+        sentence_times = []
+        memory_reports = []
+        totals = {'sentences': 0, 'failed_sentences': 0, 'failed_jobs': 0, 'audio_seconds': 0.0, 'mp3_bytes': 0,
+                  'variant_bytes': 0, 'peaks_bytes': 0}
+
+        with tempfile.TemporaryDirectory(prefix='bench_generation_') as tmpdir:
+            storage = FileSystemStorage(location=tmpdir)
+            started = time.perf_counter()
+            for job in range(options['jobs']):
+                try:
+                    self._run_job(
+                        job, options, tts, sentence_provider, storage, stage_times, sentence_times, totals,
+                        memory_reports,
+                    )
+                except ProviderUnavailableError as e:
+                    # 재시도 소진/서킷 open 으로 실패한 작업은 집계만 하고 계속 진행
+                    totals['failed_jobs'] += 1
+                    self.stderr.write(f"작업 {job} 실패: {e}")
+            wall_time = time.perf_counter() - started
+
+        result = {
+            'benchmark': 'generation',
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'config': {key: options[key] for key in (
+                'jobs', 'sentences', 'source', 'tts_latency', 'tts_jitter', 'tts_error_rate',
+                'tts_slow_rate', 'tts_slow_latency', 'hedge', 'hedge_percentile',
+                'min_clip_ms', 'max_clip_ms', 'gemini_latency', 'gemini_jitter', 'seed', 'tracemalloc',
+            )},
+            'wall_time_s': round(wall_time, 3),
+            'totals': totals,
+            'throughput': {
+                'jobs_per_s': round(options['jobs'] / wall_time, 4),
+                'sentences_per_s': round(totals['sentences'] / wall_time, 4),
+                'audio_seconds_per_s': round(totals['audio_seconds'] / wall_time, 4),
+            },
+            'stages': {stage: summarize(stage_times[stage]) for stage in STAGES if stage_times[stage]},
+            'sentence_synthesis': summarize(sentence_times),
+            'resilience': metrics.snapshot()['counters'],
+            'circuit_breakers': breaker_states(),
+            'peak_rss_mb': round(peak_rss_bytes() / (1024 * 1024), 2),
+            'memory_per_job': memory_reports,
+        }
+
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"결과를 저장했습니다: {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run_job(self, job, options, tts, sentence_provider, storage, stage_times, sentence_times, totals,
+                 memory_reports):
+        def timed(stage, func, *args):
+            t0 = time.perf_counter()
+            value = func(*args)
+            stage_times[stage].append(time.perf_counter() - t0)
+            return value
+
+        count = options['sentences']
+        if options['source'] == 'gemini':
+            text = timed('gemini', sentence_provider.generate_sentences, 'es', 'querer', count)
+            sentences = timed('parse', pipeline.parse_generated_text, text)
+        else:
+            text = '\n\n'.join(
+                f"Frase {job}-{i} para el benchmark.\n벤치마크용 문장 {job}-{i}." for i in range(count)
+            )
+            sentences = timed('parse', pipeline.parse_uploaded_text, text)
+
+        # 합성부터 저장까지의 메모리 사용량 측정 (추정치와 비교)
+        tracker = MemoryTracker(use_tracemalloc=options['tracemalloc']).start()
+
+        # 합성은 문장 단위 지연도 함께 기록
+        voice = tts.get_voice('es')
+        synthesized = []
+        t0 = time.perf_counter()
+        for sentence_pair in sentences:
+            s0 = time.perf_counter()
+            synthesized.extend(pipeline.synthesize_sentences(tts, [sentence_pair], voice))
+            sentence_times.append(time.perf_counter() - s0)
+        stage_times['synthesize'].append(time.perf_counter() - t0)
+
+        # 배치와 정규화 게인 계산 (클립 피크는 디코딩 때 측정되어 있음), 게인 적용은 인코딩 중에 이루어짐
+        plan, sync_data = timed('assemble', pipeline.plan_lesson, synthesized)
+        try:
+            mp3_bytes, file_sync_data = timed('export', pipeline.encode_lesson, plan, sync_data)
+            variants = timed('variants', pipeline.render_rate_variants, plan, sync_data)
+            renditions = timed('renditions', pipeline.render_renditions, plan)
+            peaks = timed('peaks', pipeline.render_peaks, plan, file_sync_data)
+        except Exception as e:
+            raise CommandError(f"MP3 인코딩 실패 (ffmpeg 설치 여부를 확인하세요): {e}")
+        timed('storage', storage.save, f'bench-{job}-{pipeline.build_audio_filename()}', ContentFile(mp3_bytes))
+        tracker.stop()
+
+        report = tracker.report(estimate_job_bytes(len(sentences)))
+        clip_seconds = [len(clip.audio) / 1000.0 for _, clip in synthesized if clip is not None]
+        report['estimated_from_clips_mb'] = round(estimate_job_bytes(len(sentences), clip_seconds) / MB, 1)
+        memory_reports.append({'job': job, **report})
+
+        totals['sentences'] += len(sentences)
+        totals['failed_sentences'] += sum(1 for _, clip in synthesized if clip is None)
+        totals['audio_seconds'] += round(plan.duration_seconds, 3)
+        totals['mp3_bytes'] += len(mp3_bytes)
+        totals['variant_bytes'] += sum(len(variant.content) for variant in variants)
+        totals['peaks_bytes'] += len(peaks.content)
+        for rendition in renditions:
+            totals.setdefault(f'{rendition.codec}_bytes', 0)
+            totals[f'{rendition.codec}_bytes'] += len(rendition.content)
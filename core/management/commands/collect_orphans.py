@@ -0,0 +1,59 @@
+"""
+스토리지 고아 파일 정리
+{prefix}/audios/ (--user 를 주면 그 사용자의 접두사) 아래에서 DB 가 참조하지 않는 파일을 찾아 지웁니다. (core.orphans)
+유예 시간보다 최근에 올라온 파일은 생성/수정 중일 수 있으므로 건너뜁니다.
+
+예) python manage.py collect_orphans --dry-run
+    python manage.py collect_orphans --grace-hours 48
+    python manage.py collect_orphans --user 42
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import AudioContent
+from core.orphans import audio_prefix, delete_objects, find_orphans, user_audio_prefix
+
+
+class Command(BaseCommand):
+    help = "DB 에서 참조하지 않는 스토리지 오디오 파일을 지웁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=settings.STORAGE_GC_GRACE_HOURS,
+            help='이보다 최근에 올라온 파일은 지우지 않음 (기본: settings.STORAGE_GC_GRACE_HOURS)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='DB 참조를 한 번에 확인할 파일 수')
+        parser.add_argument('--prefix', help='정리할 접두사 (기본: {STORAGE_ENVIRONMENT_PREFIX}/audios/)')
+        parser.add_argument('--user', type=int, help='이 사용자의 접두사({prefix}/audios/{user_id}/)만 정리')
+        parser.add_argument('--dry-run', action='store_true', help='고아 파일을 세기만 하고 지우지 않음')
+
+    def handle(self, *args, **options):
+        storage = AudioContent._meta.get_field('audio_file').storage
+        if options['user'] is not None:
+            prefix = user_audio_prefix(options['user'])
+        else:
+            prefix = options['prefix'] or audio_prefix()
+        grace = timedelta(hours=options['grace_hours'])
+
+        totals = {'scanned': 0, 'orphans': 0, 'bytes': 0, 'failed': 0}
+        for scanned, orphans in find_orphans(storage, prefix, grace, max(1, options['chunk_size'])):
+            totals['scanned'] += scanned
+            totals['orphans'] += len(orphans)
+            totals['bytes'] += sum(obj.size for obj in orphans)
+            if options['dry_run']:
+                for obj in orphans:
+                    self.stdout.write(f"{obj.name} ({obj.size} bytes, {obj.modified:%Y-%m-%d %H:%M})")
+                continue
+            failed = delete_objects(storage, [obj.name for obj in orphans])
+            for name, reason in failed:
+                self.stderr.write(f"{name}: {reason}")
+            totals['failed'] += len(failed)
+            self.stdout.write(f"{totals['scanned']}개 조사, {totals['orphans']}개 고아")
+
+        action = '삭제 대상' if options['dry_run'] else f"삭제 (실패 {totals['failed']}개)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: 파일 {totals['scanned']}개 중 고아 {totals['orphans']}개 "
+            f"{totals['bytes'] / 1024 / 1024:.1f}MB {action}"
+        ))
@@ -0,0 +1,178 @@
+"""
+HTTP 부하 테스트 드라이버
+seed_loadtest로 생성한 사용자로 로그인한 뒤, 가중치가 적용된 요청 조합을
+실행 중인 서버에 재생하고 엔드포인트별 지연 백분위수와 쿼리 수를 보고합니다.
+쿼리 수는 서버에서 QUERY_COUNT_HEADER=True 일 때 수집됩니다.
+
+예) python manage.py loadtest --base-url http://127.0.0.1:8000 --concurrency 20 --duration 60
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.models import AudioContent
+from core.utils import percentile
+from .seed_loadtest import USERNAME_PREFIX, loadtest_email
+
+DEFAULT_MIX = 'home=2,audio_list=3,audio_detail=4,collection_list=1,get_user_collections=2'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {'home', 'audio_list', 'audio_detail', 'collection_list', 'get_user_collections'}
+    if unknown:
+        raise CommandError(f"알 수 없는 엔드포인트: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class VirtualUser:
+    """로그인된 세션과 본인 오디오 ID 목록을 가진 가상 사용자"""
+
+    def __init__(self, base_url, index, password, audio_ids):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.email = loadtest_email(index)
+        self.password = password
+        self.audio_ids = audio_ids
+
+    def login(self):
+        login_url = urljoin(self.base_url, reverse('account_login'))
+        self.session.get(login_url, timeout=30)
+        response = self.session.post(login_url, data={
+            'login': self.email,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+        }, headers={'Referer': login_url}, timeout=30)
+        if 'sessionid' not in self.session.cookies:
+            raise CommandError(f"로그인 실패: {self.email} (HTTP {response.status_code})")
+
+
+class Command(BaseCommand):
+    help = "실행 중인 서버에 가중치 요청 조합을 재생하여 지연/쿼리 수를 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=50, help='로그인할 가상 사용자 수')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30.0, help='측정 시간 (초)')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='엔드포인트=가중치 목록 (쉼표 구분)')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        base_url = options['base_url'].rstrip('/') + '/'
+
+        virtual_users = self._login_users(base_url, options, rng)
+        self.stdout.write(f"가상 사용자 {len(virtual_users)}명 로그인 완료, {options['duration']}초 동안 측정합니다.")
+
+        samples = defaultdict(list)
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+        names, weights = list(mix), list(mix.values())
+
+        def worker(worker_index):
+            worker_rng = random.Random(options['seed'] * 1000 + worker_index)
+            while time.monotonic() < deadline:
+                user = worker_rng.choice(virtual_users)
+                name = worker_rng.choices(names, weights)[0]
+                sample = self._request(base_url, user, name, worker_rng)
+                with lock:
+                    samples[name].append(sample)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(worker, range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'benchmark': 'http_loadtest',
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'config': {key: options[key] for key in ('base_url', 'users', 'concurrency', 'duration', 'mix', 'seed')},
+            'total_requests': sum(len(v) for v in samples.values()),
+            'requests_per_s': round(sum(len(v) for v in samples.values()) / elapsed, 2),
+            'endpoints': {name: self._summarize(values) for name, values in sorted(samples.items())},
+        }
+        self._print_table(result)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"결과를 저장했습니다: {options['output']}"))
+
+    def _login_users(self, base_url, options, rng):
+        from django.contrib.auth.models import User
+
+        user_rows = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('id', 'username')
+        )
+        if not user_rows:
+            raise CommandError("loadtest_ 사용자가 없습니다. 먼저 seed_loadtest를 실행하세요.")
+
+        picked = rng.sample(user_rows, min(options['users'], len(user_rows)))
+        virtual_users = []
+        for user_id, username in picked:
+            audio_ids = list(AudioContent.objects.filter(user_id=user_id).values_list('id', flat=True)[:200])
+            user = VirtualUser(base_url, username[len(USERNAME_PREFIX):], options['password'], audio_ids)
+            user.login()
+            virtual_users.append(user)
+        return virtual_users
+
+    def _request(self, base_url, user, name, rng):
+        if name == 'audio_detail' and user.audio_ids:
+            path = reverse('audio_detail', args=[rng.choice(user.audio_ids)])
+        elif name == 'audio_detail':
+            path = reverse('audio_list')
+        else:
+            path = reverse(name)
+
+        t0 = time.perf_counter()
+        try:
+            response = user.session.get(urljoin(base_url, path.lstrip('/')), timeout=60, allow_redirects=False)
+            status = response.status_code
+            query_count = response.headers.get('X-DB-Query-Count')
+        except requests.RequestException:
+            status, query_count = 'error', None
+        return {
+            'latency': time.perf_counter() - t0,
+            'status': status,
+            'queries': int(query_count) if query_count is not None else None,
+        }
+
+    def _summarize(self, values):
+        latencies = [v['latency'] for v in values]
+        queries = [v['queries'] for v in values if v['queries'] is not None]
+        statuses = defaultdict(int)
+        for v in values:
+            statuses[str(v['status'])] += 1
+        return {
+            'count': len(values),
+            'status': dict(statuses),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p90_ms': round(percentile(latencies, 90) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'max_ms': round(max(latencies) * 1000, 1),
+            'queries_mean': round(sum(queries) / len(queries), 1) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+
+    def _print_table(self, result):
+        self.stdout.write(f"\n총 {result['total_requests']}건, {result['requests_per_s']} req/s")
+        self.stdout.write(f"{'endpoint':<22}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'queries':>9}")
+        for name, s in result['endpoints'].items():
+            queries = s['queries_mean'] if s['queries_mean'] is not None else '-'
+            self.stdout.write(
+                f"{name:<22}{s['count']:>7}{s['p50_ms']:>9}{s['p90_ms']:>9}{s['p99_ms']:>9}{queries:>9}"
+            )
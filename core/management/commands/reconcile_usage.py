@@ -0,0 +1,153 @@
+"""
+사용량 장부(UsageLedger) 다시 계산
+사용자를 배치로 나눠 오디오의 MP3 크기(file_size), 파생 파일 크기, sync_data 로 구한 길이/문장 수를 합산해
+장부를 덮어씁니다. 증감 집계가 어긋났거나 장부가 없는 기존 사용자에게 실행합니다.
+
+- file_size 가 기록되지 않은 (0) 오디오는 스토리지에서 크기를 읽어 채웁니다. --refresh-sizes 면 모두 다시 읽습니다.
+  (사용자 접두사를 나열해 읽으므로 파일마다 요청하지 않음)
+- tts_characters 는 누적값이라 다시 계산할 수 없으므로 그대로 두고, 장부가 없던 사용자만 현재 원문 글자 수로 채웁니다.
+- 배치마다 장부 행을 잠그고 계산하므로 그동안 들어온 증감은 잠금이 풀린 뒤 반영됩니다.
+
+예) python manage.py reconcile_usage --batch-size 200
+    python manage.py reconcile_usage --user 42 --refresh-sizes --dry-run
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import AudioContent, UsageLedger
+from core.orphans import iter_stored_objects, user_audio_prefix
+from core.usage import OWNED_FIELDS, audio_usage
+
+
+def refresh_file_sizes(audios, workers, refresh_all):
+    """
+    스토리지에서 MP3 크기를 읽어 file_size 를 채웁니다. 반환값: 바뀐 오디오 수
+    모두 다시 읽을 때는 사용자 접두사를 나열해 크기를 한꺼번에 얻고, 목록에 없는 (예전 경로 구조) 파일만
+    HEAD 요청으로 읽습니다. (요청은 병렬)
+    """
+    targets = [audio for audio in audios if audio.audio_file and (refresh_all or not audio.file_size)]
+    if not targets:
+        return 0
+    storage = targets[0].audio_file.storage
+
+    def list_sizes(user_id):
+        try:
+            return {obj.name: obj.size for obj in iter_stored_objects(storage, user_audio_prefix(user_id))}
+        except Exception:
+            return {}
+
+    def size_of(audio):
+        try:
+            return audio.audio_file.storage.size(audio.audio_file.name)
+        except Exception:
+            return None  # 스토리지에서 읽지 못하면 기록된 값 유지
+
+    listed = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if refresh_all:
+            for sizes in executor.map(list_sizes, sorted({audio.user_id for audio in targets})):
+                listed.update(sizes)
+        unlisted = [audio for audio in targets if audio.audio_file.name not in listed]
+        head_sizes = dict(zip((audio.pk for audio in unlisted), executor.map(size_of, unlisted)))
+    changed = []
+    for audio in targets:
+        size = listed.get(audio.audio_file.name, head_sizes.get(audio.pk))
+        if size is not None and size != audio.file_size:
+            audio.file_size = size
+            changed.append(audio)
+    AudioContent.objects.bulk_update(changed, ['file_size'])
+    return len(changed)
+
+
+class Command(BaseCommand):
+    help = "사용자별 사용량 장부를 오디오/파생 파일 기록과 스토리지 크기로 다시 계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='다시 계산할 사용자 id (여러 번 지정 가능)')
+        parser.add_argument('--batch-size', type=int, default=200, help='한 번에 처리할 사용자 수')
+        parser.add_argument('--workers', type=int, default=8, help='스토리지 크기를 동시에 읽을 요청 수')
+        parser.add_argument('--refresh-sizes', action='store_true', help='기록된 MP3 크기도 스토리지에서 다시 읽음')
+        parser.add_argument('--dry-run', action='store_true', help='차이만 출력하고 저장하지 않음')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(pk__in=options['user'])
+
+        totals = {'users': 0, 'drifted': 0, 'created': 0, 'sizes': 0}
+        last_pk = 0
+        while True:
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not user_ids:
+                break
+            last_pk = user_ids[-1]
+
+            audios = list(
+                AudioContent.objects.filter(user_id__in=user_ids)
+                .only('id', 'user_id', 'audio_file', 'file_size', 'sync_data')
+                .annotate(variant_bytes=Sum('variants__file_size'))
+            )
+            if not options['dry_run']:
+                totals['sizes'] += refresh_file_sizes(audios, max(1, options['workers']), options['refresh_sizes'])
+
+            usage = defaultdict(lambda: dict.fromkeys(OWNED_FIELDS, 0))
+            for audio in audios:
+                for field, value in audio_usage(audio, audio.variant_bytes or 0).items():
+                    usage[audio.user_id][field] += value
+
+            with transaction.atomic():
+                ledgers = {
+                    ledger.user_id: ledger
+                    for ledger in UsageLedger.objects.select_for_update().filter(user_id__in=user_ids)
+                }
+                self._apply(user_ids, usage, ledgers, totals, options['dry_run'])
+            totals['users'] += len(user_ids)
+            self.stdout.write(f"{totals['users']}명 처리")
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}사용자 {totals['users']}명, 어긋난 장부 {totals['drifted']}개, 새 장부 {totals['created']}개, "
+            f"MP3 크기 갱신 {totals['sizes']}개"
+        ))
+
+    def _apply(self, user_ids, usage, ledgers, totals, dry_run):
+        now = timezone.now()
+        missing = [user_id for user_id in user_ids if user_id not in ledgers]
+        # 장부가 없던 사용자는 누적 TTS 글자 수를 알 수 없으므로 현재 원문 글자 수로 채움
+        # (원문은 압축 저장되므로 DB 에서 길이를 잴 수 없어 풀어서 셈)
+        tts_characters = defaultdict(int)
+        for user_id, text in AudioContent.objects.filter(user_id__in=missing).values_list('user_id', 'original_text'):
+            tts_characters[user_id] += len(text.replace('\n', ''))
+
+        changed, created = [], []
+        for user_id in user_ids:
+            values = usage.get(user_id, dict.fromkeys(OWNED_FIELDS, 0))
+            ledger = ledgers.get(user_id)
+            if ledger is None:
+                created.append(UsageLedger(
+                    user_id=user_id, tts_characters=tts_characters.get(user_id) or 0, reconciled_at=now, **values
+                ))
+                continue
+            drift = {
+                field: value - getattr(ledger, field) for field, value in values.items()
+                if abs(value - getattr(ledger, field)) > (0.01 if field == 'duration_seconds' else 0)
+            }
+            if drift:
+                totals['drifted'] += 1
+                self.stdout.write(f"user {user_id}: {', '.join(f'{field} {delta:+g}' for field, delta in drift.items())}")
+            for field, value in values.items():
+                setattr(ledger, field, value)
+            ledger.reconciled_at = ledger.updated_at = now
+            changed.append(ledger)
+
+        totals['created'] += len(created)
+        if dry_run:
+            return
+        UsageLedger.objects.bulk_update(changed, [*OWNED_FIELDS, 'reconciled_at', 'updated_at'])
+        UsageLedger.objects.bulk_create(created)
@@ -0,0 +1,195 @@
+"""
+부하 테스트용 합성 데이터 생성
+사용자/프로필/카테고리/보관함/보관함 항목/AudioContent(sync_data 포함)를
+bulk_create 배치로 대량 생성합니다. 생성된 사용자는 'loadtest_' 접두사를 가집니다.
+
+예) python manage.py seed_loadtest --users 10000 --audios 100000
+"""
+import json
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import AudioContent, Category, Collection, UserProfile
+from core.pipeline import REPEAT_BREAK_MS, REPEAT_COUNT, SET_BREAK_MS
+
+USERNAME_PREFIX = 'loadtest_'
+EMAIL_DOMAIN = 'loadtest.example.com'
+
+WORDS = ['quiero', 'tengo', 'puedo', 'vamos', 'hablar', 'comer', 'vivir', 'trabajo', 'casa', 'tiempo',
+         'amigo', 'ciudad', 'libro', 'mañana', 'siempre', 'nunca', 'mucho', 'poco', 'cerca', 'lejos']
+KO_WORDS = ['나는', '우리는', '집', '시간', '친구', '도시', '책', '내일', '항상', '많이', '조금', '가까이']
+
+
+def loadtest_email(index):
+    return f"{USERNAME_PREFIX}{index}@{EMAIL_DOMAIN}"
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "부하 테스트용 사용자/보관함/오디오 데이터를 대량 생성합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--audios', type=int, default=100000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--collections-per-user', type=int, default=3)
+        parser.add_argument('--items-per-collection', type=int, default=10)
+        parser.add_argument('--premium-ratio', type=float, default=0.2)
+        parser.add_argument('--min-sentences', type=int, default=5)
+        parser.add_argument('--max-sentences', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default='loadtest-password', help='생성 사용자 공통 비밀번호')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='기존 loadtest_ 데이터를 삭제한 뒤 생성')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("--users 는 1 이상이어야 합니다.")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        if options['clear']:
+            self._clear()
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError("이미 loadtest_ 데이터가 있습니다. --clear 옵션으로 다시 생성하세요.")
+
+        categories = self._seed_categories(options['categories'])
+        user_ids = self._seed_users(options['users'], options['password'], options['premium_ratio'])
+        audio_ids_by_user = self._seed_audios(user_ids, categories, options)
+        self._seed_collections(user_ids, audio_ids_by_user, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"생성 완료: 사용자 {len(user_ids)}명, 오디오 {sum(len(v) for v in audio_ids_by_user.values())}개 "
+            f"({time.perf_counter() - started:.1f}초)"
+        ))
+
+    def _clear(self):
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        # CASCADE로 오디오/보관함/프로필까지 삭제 (오디오 파일은 생성하지 않으므로 스토리지 정리 불필요)
+        deleted, _ = users.delete()
+        self.stdout.write(f"기존 loadtest_ 데이터 삭제: {deleted}건")
+
+    def _seed_categories(self, count):
+        names = [f"{USERNAME_PREFIX}category_{i}" for i in range(count)]
+        Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+        return list(Category.objects.filter(name__in=names))
+
+    def _seed_users(self, count, password, premium_ratio):
+        # 비밀번호 해시는 비용이 크므로 한 번만 계산하여 공유
+        password_hash = make_password(password)
+        users = (
+            User(username=f"{USERNAME_PREFIX}{i}", email=loadtest_email(i), password=password_hash)
+            for i in range(count)
+        )
+        for batch in batched(users, self.batch_size):
+            User.objects.bulk_create(batch, batch_size=self.batch_size)
+        user_ids = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+
+        # bulk_create는 post_save 시그널을 보내지 않으므로 프로필을 직접 생성
+        profiles = (UserProfile(user_id=user_id, is_premium=self.rng.random() < premium_ratio) for user_id in user_ids)
+        for batch in batched(profiles, self.batch_size):
+            UserProfile.objects.bulk_create(batch, batch_size=self.batch_size)
+        self.stdout.write(f"사용자/프로필 {len(user_ids)}건 생성")
+        return user_ids
+
+    def _fake_sentences(self, count):
+        sentences = []
+        for _ in range(count):
+            words = self.rng.sample(WORDS, self.rng.randint(3, 8))
+            text = ' '.join(words).capitalize() + '.'
+            translation = ' '.join(self.rng.choice(KO_WORDS) for _ in range(len(words) // 2 + 1)) + '.'
+            sentences.append({'text': text, 'translation': translation})
+        return sentences
+
+    def _fake_sync_data(self, sentences):
+        sync_data = []
+        current_ms = 0
+        for i, sentence in enumerate(sentences):
+            if i > 0:
+                current_ms += SET_BREAK_MS
+            clip_ms = self.rng.randint(1500, 4000)
+            duration_ms = REPEAT_BREAK_MS + REPEAT_COUNT * (clip_ms + REPEAT_BREAK_MS)
+            sync_data.append({
+                'text': sentence['text'],
+                'translation': sentence['translation'],
+                'start': current_ms / 1000.0,
+                'end': (current_ms + duration_ms) / 1000.0,
+            })
+            current_ms += duration_ms
+        return sync_data
+
+    def _seed_audios(self, user_ids, categories, options):
+        def build():
+            for i in range(options['audios']):
+                sentences = self._fake_sentences(self.rng.randint(options['min_sentences'], options['max_sentences']))
+                yield AudioContent(
+                    user_id=self.rng.choice(user_ids),
+                    title=f"Loadtest audio {i}",
+                    category=self.rng.choice(categories) if categories and self.rng.random() < 0.9 else None,
+                    original_text='\n'.join(s['text'] for s in sentences),
+                    translated_text='\n'.join(s['translation'] for s in sentences),
+                    sync_data=json.dumps(self._fake_sync_data(sentences)),
+                    view_count=self.rng.randint(0, 50),
+                )
+
+        created = 0
+        for batch in batched(build(), self.batch_size):
+            with transaction.atomic():
+                AudioContent.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+            self.stdout.write(f"  오디오 {created}/{options['audios']}")
+
+        audio_ids_by_user = {}
+        rows = AudioContent.objects.filter(user_id__in=user_ids).values_list('user_id', 'id').iterator(chunk_size=10000)
+        for user_id, audio_id in rows:
+            audio_ids_by_user.setdefault(user_id, []).append(audio_id)
+        return audio_ids_by_user
+
+    def _seed_collections(self, user_ids, audio_ids_by_user, options):
+        collections = (
+            Collection(user_id=user_id, name=f"보관함 {n + 1}")
+            for user_id in user_ids
+            for n in range(options['collections_per_user'])
+        )
+        for batch in batched(collections, self.batch_size):
+            Collection.objects.bulk_create(batch, batch_size=self.batch_size)
+
+        # 보관함 항목은 본인 오디오 위주로, 일부는 다른 사용자 오디오도 포함
+        all_audio_ids = [audio_id for ids in audio_ids_by_user.values() for audio_id in ids]
+        Membership = AudioContent.collections.through
+
+        def build():
+            rows = Collection.objects.filter(user_id__in=user_ids).values_list('id', 'user_id').iterator(chunk_size=10000)
+            for collection_id, user_id in rows:
+                own = audio_ids_by_user.get(user_id, [])
+                picked = set()
+                for _ in range(options['items_per_collection']):
+                    pool = own if own and self.rng.random() < 0.7 else all_audio_ids
+                    if pool:
+                        picked.add(self.rng.choice(pool))
+                for audio_id in picked:
+                    yield Membership(collection_id=collection_id, audiocontent_id=audio_id)
+
+        created = 0
+        for batch in batched(build(), self.batch_size):
+            Membership.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=True)
+            created += len(batch)
+        self.stdout.write(f"보관함 항목 {created}건 생성")
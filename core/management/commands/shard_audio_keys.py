@@ -0,0 +1,215 @@
+"""
+오디오 파일을 사용자/연월 경로로 옮기기
+예전 평면 구조({prefix}/audios/{제목}-{시각}.mp3)의 오디오/파생 파일/복습 트랙을
+audio_upload_path 의 {prefix}/audios/{user_id}/{yyyy}/{mm}/{uuid}.mp3 로 옮깁니다. (연월은 만든 시각 기준)
+
+- 배치마다 새 이름으로 복사(S3 는 서버 측 CopyObject, 병렬)한 뒤 한 트랜잭션에서 파일 이름을 바꿉니다.
+  복사하는 동안 수정/티어 이동된 행은 건너뛰고 (새 복사본은 지움) 다음 실행에서 다시 옮깁니다.
+- 콜드 티어 오디오는 콜드 위치 안에서 옮깁니다.
+- 이름을 바꾼 뒤 예전 파일을 지웁니다. --keep-old 면 남겨 두고 고아 파일 정리(collect_orphans)에 맡깁니다.
+  (콜드 위치의 예전 파일은 고아 정리 대상이 아니므로 항상 지움)
+- 이미 옮긴 행은 건너뛰므로 몇 번이고 다시 실행해도 됩니다.
+
+예) python manage.py shard_audio_keys --dry-run
+    python manage.py shard_audio_keys --batch-size 200 --workers 16
+"""
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import AudioContent, AudioVariant, ReviewMix
+from core.orphans import audio_prefix, delete_objects, user_audio_prefix
+from core.playlist import invalidate_playlists
+from core.storage import copy_file
+from core.tiering import COLD, cold_name, get_cold_storage
+
+
+class Move(NamedTuple):
+    storage: object
+    old: str  # 스토리지 안의 실제 이름 (콜드 티어면 콜드 위치 이름)
+    new: str
+
+
+class Plan(NamedTuple):
+    row: object  # AudioContent 또는 ReviewMix
+    renames: list  # (모델, pk, 필드 이름, 새 이름)
+    moves: list  # Move
+
+
+def not_sharded(field):
+    """파일이 있고 아직 사용자 접두사 아래에 있지 않은 행"""
+    return (
+        Q(**{f'{field}__isnull': False})
+        & ~Q(**{field: ''})
+        & ~Q(**{f'{field}__regex': rf'^{re.escape(audio_prefix())}[0-9]+/'})
+    )
+
+
+def shard_directory(user_id, created_at):
+    return f"{user_audio_prefix(user_id)}{created_at:%Y/%m}/"
+
+
+def _row_state(row):
+    """복사하는 동안 바뀌었는지 비교할 값"""
+    if isinstance(row, AudioContent):
+        return (row.audio_file.name, row.storage_tier)
+    return (row.audio_file.name,)
+
+
+def plan_audio(audio):
+    """오디오 MP3 와 파생 파일을 같은 새 이름 줄기({uuid})로 옮기는 계획"""
+    directory = shard_directory(audio.user_id, audio.created_at)
+    old_stem, extension = os.path.splitext(os.path.basename(audio.audio_file.name))
+    stem = uuid.uuid4().hex
+    storage = audio.audio_file.storage
+    if audio.storage_tier == COLD:
+        location, key = get_cold_storage(storage), cold_name
+    else:
+        location, key = storage, (lambda name: name)
+
+    plan = Plan(audio, [], [])
+
+    def add(model, pk, field, old, new):
+        plan.renames.append((model, pk, field, new))
+        plan.moves.append(Move(location, key(old), key(new)))
+
+    add(AudioContent, audio.pk, 'audio_file', audio.audio_file.name, f"{directory}{stem}{extension}")
+    for variant in audio.variants.all():
+        basename = os.path.basename(variant.file.name)
+        if basename.startswith(f"{old_stem}."):
+            suffix = basename[len(old_stem):]  # .rate-0.6.mp3, .opus ...
+        else:
+            suffix = f"-{variant.pk}{os.path.splitext(basename)[1]}"
+        add(AudioVariant, variant.pk, 'file', variant.file.name, f"{directory}{stem}{suffix}")
+    return plan
+
+
+def plan_review_mix(mix):
+    new = f"{shard_directory(mix.collection.user_id, mix.created_at)}review-{uuid.uuid4().hex}.mp3"
+    return Plan(mix, [(ReviewMix, mix.pk, 'audio_file', new)], [Move(mix.audio_file.storage, mix.audio_file.name, new)])
+
+
+def _copy(move):
+    try:
+        copy_file(move.storage, move.old, move.storage, move.new)
+    except Exception as e:
+        return e
+    return None
+
+
+def _delete_grouped(moves, attr):
+    """스토리지별로 묶어 지웁니다. 반환값: 실패한 (이름, 이유) 목록"""
+    groups = {}
+    for move in moves:
+        groups.setdefault(id(move.storage), (move.storage, []))[1].append(getattr(move, attr))
+    failed = []
+    for storage, names in groups.values():
+        failed.extend(delete_objects(storage, names))
+    return failed
+
+
+class Command(BaseCommand):
+    help = "오디오 파일을 {prefix}/audios/{user_id}/{yyyy}/{mm}/{uuid} 경로로 옮기고 파일 이름을 바꿉니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='한 트랜잭션에서 이름을 바꿀 행 수')
+        parser.add_argument('--workers', type=int, default=16, help='동시에 복사할 파일 수')
+        parser.add_argument('--keep-old', action='store_true', help='예전 파일을 지우지 않음 (collect_orphans 에 맡김)')
+        parser.add_argument('--dry-run', action='store_true', help='옮길 행 수와 예시만 출력')
+
+    def handle(self, *args, **options):
+        audios = (
+            AudioContent.objects.filter(not_sharded('audio_file'))
+            .only('id', 'user_id', 'audio_file', 'storage_tier', 'created_at')
+            .prefetch_related('variants')
+        )
+        mixes = (
+            ReviewMix.objects.filter(not_sharded('audio_file'))
+            .select_related('collection').only('id', 'audio_file', 'created_at', 'collection__user_id')
+        )
+        if options['dry_run']:
+            for label, queryset, planner in (('오디오', audios, plan_audio), ('복습 트랙', mixes, plan_review_mix)):
+                self.stdout.write(f"{label} {queryset.count()}개")
+                for row in queryset.order_by('pk')[:3]:
+                    for move in planner(row).moves:
+                        self.stdout.write(f"  {move.old} -> {move.new}")
+            return
+
+        self.totals = {'moved': 0, 'skipped': 0, 'files': 0, 'delete_failed': 0}
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for queryset, planner in ((audios, plan_audio), (mixes, plan_review_mix)):
+                last_pk = 0
+                while True:
+                    rows = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+                    if not rows:
+                        break
+                    last_pk = rows[-1].pk
+                    self._move_batch([planner(row) for row in rows], executor, options['keep_old'])
+                    self.stdout.write(f"{self.totals['moved']}개 옮김, {self.totals['skipped']}개 건너뜀")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"옮긴 행 {self.totals['moved']}개 (파일 {self.totals['files']}개), 건너뜀 {self.totals['skipped']}개, "
+            f"예전 파일 삭제 실패 {self.totals['delete_failed']}개"
+        ))
+
+    def _move_batch(self, plans, executor, keep_old):
+        # 1. 새 이름으로 복사 (병렬)
+        errors = iter(list(executor.map(_copy, [move for plan in plans for move in plan.moves])))
+        copied = []
+        for plan in plans:
+            results = [(move, next(errors)) for move in plan.moves]
+            failed = [(move, error) for move, error in results if error is not None]
+            if failed:
+                move, error = failed[0]
+                self.stderr.write(f"{type(plan.row).__name__} {plan.row.pk}: {move.old} 복사 실패 ({error})")
+                _delete_grouped([move for move, error in results if error is None], 'new')
+                self.totals['skipped'] += 1
+            else:
+                copied.append(plan)
+        if not copied:
+            return
+
+        # 2. 그사이 바뀌지 않은 행만 이름 바꾸기 (행 잠금)
+        model = type(copied[0].row)
+        fields = ['pk', 'audio_file'] + (['storage_tier'] if model is AudioContent else [])
+        with transaction.atomic():
+            current = {
+                row[0]: tuple(row[1:])
+                for row in model.objects.select_for_update().filter(pk__in=[plan.row.pk for plan in copied])
+                .values_list(*fields)
+            }
+            moved = [plan for plan in copied if current.get(plan.row.pk) == _row_state(plan.row)]
+            updates = {}
+            for plan in moved:
+                for rename_model, pk, field, new in plan.renames:
+                    updates.setdefault((rename_model, field), []).append(rename_model(pk=pk, **{field: new}))
+            for (rename_model, field), objs in updates.items():
+                rename_model.objects.bulk_update(objs, [field])
+
+        changed = [plan for plan in copied if current.get(plan.row.pk) != _row_state(plan.row)]
+        if changed:
+            _delete_grouped([move for plan in changed for move in plan.moves], 'new')
+            self.totals['skipped'] += len(changed)
+
+        # 3. 재생목록 캐시(예전 이름의 서명 URL)를 지우고 예전 파일 삭제
+        if model is AudioContent:
+            invalidate_playlists(list(
+                AudioContent.collections.through.objects.filter(audiocontent_id__in=[plan.row.pk for plan in moved])
+                .values_list('collection_id', flat=True).distinct()
+            ))
+        stale = [
+            move for plan in moved for move in plan.moves
+            if not keep_old or (model is AudioContent and plan.row.storage_tier == COLD)
+        ]
+        failed = _delete_grouped(stale, 'old')
+        for name, reason in failed:
+            self.stderr.write(f"{name}: {reason}")
+        self.totals['delete_failed'] += len(failed)
+        self.totals['moved'] += len(moved)
+        self.totals['files'] += sum(len(plan.moves) for plan in moved)
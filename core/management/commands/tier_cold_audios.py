@@ -0,0 +1,65 @@
+"""
+잘 재생하지 않는 오디오를 콜드 티어로 옮깁니다. (core.tiering, 정책은 settings.AUDIO_COLD_TIER)
+옮긴 오디오는 상세 페이지/보관함 재생 등으로 다시 접근하면 자동으로 되돌려집니다.
+
+예) python manage.py tier_cold_audios --dry-run
+    python manage.py tier_cold_audios --limit 5000 --workers 8
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.tiering import cold_candidates, freeze, get_config
+
+
+class Command(BaseCommand):
+    help = "오래됐고 최근에 재생하지 않은 오디오를 콜드 티어로 옮깁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='옮길 최대 오디오 수')
+        parser.add_argument('--batch-size', type=int, default=100, help='한 번에 조회할 오디오 수')
+        parser.add_argument('--workers', type=int, default=4, help='동시에 옮길 오디오 수')
+        parser.add_argument('--dry-run', action='store_true', help='대상만 세고 옮기지 않음')
+
+    def handle(self, *args, **options):
+        candidates = cold_candidates()
+        if options['dry_run']:
+            count = candidates.count()
+            if options['limit'] is not None:
+                count = min(count, options['limit'])
+            self.stdout.write(self.style.SUCCESS(f"콜드 티어 대상: {count}개 (정책: {get_config()})"))
+            return
+
+        totals = {'moved': 0, 'skipped': 0, 'failed': 0, 'before': 0, 'after': 0}
+        remaining = options['limit']
+        last_pk = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            while remaining is None or remaining > 0:
+                size = options['batch_size'] if remaining is None else min(options['batch_size'], remaining)
+                # 후보 조건이 시간에 따라 바뀌므로 pk 순으로 넘김
+                audios = list(candidates.filter(pk__gt=last_pk).order_by('pk').prefetch_related('variants')[:size])
+                if not audios:
+                    break
+                last_pk = audios[-1].pk
+                before = {audio.pk: audio.file_size for audio in audios}
+                for audio, future in [(audio, executor.submit(freeze, audio)) for audio in audios]:
+                    try:
+                        new_size = future.result()
+                    except Exception as e:
+                        totals['failed'] += 1
+                        self.stderr.write(f"audio {audio.pk}: {e}")
+                        continue
+                    if new_size is None:
+                        totals['skipped'] += 1  # 그사이 수정됨
+                        continue
+                    totals['moved'] += 1
+                    totals['before'] += before[audio.pk]
+                    totals['after'] += new_size
+                if remaining is not None:
+                    remaining -= len(audios)
+                self.stdout.write(f"{totals['moved']}개 이동")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"콜드 티어 이동 {totals['moved']}개 (건너뜀 {totals['skipped']}개, 실패 {totals['failed']}개), "
+            f"MP3 {totals['before'] / 1024 / 1024:.1f}MB -> {totals['after'] / 1024 / 1024:.1f}MB"
+        ))
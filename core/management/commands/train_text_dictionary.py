@@ -0,0 +1,95 @@
+"""
+텍스트 압축 공유 사전 만들기 (core.fields)
+저장된 오디오의 원문/번역/타임스탬프에서 자주 나오는 단어 묶음을 골라 zlib 사전(최대 32KB)을 만듭니다.
+만든 파일 경로를 TEXT_COMPRESSION_DICTIONARIES 의 마지막에 추가하면 새로 저장하는 값부터 이 사전으로 압축합니다.
+(예전 사전은 목록에서 지우지 말 것: 그 사전으로 압축된 행을 읽을 때 필요)
+
+예) python manage.py train_text_dictionary --output /var/www/automaking/text-dict-1.bin --samples 5000
+"""
+import random
+import re
+import zlib
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AudioContent
+
+DICTIONARY_MAX_BYTES = 32 * 1024  # zlib 창 크기. 이보다 앞부분은 참조할 수 없음
+_TOKEN = re.compile(r'\S+\s*')
+
+
+def sample_texts(count, seed=0):
+    """무작위 오디오의 (원문, 번역, sync_data) 텍스트"""
+    ids = list(AudioContent.objects.values_list('pk', flat=True))
+    picked = random.Random(seed).sample(ids, min(count, len(ids)))
+    texts = []
+    for row in AudioContent.objects.filter(pk__in=picked).values_list(*AudioContent.TEXT_FIELDS).iterator():
+        texts.extend(text for text in row if text)
+    return texts
+
+
+def train_dictionary(texts, max_bytes=DICTIONARY_MAX_BYTES, max_words=4, min_count=3):
+    """
+    1~max_words 단어 묶음 중 (등장 횟수 - 1) x 길이가 큰 것부터 골라 이어 붙입니다.
+    zlib 은 가까운 위치를 더 짧게 가리키므로 가장 쓸모 있는 조각을 사전 끝에 둡니다.
+    """
+    counts = Counter()
+    for text in texts:
+        words = _TOKEN.findall(text)
+        for n in range(1, max_words + 1):
+            for i in range(len(words) - n + 1):
+                counts[''.join(words[i:i + n])] += 1
+
+    scored = sorted(
+        ((count - 1) * len(piece.encode('utf-8')), piece) for piece, count in counts.items() if count >= min_count
+    )
+    chosen, joined, size = [], '', 0
+    for score, piece in reversed(scored):
+        if size >= max_bytes - 8:
+            break
+        data = piece.encode('utf-8')
+        if size + len(data) > max_bytes or piece in joined:
+            continue  # 이미 고른 조각 안에 있으면 사전에서 그대로 참조 가능
+        chosen.append((score, piece))
+        joined += '\0' + piece
+        size += len(data)
+    chosen.sort()
+    return ''.join(piece for _, piece in chosen).encode('utf-8')
+
+
+def compressed_size(texts, dictionary=None):
+    total = 0
+    for text in texts:
+        compressor = zlib.compressobj(6, zdict=dictionary) if dictionary else zlib.compressobj(6)
+        total += len(compressor.compress(text.encode('utf-8')) + compressor.flush())
+    return total
+
+
+class Command(BaseCommand):
+    help = "저장된 텍스트로 zlib 공유 사전을 만듭니다. (TEXT_COMPRESSION_DICTIONARIES 용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', required=True, help='사전 파일 경로')
+        parser.add_argument('--samples', type=int, default=2000, help='학습에 쓸 오디오 수')
+        parser.add_argument('--max-bytes', type=int, default=DICTIONARY_MAX_BYTES, help='사전 최대 크기')
+        parser.add_argument('--seed', type=int, default=0, help='표본 추출 시드')
+
+    def handle(self, *args, **options):
+        texts = sample_texts(options['samples'], options['seed'])
+        if len(texts) < 10:
+            raise CommandError("학습할 텍스트가 너무 적습니다.")
+        # 표본의 1/5 은 평가용으로 남김
+        split = len(texts) * 4 // 5
+        train, holdout = texts[:split], texts[split:]
+        dictionary = train_dictionary(train, min(options['max_bytes'], DICTIONARY_MAX_BYTES))
+        with open(options['output'], 'wb') as f:
+            f.write(dictionary)
+
+        raw = sum(len(text.encode('utf-8')) for text in holdout)
+        plain = compressed_size(holdout)
+        with_dictionary = compressed_size(holdout, dictionary)
+        self.stdout.write(self.style.SUCCESS(
+            f"사전 {len(dictionary)}바이트 (id {zlib.adler32(dictionary):08x}) -> {options['output']}\n"
+            f"평가 텍스트 {len(holdout)}개 {raw}바이트: zlib {plain / raw:.0%}, 사전 사용 {with_dictionary / raw:.0%}"
+        ))
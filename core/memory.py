@@ -0,0 +1,263 @@
+"""
+생성 작업 메모리 예산
+한 작업은 디코딩된 클립 PCM 과 MP3 버퍼를 들고 있으므로 (강의 전체 PCM 은 만들지 않고 인코더로 흘려보냄)
+문장 수와 클립 길이로 최대 메모리를 미리 추정하고, 워커(프로세스)별 예산 안에서만 작업을 실행합니다.
+- 혼자서도 예산을 넘는 작업: 즉시 거부 (JobTooLargeError)
+- 다른 작업이 예산을 쓰고 있으면: queue_timeout 동안 대기 후 거부 (MemoryBudgetExceeded)
+실제 사용량은 RSS 샘플링(선택적으로 tracemalloc)으로 측정하여 작업별 최대치를 기록합니다.
+설정은 settings.GENERATION_MEMORY 에서 읽습니다.
+"""
+import asyncio
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+DEFAULT_MEMORY = {
+    'budget_mb': 1024,  # 워커 프로세스 하나가 생성 작업에 쓸 수 있는 메모리
+    'queue_timeout': 30.0,  # 예산이 빌 때까지 기다리는 최대 시간 (초)
+    'avg_clip_seconds': 3.0,  # 합성 전 추정에 쓰는 문장 클립 평균 길이 (초)
+    'pcm_bytes_per_second': 24000 * 2,  # 디코딩된 TTS 클립 (24kHz, 16bit, mono)
+    'sample_interval': 0.05,  # RSS 샘플링 주기 (초)
+    'tracemalloc': False,  # 파이썬 할당 최대치도 기록 (오버헤드가 있어 기본 꺼짐)
+}
+
+# 클립 PCM 대비 동시에 살아 있는 사본 수 (디코딩 원본 + 인코딩 구간마다 게인을 적용한 클립 사본)
+CLIP_COPIES = 2
+MP3_BYTES_PER_SECOND = 128 * 1000 // 8
+
+
+class MemoryBudgetError(Exception):
+    """메모리 예산 때문에 작업을 실행할 수 없음"""
+
+
+class JobTooLargeError(MemoryBudgetError):
+    """작업 하나의 추정 메모리가 워커 예산 전체보다 큼"""
+
+
+class MemoryBudgetExceeded(MemoryBudgetError):
+    """대기 시간 안에 예산이 비지 않음 (잠시 후 재시도)"""
+
+
+def get_memory_config():
+    conf = dict(DEFAULT_MEMORY)
+    conf.update(getattr(settings, 'GENERATION_MEMORY', {}))
+    return conf
+
+
+def estimate_job_bytes(sentence_count, clip_seconds=None):
+    """
+    작업의 최대 메모리(바이트)를 추정합니다.
+    clip_seconds: 실제 클립 길이 목록 (합성 전이면 None → 평균 길이 사용)
+    """
+    from .pipeline import REPEAT_BREAK_MS, REPEAT_COUNT, SET_BREAK_MS, SPEAKING_RATE
+
+    conf = get_memory_config()
+    if clip_seconds is None:
+        clip_seconds = [conf['avg_clip_seconds']] * sentence_count
+    clips_total = sum(clip_seconds)
+    breaks = (REPEAT_COUNT + 1) * REPEAT_BREAK_MS / 1000.0 + SET_BREAK_MS / 1000.0
+    audio_seconds = REPEAT_COUNT * clips_total + breaks * sentence_count
+
+    bps = conf['pcm_bytes_per_second']
+    clips_pcm = clips_total * bps
+    mp3 = audio_seconds * MP3_BYTES_PER_SECOND
+    # MP3 는 구간별 출력과 이어 붙인 사본이 함께 존재, 말하기 속도 버전은 길이가 배율만큼 달라짐
+    variants = sum(SPEAKING_RATE / rate for rate in getattr(settings, 'GENERATION_RATE_VARIANTS', []))
+    # 저비트레이트 렌디션은 MP3 보다 작으므로 렌디션마다 MP3 하나 크기로 잡음
+    renditions = len(getattr(settings, 'GENERATION_RENDITIONS', []))
+    return int(CLIP_COPIES * clips_pcm + 2 * mp3 * (1 + variants) + mp3 * renditions)
+
+
+class MemoryBudget:
+    """프로세스 단위 메모리 예약. 작업 시작 전에 추정치를 예약하고 끝나면 반납합니다."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.reserved_bytes = 0
+        self.active_jobs = 0
+        self._cond = threading.Condition()
+
+    def _check_size(self, nbytes):
+        if nbytes > self.budget_bytes:
+            metrics.increment('generation.memory.rejected_too_large')
+            raise JobTooLargeError(
+                f"작업 추정 메모리 {nbytes / MB:.0f}MB 가 워커 예산 {self.budget_bytes / MB:.0f}MB 를 넘습니다."
+            )
+
+    def try_reserve(self, nbytes):
+        with self._cond:
+            if self.reserved_bytes + nbytes > self.budget_bytes:
+                return False
+            self.reserved_bytes += nbytes
+            self.active_jobs += 1
+            return True
+
+    def reserve(self, nbytes, timeout):
+        self._check_size(nbytes)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.reserved_bytes + nbytes > self.budget_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.increment('generation.memory.rejected_busy')
+                    raise MemoryBudgetExceeded("메모리 예산이 부족하여 작업을 시작할 수 없습니다.")
+                metrics.increment('generation.memory.queued')
+                self._cond.wait(remaining)
+            self.reserved_bytes += nbytes
+            self.active_jobs += 1
+
+    async def areserve(self, nbytes, timeout, poll_interval=0.1):
+        """reserve 의 비동기 버전 (이벤트 루프를 막지 않도록 폴링)"""
+        self._check_size(nbytes)
+        deadline = time.monotonic() + timeout
+        queued = False
+        while not self.try_reserve(nbytes):
+            if time.monotonic() >= deadline:
+                metrics.increment('generation.memory.rejected_busy')
+                raise MemoryBudgetExceeded("메모리 예산이 부족하여 작업을 시작할 수 없습니다.")
+            if not queued:
+                metrics.increment('generation.memory.queued')
+                queued = True
+            await asyncio.sleep(poll_interval)
+
+    def release(self, nbytes):
+        with self._cond:
+            self.reserved_bytes = max(0, self.reserved_bytes - nbytes)
+            self.active_jobs = max(0, self.active_jobs - 1)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'budget_mb': round(self.budget_bytes / MB, 1),
+                'reserved_mb': round(self.reserved_bytes / MB, 1),
+                'active_jobs': self.active_jobs,
+            }
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_memory_budget():
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = MemoryBudget(int(get_memory_config()['budget_mb'] * MB))
+        return _budget
+
+
+def current_rss_bytes():
+    """현재 RSS. /proc 가 없는 환경에서는 프로세스 최대 RSS 로 대체합니다."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class MemoryTracker:
+    """
+    작업 동안 RSS 를 주기적으로 샘플링하여 최대치를 기록합니다.
+    RSS 와 tracemalloc 은 프로세스 전체 기준이므로 동시에 실행 중인 작업이 있으면 함께 합산됩니다.
+    """
+
+    def __init__(self, sample_interval=None, use_tracemalloc=None):
+        conf = get_memory_config()
+        self.sample_interval = sample_interval or conf['sample_interval']
+        self.use_tracemalloc = conf['tracemalloc'] if use_tracemalloc is None else use_tracemalloc
+        self.start_rss = 0
+        self.peak_rss = 0
+        self.traced_peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            self.peak_rss = max(self.peak_rss, current_rss_bytes())
+
+    def start(self):
+        self.start_rss = self.peak_rss = current_rss_bytes()
+        if self.use_tracemalloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._thread = threading.Thread(target=self._sample, name='memory-tracker', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.peak_rss = max(self.peak_rss, current_rss_bytes())
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            self.traced_peak = tracemalloc.get_traced_memory()[1]
+
+    def report(self, estimated_bytes=None):
+        return {
+            'estimated_mb': round(estimated_bytes / MB, 1) if estimated_bytes is not None else None,
+            'start_rss_mb': round(self.start_rss / MB, 1),
+            'peak_rss_mb': round(self.peak_rss / MB, 1),
+            'rss_delta_mb': round((self.peak_rss - self.start_rss) / MB, 1),
+            'traced_peak_mb': round(self.traced_peak / MB, 1) if self.traced_peak is not None else None,
+        }
+
+
+def _record(label, tracker, estimated_bytes):
+    report = tracker.report(estimated_bytes)
+    metrics.observe_value('generation.memory.estimated_mb', report['estimated_mb'])
+    metrics.observe_value('generation.memory.peak_rss_mb', report['peak_rss_mb'])
+    metrics.observe_value('generation.memory.rss_delta_mb', report['rss_delta_mb'])
+    logger.info(
+        f"생성 작업 메모리 ({label}): 추정 {report['estimated_mb']}MB, "
+        f"RSS 최대 {report['peak_rss_mb']}MB (시작 대비 +{report['rss_delta_mb']}MB)"
+    )
+    return report
+
+
+@contextmanager
+def generation_memory(sentence_count, label=''):
+    """
+    작업 메모리를 예산에서 예약하고 실제 사용량을 측정합니다.
+    예산을 확보하지 못하면 JobTooLargeError / MemoryBudgetExceeded 를 발생시킵니다.
+    """
+    budget = get_memory_budget()
+    estimated = estimate_job_bytes(sentence_count)
+    budget.reserve(estimated, get_memory_config()['queue_timeout'])
+    tracker = MemoryTracker().start()
+    try:
+        yield tracker
+    finally:
+        tracker.stop()
+        budget.release(estimated)
+        _record(label, tracker, estimated)
+
+
+@asynccontextmanager
+async def ageneration_memory(sentence_count, label=''):
+    """generation_memory 의 비동기 버전"""
+    budget = get_memory_budget()
+    estimated = estimate_job_bytes(sentence_count)
+    await budget.areserve(estimated, get_memory_config()['queue_timeout'])
+    tracker = MemoryTracker().start()
+    try:
+        yield tracker
+    finally:
+        tracker.stop()
+        budget.release(estimated)
+        _record(label, tracker, estimated)
@@ -0,0 +1,71 @@
+"""
+프로세스 내 메트릭 레지스트리
+카운터와 최근 지연 시간/값 표본을 보관하며, /metrics/ 엔드포인트에서 JSON으로 노출합니다.
+(워커 프로세스마다 따로 집계됩니다)
+"""
+import threading
+from collections import defaultdict, deque
+
+from .utils import percentile
+
+# 지연 시간 표본은 이름별로 최근 N개만 유지
+LATENCY_WINDOW = 1000
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+_values = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe_latency(name, seconds):
+    with _lock:
+        _latencies[name].append(seconds)
+
+
+def observe_value(name, value):
+    """지연 시간 외의 값 표본 (예: 작업별 최대 메모리 MB)"""
+    with _lock:
+        _values[name].append(value)
+
+
+def latency_samples(name):
+    with _lock:
+        return list(_latencies.get(name, ()))
+
+
+def latency_percentile(name, pct):
+    return percentile(latency_samples(name), pct)
+
+
+def snapshot():
+    """현재 카운터와 지연 시간 요약을 반환합니다."""
+    with _lock:
+        counters = dict(_counters)
+        latencies = {name: list(values) for name, values in _latencies.items()}
+        observed = {name: list(values) for name, values in _values.items()}
+    return {
+        'counters': counters,
+        'latency': {
+            name: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p90_ms': round(percentile(values, 90) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1),
+            }
+            for name, values in latencies.items()
+        },
+        'values': {
+            name: {
+                'count': len(values),
+                'p50': round(percentile(values, 50), 2),
+                'p99': round(percentile(values, 99), 2),
+                'max': round(max(values), 2),
+            }
+            for name, values in observed.items()
+        },
+    }
@@ -0,0 +1,129 @@
+"""
+커스텀 미들웨어
+두 미들웨어 모두 동기/비동기를 함께 지원합니다. (ASGI 에서 비동기 뷰 앞에 스레드 전환이 생기지 않도록)
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import dbrouting
+
+# 요청별 쿼리 수. 비동기 뷰의 ORM 호출은 다른 스레드(다른 연결 객체)에서 실행되지만
+# sync_to_async 가 컨텍스트를 복사하므로, 모든 연결에 걸어 둔 래퍼가 이 값으로 현재 요청을 찾습니다.
+_query_count = ContextVar('query_count', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """연결에 쿼리 수 래퍼를 한 번만 겁니다. (connection_created 신호 수신자)"""
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class QueryCountHeaderMiddleware:
+    """
+    settings.QUERY_COUNT_HEADER가 켜져 있으면 요청 중 실행된 DB 쿼리 수를
+    X-DB-Query-Count 응답 헤더로 돌려줍니다. (부하 테스트 드라이버가 수집)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_COUNT_HEADER', False)
+        if self.enabled:
+            connection_created.connect(install_query_counter, dispatch_uid='query_count_header')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        # 이미 열려 있던 이 스레드의 연결에도 래퍼를 걸어 둠
+        for alias in connections:
+            install_query_counter(connections[alias])
+        counter = [0]
+        token = _query_count.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        response['X-DB-Query-Count'] = str(counter[0])
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        counter = [0]
+        token = _query_count.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        response['X-DB-Query-Count'] = str(counter[0])
+        return response
+
+
+class ReplicaReadMiddleware:
+    """
+    요청마다 복제본 라우팅 상태(core.dbrouting)를 만들어 @replica_reads 뷰의 읽기를 복제본으로 보내고,
+    쓰기 요청 뒤에는 잠시 primary 에 고정합니다.
+    AuthenticationMiddleware 뒤에 둡니다. settings.DATABASE_REPLICAS 가 비어 있으면 아무것도 하지 않습니다.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = bool(dbrouting.get_replicas())
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        state, token = dbrouting.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            dbrouting.end_request(token)
+        self.pin_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # sync_to_async 로 실행되는 ORM 호출은 복사된 컨텍스트에서 같은 상태 객체를 봄
+        state, token = dbrouting.begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            dbrouting.end_request(token)
+        self.pin_primary(request, response)
+        return response
+
+    def pin_primary(self, request, response):
+        if request.method not in dbrouting.SAFE_METHODS:
+            # 방금 쓴 내용이 복제본에 반영되기 전에 목록을 다시 읽을 수 있으므로 잠시 primary 에서 읽게 함
+            response.set_cookie(
+                dbrouting.PIN_COOKIE, '1',
+                max_age=dbrouting.get_config()['pin_seconds'],
+                httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+            )
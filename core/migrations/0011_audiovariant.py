@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:43
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('speaking_rate', models.FloatField()),
+                ('codec', models.CharField(default='mp3', max_length=10)),
+                ('file', models.FileField(storage=core.models.get_audio_storage, upload_to=core.models.audio_upload_path)),
+                ('sync_data', models.TextField(blank=True, null=True)),
+                ('file_size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('audio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='core.audiocontent')),
+            ],
+            options={
+                'ordering': ['speaking_rate', 'codec'],
+                'unique_together': {('audio', 'speaking_rate', 'codec')},
+            },
+        ),
+    ]
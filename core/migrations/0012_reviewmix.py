@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:58
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_audiovariant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewMix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.PositiveIntegerField()),
+                ('sentence_count', models.PositiveIntegerField()),
+                ('signature', models.CharField(max_length=64)),
+                ('audio_file', models.FileField(storage=core.models.get_audio_storage, upload_to=core.models.audio_upload_path)),
+                ('sync_data', models.TextField()),
+                ('file_size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_mixes', to='core.collection')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('collection', 'seed', 'sentence_count')},
+            },
+        ),
+    ]
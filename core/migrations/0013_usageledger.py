@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_reviewmix'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiocontent',
+            name='file_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='UsageLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audio_count', models.IntegerField(default=0)),
+                ('storage_bytes', models.BigIntegerField(default=0)),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('sentence_count', models.IntegerField(default=0)),
+                ('tts_characters', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage_ledger', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '사용량',
+                'verbose_name_plural': '사용량',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_usageledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiocontent',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiocontent',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', '기본'), ('cold', '콜드')], default='hot', max_length=10),
+        ),
+    ]
@@ -0,0 +1,73 @@
+"""
+AudioContent 의 original_text / translated_text / sync_data 를 압축 필드(core.fields.CompressedTextField)로 바꿉니다.
+컬럼 형식이 text -> bytea 로 바뀌므로 새 컬럼을 추가해 배치로 압축해 옮긴 뒤 이전 컬럼을 지우고 이름을 바꿉니다.
+"""
+from django.db import migrations, models
+
+import core.fields
+
+TEXT_FIELDS = ('original_text', 'translated_text', 'sync_data')
+BATCH_SIZE = 500
+
+
+def _copy(apps, source_suffix, target_suffix):
+    AudioContent = apps.get_model('core', 'AudioContent')
+    sources = [field + source_suffix for field in TEXT_FIELDS]
+    targets = [field + target_suffix for field in TEXT_FIELDS]
+    last_pk = 0
+    while True:
+        rows = list(AudioContent.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *sources)[:BATCH_SIZE])
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        for row in rows:
+            for source, target in zip(sources, targets):
+                setattr(row, target, getattr(row, source))
+        AudioContent.objects.bulk_update(rows, targets)
+
+
+def compress_texts(apps, schema_editor):
+    _copy(apps, '', '_compressed')
+
+
+def decompress_texts(apps, schema_editor):
+    _copy(apps, '_compressed', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_audiocontent_storage_tier'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name='audiocontent',
+                name=f'{field}_compressed',
+                field=core.fields.CompressedTextField(null=True, blank=True),
+            )
+            for field in TEXT_FIELDS
+        ],
+        migrations.RunPython(compress_texts, decompress_texts),
+        # 되돌릴 때 이전 컬럼을 NOT NULL 로 다시 추가할 수 있도록 기본값을 둠 (값은 decompress_texts 가 채움)
+        *[
+            migrations.AlterField(model_name='audiocontent', name=field, field=models.TextField(default=''))
+            for field in ('original_text', 'translated_text')
+        ],
+        *[migrations.RemoveField(model_name='audiocontent', name=field) for field in TEXT_FIELDS],
+        *[
+            migrations.RenameField(model_name='audiocontent', old_name=f'{field}_compressed', new_name=field)
+            for field in TEXT_FIELDS
+        ],
+        migrations.AlterField(
+            model_name='audiocontent',
+            name='original_text',
+            field=core.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='audiocontent',
+            name='translated_text',
+            field=core.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_compress_audiocontent_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiocontent',
+            name='source_language',
+            field=models.CharField(default='es', max_length=16),
+        ),
+    ]
@@ -1,9 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.files.storage import default_storage
+from django.utils import timezone
 import os
 import logging
 
+from .fields import CompressedTextField
+from .orphans import discard_file, user_audio_prefix
+
 # 로거 설정
 logger = logging.getLogger(__name__)
 
@@ -66,41 +70,164 @@ def get_audio_storage():
         return SupabaseStorage()
     return default_storage
 
+def storage_owner_id(instance):
+    """파일을 가진 사용자 id (오디오/파생 파일/복습 트랙)"""
+    if isinstance(instance, AudioVariant):
+        return instance.audio.user_id
+    if isinstance(instance, ReviewMix):
+        return instance.collection.user_id
+    return instance.user_id
+
 def audio_upload_path(instance, filename):
-    """환경별 업로드 경로 설정"""
-    from django.conf import settings
-    prefix = getattr(settings, 'STORAGE_ENVIRONMENT_PREFIX', 'local')
-    return f"{prefix}/audios/{filename}"
+    """
+    환경/사용자/연월별 업로드 경로: {prefix}/audios/{user_id}/{yyyy}/{mm}/{filename}
+    사용자별 작업(사용자 삭제, 고아 파일 정리, 크기 다시 읽기)은 사용자 접두사만 나열합니다.
+    (예전 평면 구조 파일은 shard_audio_keys 커맨드로 옮김)
+    """
+    return f"{user_audio_prefix(storage_owner_id(instance))}{timezone.now():%Y/%m}/{filename}"
 
 class AudioContent(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='audio_contents')
     title = models.CharField(max_length=200)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='audio_contents')
-    original_text = models.TextField()
-    translated_text = models.TextField()
+    # 큰 텍스트는 압축해서 저장 (core.fields, 읽으면 문자열)
+    original_text = CompressedTextField()
+    translated_text = CompressedTextField()
+    # 원문 언어 코드 (TTS 음성 선택용, 문장 수정 시 같은 음성으로 다시 합성). TXT 업로드는 스페인어
+    source_language = models.CharField(max_length=16, default='es')
     audio_file = models.FileField(upload_to=audio_upload_path, null=True, blank=True, storage=get_audio_storage)
-    sync_data = models.TextField(null=True, blank=True)  # JSON 문자열 (타임스탬프)
+    sync_data = CompressedTextField(null=True, blank=True)  # JSON 문자열 (타임스탬프)
     view_count = models.IntegerField(default=0)  # 조회수
+    file_size = models.PositiveIntegerField(default=0)  # MP3 바이트 (사용량 집계용, 파생 파일 제외)
+    # 저장 계층 (core.tiering). 콜드이면 파일이 콜드 위치에 있고 접근할 때 원래 이름으로 되돌림
+    storage_tier = models.CharField(max_length=10, choices=[('hot', '기본'), ('cold', '콜드')], default='hot')
+    last_accessed_at = models.DateTimeField(null=True, blank=True)  # 마지막 상세 페이지/보관함 재생 시각
     collections = models.ManyToManyField(Collection, related_name='audio_contents', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # 목록 화면처럼 본문이 필요 없는 곳에서 defer 할 필드
+    TEXT_FIELDS = ('original_text', 'translated_text', 'sync_data')
+
     def __str__(self):
         return f"{self.title} ({self.user.username})"
 
     def delete(self, *args, **kwargs):
         """
-        객체 삭제 시 연결된 파일도 함께 삭제합니다.
-        (이 로직은 수정 없이 그대로 사용해도 좋습니다.)
+        오디오 MP3 와 파생 파일(속도 버전, 렌디션, 파형 피크)을 지우고 행을 삭제합니다.
+        STORAGE_DEFER_DELETES 이면 파일은 남겨 두고 고아 파일 정리(collect_orphans)에 맡깁니다.
+        파생 파일 행은 CASCADE 로, 콜드 티어 파일/사용량 장부/재생목록 캐시는 pre_delete 신호에서 처리합니다.
         """
         if self.audio_file:
-            try:
-                # self.audio_file.storage.delete()와 동일하게 작동
-                self.audio_file.delete(save=False)
-            except Exception as e:
-                logger.warning(f"오디오 파일 삭제 실패 (파일: {self.audio_file.name}): {e}")
-        
+            # STORAGE_DEFER_DELETES 이면 고아 파일 정리(collect_orphans)에 맡김
+            discard_file(self.audio_file.storage, self.audio_file.name)
+        # 파생 파일 행은 CASCADE 로 함께 지움 (pre_delete 신호에서 사용량 집계에 파생 파일 크기가 필요)
+        for variant in self.variants.all():
+            discard_file(variant.file.storage, variant.file.name)
+
+        super().delete(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class AudioVariant(models.Model):
+    """
+    강의 오디오의 파생 파일 (원본 MP3 와 같은 이름 줄기로 저장)
+    speaking_rate 는 TTS 합성 속도와 같은 기준의 말하기 속도이며, sync_data 는 이 파일 기준 타임스탬프입니다.
+    codec 은 저장 형식입니다. (속도 버전 mp3, 저비트레이트 렌디션 opus/aac, 파형 피크 peaks)
+    """
+    audio = models.ForeignKey(AudioContent, on_delete=models.CASCADE, related_name='variants')
+    speaking_rate = models.FloatField()
+    codec = models.CharField(max_length=10, default='mp3')
+    file = models.FileField(upload_to=audio_upload_path, storage=get_audio_storage)
+    sync_data = models.TextField(null=True, blank=True)  # JSON 문자열 (타임스탬프)
+    file_size = models.PositiveIntegerField(default=0)  # 바이트
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.audio.title} ({self.speaking_rate:g}, {self.codec})"
+
+    def delete(self, *args, **kwargs):
+        """객체 삭제 시 파생 파일도 함께 삭제합니다."""
+        if self.file:
+            discard_file(self.file.storage, self.file.name)
         super().delete(*args, **kwargs)
 
+    class Meta:
+        ordering = ['speaking_rate', 'codec']
+        unique_together = ['audio', 'speaking_rate', 'codec']
+
+
+class ReviewMix(models.Model):
+    """
+    보관함 복습 트랙 (보관함의 오디오들에서 고른 문장 구간을 섞어 이어 붙인 MP3)
+    (보관함, 시드, 문장 수)마다 하나씩 저장해 두고, signature(만들 때의 보관함 구성)가 바뀌면 다시 만듭니다.
+    sync_data 의 각 항목에는 원래 오디오(audio_id)와 문장 번호(index)가 함께 들어 있습니다.
+    """
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='review_mixes')
+    seed = models.PositiveIntegerField()
+    sentence_count = models.PositiveIntegerField()
+    signature = models.CharField(max_length=64)
+    audio_file = models.FileField(upload_to=audio_upload_path, storage=get_audio_storage)
+    sync_data = models.TextField()  # JSON 문자열 (타임스탬프)
+    file_size = models.PositiveIntegerField(default=0)  # 바이트
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.collection.name} 복습 (seed={self.seed}, {self.sentence_count}문장)"
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['collection', 'seed', 'sentence_count']
+
+
+class UsageLedger(models.Model):
+    """
+    사용자별 사용량 (생성/수정/삭제 때 증감으로 갱신, reconcile_usage 로 다시 계산)
+    storage_bytes 는 MP3 와 파생 파일 크기의 합이고, tts_characters 는 누적 TTS 합성 글자 수라 삭제해도 줄지 않습니다.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='usage_ledger')
+    audio_count = models.IntegerField(default=0)
+    storage_bytes = models.BigIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
+    sentence_count = models.IntegerField(default=0)
+    tts_characters = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)  # 마지막으로 다시 계산한 시각
+
+    def __str__(self):
+        return f"{self.user.username} - {self.audio_count}개, {self.storage_bytes / 1024 / 1024:.1f}MB"
+
+    class Meta:
+        verbose_name = "사용량"
+        verbose_name_plural = "사용량"
+
+
+class GenerationJob(models.Model):
+    """
+    생성 요청 멱등 키 기록
+    같은 사용자가 같은 키로 다시 요청하면 새로 생성하지 않고 기존 작업/결과로 연결합니다.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '진행 중'),
+        (STATUS_DONE, '완료'),
+        (STATUS_FAILED, '실패'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_jobs')
+    idempotency_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    audio = models.ForeignKey(AudioContent, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.idempotency_key} ({self.status})"
+
     class Meta:
         ordering = ['-created_at']
+        unique_together = ['user', 'idempotency_key']
@@ -0,0 +1,151 @@
+"""
+스토리지 고아 파일 정리
+DB 에서 참조하지 않는 파일을 {prefix}/audios/ (또는 사용자 접두사 {prefix}/audios/{user_id}/) 아래에서 찾아 지웁니다.
+
+- QuerySet.delete(), 사용자 CASCADE 삭제(예전 경로 구조의 파일), 업로드 후 실패한 작업은 모델 delete() 를 거치지 않아 파일이 남습니다.
+- 스토리지 키는 페이지 단위로 나열하고 (S3 list_objects_v2), 일정 개수씩 묶어 DB 참조와 비교하므로
+  파일 수와 상관없이 메모리 사용량이 일정합니다.
+- 방금 올렸지만 아직 DB 에 저장되기 전인 파일(생성/수정 중)을 지우지 않도록 유예 시간보다 오래된 파일만 지웁니다.
+- S3 는 DeleteObjects 로 한 번에 1000개씩 지웁니다.
+- STORAGE_DEFER_DELETES 를 켜면 요청 처리 중에는 파일을 지우지 않고 (discard_file) 이 정리 작업에 맡깁니다.
+"""
+import logging
+import os
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects 한 번에 지울 수 있는 최대 키 수
+
+
+class StoredObject(NamedTuple):
+    name: str  # 스토리지 파일 이름 (FileField 에 저장되는 값)
+    size: int
+    modified: datetime  # UTC
+
+
+def discard_file(storage, name):
+    """
+    요청 처리 중 더 이상 쓰지 않는 파일을 지웁니다.
+    STORAGE_DEFER_DELETES 이면 지우지 않고 고아 파일 정리(collect_orphans)에 맡깁니다.
+    """
+    if not name or settings.STORAGE_DEFER_DELETES:
+        return
+    try:
+        storage.delete(name)
+    except Exception as e:
+        logger.warning(f"파일 삭제 실패 (파일: {name}): {e}")
+
+
+def audio_prefix():
+    """정리 대상 접두사 (audio_upload_path 와 같은 {prefix}/audios/)"""
+    return f"{getattr(settings, 'STORAGE_ENVIRONMENT_PREFIX', 'local')}/audios/"
+
+
+def user_audio_prefix(user_id):
+    """사용자의 파일이 모두 들어가는 접두사 (audio_upload_path 참고)"""
+    return f"{audio_prefix()}{user_id}/"
+
+
+def audio_file_fields():
+    """audio_upload_path 로 저장하는 (모델, 필드 이름) 목록. 참조 확인 대상"""
+    from .models import audio_upload_path
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField) and field.upload_to is audio_upload_path
+    ]
+
+
+def iter_stored_objects(storage, prefix):
+    """접두사 아래의 파일을 페이지 단위로 나열합니다."""
+    if isinstance(storage, S3Boto3Storage):
+        key_prefix = storage._normalize_name(clean_name(prefix))
+        location = storage._normalize_name('')
+        paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=key_prefix):
+            for item in page.get('Contents', []):
+                name = item['Key'][len(location):].lstrip('/') if location else item['Key']
+                yield StoredObject(name, item['Size'], item['LastModified'])
+        return
+    root = storage.path(prefix)
+    for directory, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            name = os.path.relpath(path, storage.path('')).replace(os.sep, '/')
+            yield StoredObject(name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, dt_timezone.utc))
+
+
+def referenced_names(names):
+    """names 중 DB 에서 참조하는 이름"""
+    referenced = set()
+    for model, field_name in audio_file_fields():
+        referenced.update(
+            model._base_manager.filter(**{f'{field_name}__in': names}).values_list(field_name, flat=True)
+        )
+    return referenced
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def find_orphans(storage, prefix, grace, chunk_size=1000):
+    """
+    유예 시간(grace, timedelta)보다 오래됐고 DB 에서 참조하지 않는 파일을 chunk_size 개씩 묶어 돌려줍니다.
+    반환값: (조사한 파일 수, 고아 파일 목록) 이터레이터
+    """
+    cutoff = datetime.now(dt_timezone.utc) - grace
+    for chunk in _chunks(iter_stored_objects(storage, prefix), chunk_size):
+        candidates = [obj for obj in chunk if obj.modified < cutoff]
+        referenced = referenced_names([obj.name for obj in candidates]) if candidates else set()
+        yield len(chunk), [obj for obj in candidates if obj.name not in referenced]
+
+
+def delete_objects(storage, names):
+    """파일을 지웁니다. S3 는 DeleteObjects 로 1000개씩 지웁니다. 반환값: 실패한 (이름, 이유) 목록"""
+    failed = []
+    if isinstance(storage, S3Boto3Storage):
+        client = storage.connection.meta.client
+        for chunk in _chunks(names, DELETE_BATCH_SIZE):
+            keys = {storage._normalize_name(clean_name(name)): name for name in chunk}
+            response = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True},
+            )
+            failed.extend(
+                (keys.get(error['Key'], error['Key']), error.get('Message', '')) for error in response.get('Errors', [])
+            )
+        return failed
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            failed.append((name, str(e)))
+    return failed
+
+
+def delete_prefix(storage, prefix):
+    """접두사 아래의 파일을 모두 지웁니다. (나열한 페이지마다 DeleteObjects) 반환값: (지운 수, 실패 목록)"""
+    deleted, failed = 0, []
+    for chunk in _chunks(iter_stored_objects(storage, prefix), DELETE_BATCH_SIZE):
+        errors = delete_objects(storage, [obj.name for obj in chunk])
+        deleted += len(chunk) - len(errors)
+        failed.extend(errors)
+    return deleted, failed
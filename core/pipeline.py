@@ -0,0 +1,564 @@
+"""
+음성 생성 파이프라인
+문장 파싱 → TTS 합성(클립 피크 측정) → 배치/정규화 게인 계산 → 스트리밍 MP3 인코딩 → 저장
+각 단계를 독립된 함수로 분리하여 뷰와 벤치마크 커맨드가 함께 사용합니다.
+"""
+import asyncio
+import codecs
+import functools
+import itertools
+import io
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from pydub import AudioSegment
+from pydub.utils import db_to_float, ratio_to_db
+
+from .encoding import (
+    CODECS, LAME_DELAY_SAMPLES, RENDITION_CODECS, EncodingError, encode_rendition, export_mp3_segmented,
+    get_encode_executor,
+)
+from .models import AudioContent, AudioVariant
+from .resilience import ProviderUnavailableError
+from .usage import record_generation
+from .waveform import compute_peaks, pack_peaks
+
+logger = logging.getLogger(__name__)
+
+# 원문 반복 오디오 설정
+SPEAKING_RATE = 0.8
+VOLUME_GAIN_DB = 3.0
+REPEAT_COUNT = 3
+REPEAT_BREAK_MS = 1000  # 같은 문장 반복 사이 공백
+SET_BREAK_MS = 2000  # 문장 세트 사이 공백
+NORMALIZE_HEADROOM_DB = -1.0  # 정규화 목표 피크 (AudioSegment.normalize 의 headroom)
+
+# AI 응답 첫 줄에 붙는 서문으로 간주할 키워드
+PREAMBLE_KEYWORDS = ['다음은', '여기', '목록', '아래', '입니다', '다음과']
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # 업로드 파일을 읽는 단위 (바이트)
+UPLOAD_SOURCE_LANGUAGE = 'es'  # TXT 업로드의 원문 언어 (스페인어 음성으로 합성)
+
+
+class UploadError(ValueError):
+    """업로드 파일이 형식/크기/문장 수 제한을 벗어남 (사용자에게 400으로 표시)"""
+
+
+# -----------------------------------------------------------
+# 1. 파싱
+# -----------------------------------------------------------
+
+def pair_lines(lines):
+    """유효한 줄 목록을 원문/번역 쌍으로 묶습니다. 짝이 없는 마지막 줄은 버립니다."""
+    return [
+        {'text': lines[i], 'translation': lines[i + 1]}
+        for i in range(0, len(lines) - 1, 2)
+    ]
+
+
+def iter_line_pairs(lines):
+    """유효한 줄을 순서대로 받아 원문/번역 쌍을 만드는 대로 돌려줍니다. 짝이 없는 마지막 줄은 버립니다."""
+    text = None
+    for line in lines:
+        if text is None:
+            text = line
+        else:
+            yield {'text': text, 'translation': line}
+            text = None
+    if text is not None:
+        logger.warning("파일의 유효한 줄 수가 홀수입니다. 마지막 줄이 버려집니다.")
+
+
+def parse_uploaded_text(file_content):
+    """업로드된 TXT 내용을 문장 쌍 목록으로 변환합니다."""
+    return list(iter_line_pairs(line.strip() for line in file_content.split('\n') if line.strip()))
+
+
+def iter_upload_lines(uploaded_file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    업로드 파일을 청크 단위로 점진적으로 디코딩하여 공백을 제거한 유효한 줄을 돌려줍니다.
+    파일 전체를 메모리에 올리지 않으며, UTF-8 BOM 은 제거하고 CRLF 는 strip 으로 처리합니다.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    max_bytes = settings.UPLOAD_MAX_BYTES
+    read_bytes = 0
+    pending = ''
+    uploaded_file.seek(0)
+    try:
+        for chunk in uploaded_file.chunks(chunk_size):
+            read_bytes += len(chunk)
+            if read_bytes > max_bytes:
+                raise UploadError(f"파일이 너무 큽니다. (최대 {max_bytes // 1024}KB)")
+            pieces = (pending + decoder.decode(chunk)).split('\n')
+            pending = pieces.pop()
+            for line in pieces:
+                if line.strip():
+                    yield line.strip()
+        pending += decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise UploadError("UTF-8 로 인코딩된 TXT 파일만 업로드할 수 있습니다.")
+    if pending.strip():
+        yield pending.strip()
+
+
+def check_upload(uploaded_file):
+    """
+    합성을 시작하기 전에 업로드 파일을 한 번 훑어 크기/인코딩/문장 수 제한을 검사합니다.
+    (줄은 세기만 하고 보관하지 않음) 반환값: 문장 쌍 개수
+    """
+    if uploaded_file.size is not None and uploaded_file.size > settings.UPLOAD_MAX_BYTES:
+        raise UploadError(f"파일이 너무 큽니다. (최대 {settings.UPLOAD_MAX_BYTES // 1024}KB)")
+    line_count = sum(1 for _ in iter_upload_lines(uploaded_file))
+    sentence_count = line_count // 2
+    if sentence_count == 0:
+        raise UploadError("파일에 원문/번역 문장 쌍이 없습니다.")
+    if sentence_count > settings.UPLOAD_MAX_SENTENCES:
+        raise UploadError(
+            f"문장이 너무 많습니다. ({sentence_count}개, 최대 {settings.UPLOAD_MAX_SENTENCES}개)"
+        )
+    return sentence_count
+
+
+def stream_uploaded_sentences(uploaded_file):
+    """업로드 파일에서 문장 쌍을 파싱되는 대로 돌려줍니다. (check_upload 로 먼저 검사)"""
+    return iter_line_pairs(iter_upload_lines(uploaded_file))
+
+
+def collect_into(items, sink):
+    """items 를 그대로 흘려보내면서 sink 리스트에도 모읍니다. (스트리밍 합성 후 저장용)"""
+    for item in items:
+        sink.append(item)
+        yield item
+
+
+def parse_generated_text(generated_text):
+    """AI가 생성한 텍스트를 문장 쌍 목록으로 변환합니다. (첫 줄 서문 제거)"""
+    lines = [line.strip() for line in generated_text.split('\n') if line.strip()]
+    # 원문을 기대하므로, 한국어 설명 문구에 흔히 쓰이는 키워드가 첫 줄에 있으면 서문으로 간주
+    if lines and any(keyword in lines[0].lower() for keyword in PREAMBLE_KEYWORDS):
+        lines = lines[1:]
+    return pair_lines(lines)
+
+
+# -----------------------------------------------------------
+# 2. 합성
+# -----------------------------------------------------------
+
+class Clip(NamedTuple):
+    """디코딩된 문장 클립과 디코딩 시점에 측정한 피크 (정규화 게인을 조립 전에 계산하기 위함)"""
+    audio: AudioSegment
+    peak: float  # 최대 절대 샘플 값 / 최대 진폭 (0~1)
+
+
+def decode_clip(audio_bytes, audio_format):
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format=audio_format)
+    return Clip(audio, audio.max / audio.max_possible_amplitude)
+
+
+def synthesize_clip(tts, text, voice):
+    """한 문장을 합성하여 Clip 으로 디코딩합니다."""
+    audio_bytes = tts.synthesize(text, voice, speaking_rate=SPEAKING_RATE, volume_gain_db=VOLUME_GAIN_DB)
+    return decode_clip(audio_bytes, tts.audio_format)
+
+
+def synthesize_sentences(tts, sentences, voice, progress=None, total=None):
+    """
+    문장 쌍을 순서대로 합성하여 (문장 쌍, 클립)을 돌려줍니다.
+    sentences 는 리스트 외에 파싱 중인 제너레이터도 받을 수 있습니다. (이때 total 로 전체 개수 전달)
+    요청 자체의 문제로 합성에 실패한 문장의 클립은 None 이며,
+    재시도 후에도 제공자가 응답하지 않으면 ProviderUnavailableError 가 전달됩니다.
+    progress 가 주어지면 문장마다 progress('synthesizing', done=k, total=n)을 호출합니다.
+    """
+    if total is None:
+        total = len(sentences)
+    for done, sentence_pair in enumerate(sentences, start=1):
+        try:
+            clip = synthesize_clip(tts, sentence_pair['text'], voice)
+        except ProviderUnavailableError:
+            # 제공자 장애는 무음으로 대체하지 않고 작업 전체를 실패시킴
+            raise
+        except Exception as e:
+            logger.error(f"TTS 생성 중 오류 발생 for text: '{sentence_pair['text'][:20]}...'. Error: {e}")
+            clip = None
+        if progress:
+            progress('synthesizing', done=done, total=total)
+        yield sentence_pair, clip
+
+
+# -----------------------------------------------------------
+# 3. 조립 / 정규화 / 인코딩
+# -----------------------------------------------------------
+# 합친 오디오를 메모리에 만들지 않습니다. 클립 배치(샘플 위치)와 정규화 게인을 먼저 계산하고,
+# 인코딩할 때 필요한 구간의 PCM 만 클립에 게인을 적용하며 흘려보냅니다.
+
+PCM_SAMPLE_WIDTH = 2  # 인코더에 넘기는 16bit PCM
+SILENCE_CHUNK_SECONDS = 1  # 무음을 한 번에 흘려보내는 최대 길이
+
+
+def normalize_gain_db(peak_ratio):
+    """
+    전체 최대 피크(최대 진폭 대비 비율)로 정규화 게인(dB)을 계산합니다.
+    기존 AudioSegment.normalize(headroom=NORMALIZE_HEADROOM_DB)와 같은 값입니다.
+    """
+    if peak_ratio <= 0:
+        return 0.0
+    return ratio_to_db(db_to_float(-NORMALIZE_HEADROOM_DB) / peak_ratio)
+
+
+class LessonPlan:
+    """
+    조립 결과를 오디오 대신 배치 정보로 표현합니다.
+    pieces: (시작 샘플, 클립 번호) 목록. 그 밖의 구간은 무음입니다.
+    render(start, end) 로 [start, end) 구간의 게인 적용 PCM 을 조각 단위로 돌려줍니다.
+    """
+
+    def __init__(self, clips, pieces, total_samples, frame_rate, channels, gain_db):
+        self.clips = clips
+        self.pieces = pieces
+        self.total_samples = total_samples
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.gain_db = gain_db
+
+    @property
+    def duration_seconds(self):
+        return self.total_samples / self.frame_rate
+
+    def _silence(self, samples):
+        frame_bytes = PCM_SAMPLE_WIDTH * self.channels
+        chunk = self.frame_rate * SILENCE_CHUNK_SECONDS
+        while samples > 0:
+            size = min(samples, chunk)
+            yield bytes(size * frame_bytes)
+            samples -= size
+
+    def render(self, start=0, end=None):
+        end = self.total_samples if end is None else end
+        frame_bytes = PCM_SAMPLE_WIDTH * self.channels
+        cursor = start
+        # 같은 클립이 연달아 반복되므로 게인을 적용한 클립은 하나만 들고 있음
+        gained_index, gained = None, None
+        for offset, index in self.pieces:
+            length = int(self.clips[index].frame_count())
+            if offset + length <= cursor:
+                continue
+            if offset >= end:
+                break
+            yield from self._silence(offset - cursor)
+            if index != gained_index:
+                gained_index, gained = index, self.clips[index].apply_gain(self.gain_db).raw_data
+            piece_start = max(cursor, offset) - offset
+            piece_end = min(end, offset + length) - offset
+            yield gained[piece_start * frame_bytes:piece_end * frame_bytes]
+            cursor = offset + piece_end
+        yield from self._silence(end - cursor)
+
+
+def plan_lesson(synthesized, frame_rate=None, channels=None):
+    """
+    (문장 쌍, 클립) 목록의 배치와 문장별 타임스탬프(초)를 계산합니다.
+    공백 - 원문 - 공백 - 원문 - 공백 - 원문 - 공백 형태로 반복하고, 문장 세트 사이에는 공백을 넣으며,
+    실패한 문장은 공백만 남깁니다. 반환값: (LessonPlan, sync_data), 클립이 하나도 없으면 (None, [])
+    frame_rate/channels 를 주면 (기존 파일에 이어 붙일 때) 클립을 그 형식으로 맞춥니다.
+    """
+    decoded = [clip for _, clip in synthesized if clip is not None]
+    if not decoded:
+        return None, []
+    frame_rate = frame_rate or max(clip.audio.frame_rate for clip in decoded)
+    channels = channels or max(clip.audio.channels for clip in decoded)
+
+    def samples(ms):
+        return int(round(ms * frame_rate / 1000))
+
+    clips, pieces, sync_data = [], [], []
+    cursor = 0
+    for i, (sentence_pair, clip) in enumerate(synthesized):
+        if i > 0:
+            cursor += samples(SET_BREAK_MS)
+        if clip is None:
+            continue
+        audio = clip.audio.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(PCM_SAMPLE_WIDTH)
+        clips.append(audio)
+        start = cursor
+        cursor += samples(REPEAT_BREAK_MS)
+        for _ in range(REPEAT_COUNT):
+            pieces.append((cursor, len(clips) - 1))
+            cursor += int(audio.frame_count()) + samples(REPEAT_BREAK_MS)
+        sync_data.append({
+            'text': sentence_pair['text'],
+            'translation': sentence_pair['translation'],
+            'start': start / frame_rate,
+            'end': cursor / frame_rate
+        })
+
+    # 반복/공백은 피크를 바꾸지 않으므로 전체 피크 = 클립 피크의 최댓값
+    gain_db = normalize_gain_db(max(clip.peak for clip in decoded))
+    return LessonPlan(clips, pieces, cursor, frame_rate, channels, gain_db), sync_data
+
+
+def encode_lesson(plan, sync_data, tempo=1.0):
+    """
+    배치된 강의를 MP3 로 인코딩합니다. 반환값: (mp3_bytes, 파일 재생 시간 기준으로 보정한 sync_data)
+    GENERATION_SEGMENTED_ENCODE 가 켜져 있으면 문장 세트 경계에서 나눠 여러 코어로 인코딩합니다.
+    tempo 가 1 이 아니면 음높이를 유지하며 속도를 바꾼 버전을 만듭니다.
+    """
+    segment_count = None if settings.GENERATION_SEGMENTED_ENCODE else 1
+    return export_mp3_segmented(
+        plan.render, plan.total_samples, plan.frame_rate, plan.channels, sync_data, segment_count, tempo
+    )
+
+
+class RenderedVariant(NamedTuple):
+    """강의 오디오의 파생 파일 (AudioVariant 로 저장, sync_data 가 None 이면 원본 MP3 와 같은 타임라인)"""
+    speaking_rate: float
+    codec: str
+    content: bytes
+    sync_data: list = None
+
+
+MIN_TEMPO, MAX_TEMPO = 0.5, 2.0  # atempo 한 단계로 처리할 수 있는 범위
+
+
+def render_rate_variants(plan, sync_data):
+    """
+    settings.GENERATION_RATE_VARIANTS 의 말하기 속도마다 이미 디코딩된 클립으로 속도 버전 MP3 를 만듭니다.
+    TTS 를 다시 호출하지 않고 로컬 CPU 로 음높이를 유지하며 늘이거나 줄입니다.
+    """
+    variants = []
+    for speaking_rate in getattr(settings, 'GENERATION_RATE_VARIANTS', []):
+        tempo = speaking_rate / SPEAKING_RATE
+        if tempo == 1.0:
+            continue
+        if not MIN_TEMPO <= tempo <= MAX_TEMPO:
+            logger.warning(f"지원하지 않는 말하기 속도 버전을 건너뜁니다: {speaking_rate} (배율 {tempo:.2f})")
+            continue
+        mp3_bytes, variant_sync_data = encode_lesson(plan, sync_data, tempo)
+        variants.append(RenderedVariant(speaking_rate, 'mp3', mp3_bytes, variant_sync_data))
+    return variants
+
+
+def get_rendition_codecs():
+    return [codec for codec in getattr(settings, 'GENERATION_RENDITIONS', []) if codec in RENDITION_CODECS]
+
+
+def submit_renditions(plan):
+    """
+    settings.GENERATION_RENDITIONS 의 저비트레이트 렌디션(Opus/AAC) 인코딩을 인코딩 스레드 풀에 넣습니다.
+    반환값: (코덱, future) 목록 → collect_renditions 로 결과를 모읍니다.
+    """
+    return [
+        (codec, get_encode_executor().submit(encode_rendition, codec, plan.render(), plan.frame_rate, plan.channels))
+        for codec in get_rendition_codecs()
+    ]
+
+
+def collect_renditions(submitted):
+    """
+    렌디션 인코딩 결과를 모읍니다. MP3 와 같은 타임라인이므로 sync_data 는 따로 두지 않으며,
+    인코딩에 실패한 렌디션은 건너뜁니다. (MP3 가 항상 대체 재생용으로 있음)
+    """
+    renditions = []
+    for codec, future in submitted:
+        try:
+            renditions.append(RenderedVariant(SPEAKING_RATE, codec, future.result()))
+        except EncodingError as e:
+            logger.warning(f"{codec} 렌디션 인코딩 실패: {e}")
+    return renditions
+
+
+def render_renditions(plan):
+    return collect_renditions(submit_renditions(plan))
+
+
+def render_peaks(plan, sync_data):
+    """
+    플레이어용 파형 피크 파일을 만듭니다. (문장 경계 포함, sync_data 는 파일 기준으로 보정된 값)
+    앞에 MP3 인코더 지연만큼 무음을 넣어 MP3 파일과 같은 타임라인으로 맞춥니다.
+    """
+    lead_in = bytes(LAME_DELAY_SAMPLES * PCM_SAMPLE_WIDTH * plan.channels)
+    peaks = compute_peaks(itertools.chain([lead_in], plan.render()), plan.frame_rate, plan.channels)
+    return RenderedVariant(SPEAKING_RATE, 'peaks', pack_peaks(peaks, sync_data))
+
+
+# -----------------------------------------------------------
+# 4. 저장
+# -----------------------------------------------------------
+
+def build_audio_filename():
+    """저장 이름 (사용자/연월 폴더는 audio_upload_path 가 붙임). 같은 제목을 동시에 올려도 겹치지 않도록 uuid"""
+    return f"{uuid.uuid4().hex}.mp3"
+
+
+def build_variant_filename(base_name, variant):
+    """원본 파일과 같은 이름 줄기의 파생 파일 이름 (예: 3f2a...c1.rate-0.6.mp3, 3f2a...c1.opus)"""
+    stem = os.path.splitext(os.path.basename(base_name))[0]
+    if variant.speaking_rate != SPEAKING_RATE:
+        stem = f"{stem}.rate-{variant.speaking_rate:g}"
+    return f"{stem}.{CODECS[variant.codec]['extension']}"
+
+
+def build_variant(audio_obj, variant):
+    return AudioVariant(
+        audio=audio_obj,
+        speaking_rate=variant.speaking_rate,
+        codec=variant.codec,
+        sync_data=json.dumps(variant.sync_data) if variant.sync_data is not None else None,
+        file_size=len(variant.content),
+    )
+
+
+def save_variants(audio_obj, variants):
+    """파생 파일을 업로드하고 AudioVariant 로 기록합니다."""
+    for variant in variants:
+        build_variant(audio_obj, variant).file.save(
+            build_variant_filename(audio_obj.audio_file.name, variant), ContentFile(variant.content)
+        )
+
+
+def save_audio_content(user, title, category, source_language, sentences, sync_data, mp3_bytes, progress=None,
+                       variants=()):
+    """AudioContent를 생성하고 MP3 파일(과 파생 파일)을 스토리지에 업로드합니다."""
+    if progress:
+        progress('uploading')
+    audio_obj = AudioContent.objects.create(
+        user=user,
+        title=title,
+        category=category,
+        source_language=source_language,
+        original_text='\n'.join(s['text'] for s in sentences),
+        translated_text='\n'.join(s['translation'] for s in sentences),
+        sync_data=json.dumps(sync_data),
+        file_size=len(mp3_bytes),
+    )
+    audio_obj.audio_file.save(build_audio_filename(), ContentFile(mp3_bytes))
+    save_variants(audio_obj, variants)
+    record_generation(audio_obj, sentences, variants)
+    return audio_obj
+
+
+def render_lesson(synthesized, progress=None):
+    """
+    합성된 클립을 배치하고 정규화 게인을 적용하며 MP3로 인코딩합니다.
+    반환값: (mp3_bytes, sync_data, 파생 파일 목록), 생성된 오디오가 없으면 (None, sync_data, [])
+    """
+    synthesized = list(synthesized)
+    if progress:
+        progress('assembling')
+    plan, sync_data = plan_lesson(synthesized)
+    if plan is None:
+        return None, sync_data, []
+    renditions = submit_renditions(plan)  # 인코딩 스레드에서 MP3 와 동시에 진행
+    mp3_bytes, file_sync_data = encode_lesson(plan, sync_data)
+    variants = render_rate_variants(plan, sync_data) + [render_peaks(plan, file_sync_data)]
+    return mp3_bytes, file_sync_data, variants + collect_renditions(renditions)
+
+
+def run_generation(tts, sentences, voice, progress=None, total=None):
+    """합성부터 MP3 인코딩까지 실행합니다. 반환값은 render_lesson 과 같습니다."""
+    return render_lesson(synthesize_sentences(tts, sentences, voice, progress, total), progress)
+
+
+# -----------------------------------------------------------
+# 5. 비동기 파이프라인 (ASGI 뷰용)
+# -----------------------------------------------------------
+# 네트워크 대기(TTS/Gemini/스토리지)는 이벤트 루프에서 동시에 처리하고,
+# CPU 작업(pydub 디코딩/조립/인코딩)은 스레드 풀로 넘겨 이벤트 루프를 막지 않습니다.
+
+_cpu_executor = None
+
+
+def get_cpu_executor():
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'GENERATION_CPU_WORKERS', 2), thread_name_prefix='generation-cpu'
+        )
+    return _cpu_executor
+
+
+async def run_in_cpu_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args))
+
+
+async def asynthesize_sentences(tts, sentences, voice, concurrency=None, progress=None):
+    """
+    synthesize_sentences 의 비동기 버전. 최대 concurrency 개 문장을 동시에 합성하며
+    결과는 입력 순서대로 반환합니다. (progress 의 done 은 완료된 문장 수)
+    """
+    semaphore = asyncio.Semaphore(concurrency or getattr(settings, 'GENERATION_TTS_CONCURRENCY', 8))
+    total = len(sentences)
+    completed = 0
+
+    async def synthesize_one(sentence_pair):
+        async with semaphore:
+            try:
+                audio_bytes = await tts.asynthesize(
+                    sentence_pair['text'], voice, speaking_rate=SPEAKING_RATE, volume_gain_db=VOLUME_GAIN_DB
+                )
+                clip = await run_in_cpu_pool(decode_clip, audio_bytes, tts.audio_format)
+            except ProviderUnavailableError:
+                raise
+            except Exception as e:
+                logger.error(f"TTS 생성 중 오류 발생 for text: '{sentence_pair['text'][:20]}...'. Error: {e}")
+                clip = None
+            nonlocal completed
+            completed += 1
+            if progress:
+                progress('synthesizing', done=completed, total=total)
+            return sentence_pair, clip
+
+    tasks = [asyncio.ensure_future(synthesize_one(sentence_pair)) for sentence_pair in sentences]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # 한 문장이라도 제공자 장애로 실패하면 나머지 합성은 취소
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def arun_generation(tts, sentences, voice, progress=None):
+    """run_generation 의 비동기 버전"""
+    synthesized = await asynthesize_sentences(tts, sentences, voice, progress=progress)
+    return await run_in_cpu_pool(render_lesson, synthesized, progress)
+
+
+async def asave_audio_content(user, title, category, source_language, sentences, sync_data, mp3_bytes, progress=None,
+                              variants=()):
+    """save_audio_content 의 비동기 버전. 스토리지 업로드는 별도 스레드에서 실행합니다."""
+    if progress:
+        progress('uploading')
+    audio_obj = await AudioContent.objects.acreate(
+        user=user,
+        title=title,
+        category=category,
+        source_language=source_language,
+        original_text='\n'.join(s['text'] for s in sentences),
+        translated_text='\n'.join(s['translation'] for s in sentences),
+        sync_data=json.dumps(sync_data),
+        file_size=len(mp3_bytes),
+    )
+    # DB를 건드리지 않는 업로드(save=False)이므로 thread_sensitive=False 로 병렬 실행
+    await sync_to_async(audio_obj.audio_file.save, thread_sensitive=False)(
+        build_audio_filename(), ContentFile(mp3_bytes), save=False
+    )
+    await audio_obj.asave(update_fields=['audio_file', 'updated_at'])
+    await asyncio.gather(*(asave_variant(audio_obj, variant) for variant in variants))
+    await sync_to_async(record_generation)(audio_obj, sentences, variants)
+    return audio_obj
+
+
+async def asave_variant(audio_obj, variant):
+    variant_obj = build_variant(audio_obj, variant)
+    await sync_to_async(variant_obj.file.save, thread_sensitive=False)(
+        build_variant_filename(audio_obj.audio_file.name, variant), ContentFile(variant.content), save=False
+    )
+    await variant_obj.asave()
@@ -0,0 +1,107 @@
+"""
+보관함 연속 재생 재생목록
+보관함의 오디오를 저장된 MP3 그대로 세그먼트로 나열한 HLS(M3U8) 재생목록과 같은 내용의 JSON 을 만듭니다.
+(서버에서 다시 인코딩하지 않음)
+
+- 세그먼트 길이는 sync_data 의 마지막 end 입니다. (문장 세트 뒤 공백까지 포함된 값)
+- 세그먼트 URL 은 storage.cached_url 로 서명 URL 을 재사용합니다.
+- 재생목록은 보관함별로 캐시하고, 보관함 구성이 바뀌거나(신호) 오디오가 수정/삭제되면 지웁니다.
+  지우는 요청과 읽는 요청이 서로 다른 워커 프로세스에서 처리될 수 있으므로 settings.CACHES['playlist'] 를 사용합니다.
+  캐시 시간은 서명 URL 이 재생 중에 만료되지 않도록 짧게 둡니다.
+"""
+import json
+import math
+
+from django.core.cache import caches
+
+from .storage import cached_url
+
+PLAYLIST_CACHE = 'playlist'
+PLAYLIST_CACHE_TIMEOUT = 300  # 초
+
+
+def _cache_key(collection_id):
+    return f"collection_playlist:{collection_id}"
+
+
+def get_playlist_cache():
+    return caches[PLAYLIST_CACHE]
+
+
+def invalidate_playlists(collection_ids):
+    """보관함 재생목록 캐시를 지웁니다."""
+    get_playlist_cache().delete_many([_cache_key(collection_id) for collection_id in collection_ids])
+
+
+def sync_duration(sync_data):
+    """타임스탬프 목록의 마지막 end (초). 없으면 0"""
+    return max((entry.get('end', 0) for entry in sync_data), default=0.0)
+
+
+def audio_duration(audio):
+    """sync_data 로 구한 오디오 길이 (초). 타임스탬프가 없으면 0"""
+    try:
+        sync_data = json.loads(audio.sync_data or '[]')
+    except ValueError:
+        return 0.0
+    return sync_duration(sync_data)
+
+
+def build_playlist(collection):
+    """재생목록 JSON 데이터. items 의 offset 은 보관함 전체에서 각 오디오가 시작하는 위치 (초)"""
+    from .tiering import ensure_hot  # tiering -> usage -> playlist 순환 import 를 피함
+    audios = list(
+        collection.audio_contents.order_by('pk').only('id', 'title', 'audio_file', 'sync_data', 'storage_tier')
+    )
+    ensure_hot(audios)
+    items = []
+    offset = 0.0
+    for audio in audios:
+        duration = audio_duration(audio)
+        if not audio.audio_file or duration <= 0:
+            continue
+        items.append({
+            'audio_id': audio.pk,
+            'title': audio.title,
+            'url': cached_url(audio.audio_file),
+            'duration': round(duration, 3),
+            'offset': round(offset, 3),
+        })
+        offset += duration
+    return {
+        'collection_id': collection.pk,
+        'name': collection.name,
+        'duration': round(offset, 3),
+        'items': items,
+    }
+
+
+def get_playlist(collection):
+    """캐시된 재생목록 JSON 데이터 (없으면 만들어 캐시)"""
+    return get_playlist_cache().get_or_set(
+        _cache_key(collection.pk), lambda: build_playlist(collection), PLAYLIST_CACHE_TIMEOUT
+    )
+
+
+def render_m3u8(playlist):
+    """
+    HLS VOD 재생목록. 오디오마다 별개의 MP3 파일이므로 사이에 EXT-X-DISCONTINUITY 를 넣어
+    재생기가 타임스탬프를 새로 잡게 합니다.
+    """
+    items = playlist['items']
+    target = max((math.ceil(item['duration']) for item in items), default=1)
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f'#EXT-X-TARGETDURATION:{target}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+    ]
+    for i, item in enumerate(items):
+        if i > 0:
+            lines.append('#EXT-X-DISCONTINUITY')
+        title = ' '.join(item['title'].replace(',', ' ').split())
+        lines.append(f"#EXTINF:{item['duration']:.3f},{title}")
+        lines.append(item['url'])
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,99 @@
+"""
+생성 작업 진행 상황
+파이프라인이 단계별 이벤트를 캐시에 기록하면 generation_progress_view 가 읽어서 브라우저로 전달합니다.
+(ASGI(ASYNC_GENERATION)에서는 SSE 스트림, WSGI 에서는 최신 이벤트 JSON 을 브라우저가 반복 요청)
+생성 요청과 SSE 요청이 서로 다른 워커 프로세스에서 처리될 수 있으므로 settings.CACHES['progress'] 를 사용합니다.
+
+이벤트 단계: gemini_done → synthesizing(done/total) → assembling → uploading → done(audio_id, url) | error(message)
+"""
+import asyncio
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PROGRESS_CACHE = 'progress'
+PROGRESS_TTL = 600  # 이벤트 보관 시간 (초)
+POLL_INTERVAL = 0.5  # 캐시 확인 주기 (초)
+HEARTBEAT_INTERVAL = 15  # 이벤트가 없을 때 연결 유지용 주석 전송 주기 (초)
+FINAL_STAGES = ('done', 'error')
+
+# 브라우저가 만든 UUID 형태의 작업 ID만 허용
+JOB_ID_PATTERN = re.compile(r'^[0-9a-fA-F-]{16,64}$')
+
+
+def is_valid_job_id(job_id):
+    return bool(job_id) and bool(JOB_ID_PATTERN.match(job_id))
+
+
+def progress_key(job_id):
+    return f"generation_progress:{job_id}"
+
+
+def get_progress_cache():
+    return caches[PROGRESS_CACHE]
+
+
+class ProgressReporter:
+    """
+    한 생성 작업의 진행 이벤트 기록기. reporter(stage, **data) 형태로 호출합니다.
+    작업 ID가 없거나 형식이 잘못되면 아무것도 기록하지 않습니다.
+    최신 이벤트 하나만 보관하므로 SSE 쪽에서 중간 이벤트를 건너뛸 수 있습니다.
+    """
+
+    def __init__(self, job_id, user_id):
+        self.job_id = job_id if is_valid_job_id(job_id) else None
+        self.user_id = user_id
+        self.seq = 0
+
+    def __call__(self, stage, **data):
+        if not self.job_id:
+            return
+        self.seq += 1
+        event = {'seq': self.seq, 'stage': stage, 'user_id': self.user_id, **data}
+        get_progress_cache().set(progress_key(self.job_id), event, PROGRESS_TTL)
+
+
+def format_event(event):
+    """캐시 이벤트를 SSE 메시지로 변환합니다. (user_id 는 전송하지 않음)"""
+    payload = {key: value for key, value in event.items() if key != 'user_id'}
+    return f"id: {event['seq']}\nevent: {event['stage']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _accept(event, user_id, last_seq):
+    """본인 작업의 새 이벤트인지 확인합니다."""
+    return bool(event) and event.get('user_id') == user_id and event['seq'] > last_seq
+
+
+def progress_snapshot(job_id, user_id):
+    """
+    WSGI 용 진행 상황 (최신 이벤트 하나, 아직 없으면 stage=pending)
+    동기 워커에서 스트림을 열어 두면 진행 페이지마다 워커 하나를 점유하므로 브라우저가 짧게 반복 요청합니다.
+    """
+    event = get_progress_cache().get(progress_key(job_id))
+    if not _accept(event, user_id, 0):
+        return {'seq': 0, 'stage': 'pending'}
+    return {key: value for key, value in event.items() if key != 'user_id'}
+
+
+async def aprogress_events(job_id, user_id, timeout=None):
+    """ASGI 용 SSE 스트림 (최종 이벤트를 보내거나 timeout 이 지나면 종료, 워커 스레드를 점유하지 않음)"""
+    cache = get_progress_cache()
+    deadline = time.monotonic() + (timeout or settings.GENERATION_PROGRESS_TIMEOUT)
+    last_seq = 0
+    last_sent = time.monotonic()
+    yield "retry: 2000\n\n"
+    while time.monotonic() < deadline:
+        event = await cache.aget(progress_key(job_id))
+        if _accept(event, user_id, last_seq):
+            last_seq = event['seq']
+            last_sent = time.monotonic()
+            yield format_event(event)
+            if event['stage'] in FINAL_STAGES:
+                return
+        elif time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,382 @@
+"""
+TTS / Gemini 제공자 인터페이스
+- Google 구현: 실제 Google Cloud TTS, Gemini API 호출
+- Stub 구현: 네트워크 없이 결정적인 결과를 돌려주는 로컬 구현 (벤치마크/개발용)
+settings.TTS_PROVIDER, settings.GEMINI_PROVIDER 로 선택합니다.
+"""
+import array
+import asyncio
+import hashlib
+import io
+import math
+import random
+import threading
+import time
+import wave
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from google.api_core import exceptions as google_exceptions
+
+from .hedging import get_hedger, get_hedging_config
+from .resilience import acall_with_resilience, call_with_resilience
+from .utils import (
+    agenerate_tts_audio, generate_tts_audio, get_tts_async_client, get_tts_client, get_voice_config,
+)
+
+
+# 언어 이름 매핑 (Gemini 프롬프트용)
+LANGUAGE_NAMES = {
+    'es': '스페인어',
+    'en': '영어',
+    'fr': '프랑스어',
+    'de': '독일어',
+    'ja': '일본어',
+    'zh': '중국어'
+}
+
+
+class TTSProvider:
+    """TTS 제공자 공통 인터페이스"""
+    name = 'base'
+    # synthesize()가 돌려주는 오디오 바이트의 포맷 (pydub format 인자)
+    audio_format = 'mp3'
+
+    def get_voice(self, lang_code):
+        raise NotImplementedError
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        """텍스트를 합성하여 오디오 바이트를 반환합니다. timeout: 호출 1회 제한 시간(초)"""
+        raise NotImplementedError
+
+    async def asynthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        """비동기 합성. 기본 구현은 동기 호출을 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self.synthesize, text, voice, speaking_rate, volume_gain_db, timeout)
+
+
+class GoogleTTSProvider(TTSProvider):
+    """Google Cloud Text-to-Speech"""
+    name = 'google'
+    audio_format = 'mp3'
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        # 클라이언트는 첫 호출 시점에 생성 (자격 증명 오류를 호출 측에서 처리하도록)
+        if self._client is None:
+            self._client = get_tts_client()
+        return self._client
+
+    def get_voice(self, lang_code):
+        return get_voice_config(lang_code)
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return generate_tts_audio(
+            self.client, text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db, timeout=timeout
+        )
+
+    async def asynthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return await agenerate_tts_audio(
+            get_tts_async_client(), text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db,
+            timeout=timeout
+        )
+
+
+class StubLatencyMixin:
+    """지연/지터/오류율을 흉내 내는 공통 로직 (실행 단위로 결정적인 난수 사용)"""
+
+    def _init_stub(self, latency, jitter, error_rate, seed, slow_rate=0.0, slow_latency=5.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # slow_rate 확률로 slow_latency 초가 걸리는 꼬리 지연 호출
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _draw_call(self):
+        """(지연 초, 실패 여부)를 뽑습니다."""
+        with self._rng_lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            if self._rng.random() < self.slow_rate:
+                delay = self.slow_latency
+            fail = self._rng.random() < self.error_rate
+        return delay, fail
+
+    def _raise_if_failed(self, delay, fail, timeout):
+        if timeout is not None and delay > timeout:
+            raise google_exceptions.DeadlineExceeded(f"{self.name}: {timeout}초 내에 응답하지 않았습니다.")
+        if fail:
+            raise google_exceptions.ServiceUnavailable(f"{self.name}: 시뮬레이션된 오류")
+
+    def _simulate_call(self, timeout=None):
+        delay, fail = self._draw_call()
+        time.sleep(min(delay, timeout) if timeout is not None else delay)
+        self._raise_if_failed(delay, fail, timeout)
+
+    async def _asimulate_call(self, timeout=None):
+        delay, fail = self._draw_call()
+        await asyncio.sleep(min(delay, timeout) if timeout is not None else delay)
+        self._raise_if_failed(delay, fail, timeout)
+
+
+class StubTTSProvider(StubLatencyMixin, TTSProvider):
+    """
+    로컬 스텁 TTS
+    - 텍스트마다 결정적인 길이(min_clip_ms ~ max_clip_ms)의 사인파 WAV를 반환
+    - latency ± jitter 초 만큼 대기하고, error_rate 확률로 UNAVAILABLE 오류 발생
+    - slow_rate 확률로 slow_latency 초 대기 (꼬리 지연 재현)
+    """
+    name = 'stub'
+    audio_format = 'wav'
+
+    SAMPLE_RATE = 24000
+    TONE_HZ = 250  # 24000 / 250 = 96 샘플 주기 → 정수 주기로 타일링 가능
+
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, min_clip_ms=1500, max_clip_ms=4000, seed=0,
+                 slow_rate=0.0, slow_latency=5.0):
+        self._init_stub(latency, jitter, error_rate, seed, slow_rate, slow_latency)
+        self.min_clip_ms = min_clip_ms
+        self.max_clip_ms = max(min_clip_ms, max_clip_ms)
+        period = self.SAMPLE_RATE // self.TONE_HZ
+        samples = array.array('h', (int(3000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+        self._period_bytes = samples.tobytes()
+
+    def get_voice(self, lang_code):
+        return lang_code
+
+    def clip_duration_ms(self, text):
+        """텍스트 해시로 결정되는 클립 길이 (같은 텍스트는 항상 같은 길이)"""
+        digest = int(hashlib.md5(f"{self.seed}:{text}".encode('utf-8')).hexdigest()[:8], 16)
+        return self.min_clip_ms + digest % (self.max_clip_ms - self.min_clip_ms + 1)
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        self._simulate_call(timeout)
+        return self._render_clip(text, speaking_rate)
+
+    async def asynthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        await self._asimulate_call(timeout)
+        return self._render_clip(text, speaking_rate)
+
+    def _render_clip(self, text, speaking_rate):
+        duration_ms = int(self.clip_duration_ms(text) / (speaking_rate or 1.0))
+        frame_count = self.SAMPLE_RATE * duration_ms // 1000
+        period_frames = len(self._period_bytes) // 2
+        pcm = self._period_bytes * (frame_count // period_frames + 1)
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes(pcm[:frame_count * 2])
+        return buffer.getvalue()
+
+
+class SentenceProvider:
+    """학습 문장 생성 제공자 공통 인터페이스"""
+    name = 'base'
+
+    def generate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        """원문/번역이 줄 단위로 번갈아 나오는 텍스트를 반환합니다."""
+        raise NotImplementedError
+
+    async def agenerate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        """비동기 문장 생성. 기본 구현은 동기 호출을 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self.generate_sentences, source_language, target_word, sentence_count, timeout)
+
+
+def build_sentence_prompt(source_language, target_word, sentence_count):
+    """Gemini에 전달할 문장 생성 프롬프트를 만듭니다."""
+    lang_name = LANGUAGE_NAMES.get(source_language, source_language)
+    return f"""당신은 외국어 학습 전문가입니다. 다음 조건에 맞는 문장을 생성해주세요:
+
+        언어: {lang_name}
+        학습할 단어/표현: {target_word}
+        문장 개수: {sentence_count}개
+
+        각 문장은 다음 형식으로 작성해주세요:
+        1. {lang_name} 원문
+        2. 한국어 번역
+
+        요구사항:
+        - '{target_word}'를 반드시 포함해야 합니다
+        - 다양한 문맥에서 사용되는 예문
+        - 스페인어의 경우 활용형(인칭,단수,복수,시제 등)을 다양하게 사용
+        - 각 문장 쌍 사이에 빈 줄 추가
+
+        **[필수 지침: 응답은 오직 요청된 문장 쌍만 포함해야 하며, 어떠한 설명, 서문, 제목도 포함해서는 안 됩니다. 첫 번째 줄은 반드시 {lang_name} 원문 문장으로 시작해야 합니다.]**
+
+        출력 형식 (반드시 이 형식을 따라주세요):
+        원문 문장
+        한국어 번역
+        ...
+        """
+
+
+class GeminiProvider(SentenceProvider):
+    """Google Gemini"""
+    name = 'google'
+    MODEL_NAME = 'gemini-2.5-flash'
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+
+    def _get_model(self):
+        import google.generativeai as genai
+        from decouple import config
+
+        genai.configure(api_key=self.api_key or config('GEMINI_API_KEY'))
+        return genai.GenerativeModel(self.MODEL_NAME)
+
+    def generate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        prompt = build_sentence_prompt(source_language, target_word, sentence_count)
+        request_options = {'timeout': timeout} if timeout else None
+        response = self._get_model().generate_content(prompt, request_options=request_options)
+        return response.text.strip()
+
+    async def agenerate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        prompt = build_sentence_prompt(source_language, target_word, sentence_count)
+        request_options = {'timeout': timeout} if timeout else None
+        response = await self._get_model().generate_content_async(prompt, request_options=request_options)
+        return response.text.strip()
+
+
+class StubGeminiProvider(StubLatencyMixin, SentenceProvider):
+    """
+    로컬 스텁 Gemini
+    - 요청한 개수만큼 결정적인 문장 쌍을 반환 (실제 응답처럼 서문 한 줄 포함)
+    """
+    name = 'stub'
+
+    def __init__(self, latency=1.0, jitter=0.2, error_rate=0.0, seed=0):
+        self._init_stub(latency, jitter, error_rate, seed)
+
+    def generate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        self._simulate_call(timeout)
+        return self._render_text(target_word, sentence_count)
+
+    async def agenerate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        await self._asimulate_call(timeout)
+        return self._render_text(target_word, sentence_count)
+
+    def _render_text(self, target_word, sentence_count):
+        lines = [f"다음은 '{target_word}'를 포함한 예문입니다."]
+        for i in range(1, sentence_count + 1):
+            lines.append(f"Frase de ejemplo número {i} con {target_word}.")
+            lines.append(f"{target_word}를 사용한 예문 {i}번.")
+            lines.append('')
+        return '\n'.join(lines).strip()
+
+
+class ResilientTTSProvider(TTSProvider):
+    """TTS 호출에 재시도/서킷 브레이커/데드라인 정책(settings.RESILIENCE['tts'])을 적용하는 래퍼"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.name = provider.name
+        self.audio_format = provider.audio_format
+
+    def get_voice(self, lang_code):
+        return self.provider.get_voice(lang_code)
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return call_with_resilience('tts', lambda timeout: self.provider.synthesize(
+            text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db, timeout=timeout
+        ))
+
+    async def asynthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return await acall_with_resilience('tts', lambda timeout: self.provider.asynthesize(
+            text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db, timeout=timeout
+        ))
+
+
+class HedgedTTSProvider(TTSProvider):
+    """느린 합성 호출에 중복 요청을 보내 먼저 도착한 응답을 사용하는 래퍼 (settings.TTS_HEDGING)"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.name = provider.name
+        self.audio_format = provider.audio_format
+        self.hedger = get_hedger('tts')
+
+    def get_voice(self, lang_code):
+        return self.provider.get_voice(lang_code)
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return self.hedger.call(lambda: self.provider.synthesize(
+            text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db, timeout=timeout
+        ))
+
+    async def asynthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        return await self.hedger.acall(lambda: self.provider.asynthesize(
+            text, voice, speaking_rate=speaking_rate, volume_gain_db=volume_gain_db, timeout=timeout
+        ))
+
+
+class ResilientSentenceProvider(SentenceProvider):
+    """문장 생성 호출에 재시도/서킷 브레이커/데드라인 정책(settings.RESILIENCE['gemini'])을 적용하는 래퍼"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.name = provider.name
+
+    def generate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        return call_with_resilience('gemini', lambda timeout: self.provider.generate_sentences(
+            source_language, target_word, sentence_count, timeout=timeout
+        ))
+
+    async def agenerate_sentences(self, source_language, target_word, sentence_count, timeout=None):
+        return await acall_with_resilience('gemini', lambda timeout: self.provider.agenerate_sentences(
+            source_language, target_word, sentence_count, timeout=timeout
+        ))
+
+
+TTS_PROVIDERS = {
+    'google': GoogleTTSProvider,
+    'stub': StubTTSProvider,
+}
+
+SENTENCE_PROVIDERS = {
+    'google': GeminiProvider,
+    'stub': StubGeminiProvider,
+}
+
+
+def get_tts_provider(name=None, resilient=True, hedged=None, **options):
+    """
+    이름(기본값: settings.TTS_PROVIDER)에 해당하는 TTS 제공자를 생성합니다.
+    resilient=True 이면 재시도/서킷 브레이커 래퍼를,
+    hedged=True (기본값: settings.TTS_HEDGING['enabled']) 이면 헤지 요청 래퍼를 씌워 반환합니다.
+    """
+    name = name or getattr(settings, 'TTS_PROVIDER', 'google')
+    try:
+        provider_class = TTS_PROVIDERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"알 수 없는 TTS 제공자입니다: {name}")
+    provider = provider_class(**options)
+    if resilient:
+        provider = ResilientTTSProvider(provider)
+    if hedged is None:
+        hedged = get_hedging_config()['enabled']
+    if hedged:
+        provider = HedgedTTSProvider(provider)
+    return provider
+
+
+def get_sentence_provider(name=None, resilient=True, **options):
+    """
+    이름(기본값: settings.GEMINI_PROVIDER)에 해당하는 문장 생성 제공자를 생성합니다.
+    resilient=True 이면 재시도/서킷 브레이커 래퍼를 씌워 반환합니다.
+    """
+    name = name or getattr(settings, 'GEMINI_PROVIDER', 'google')
+    try:
+        provider_class = SENTENCE_PROVIDERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"알 수 없는 문장 생성 제공자입니다: {name}")
+    provider = provider_class(**options)
+    return ResilientSentenceProvider(provider) if resilient else provider
@@ -0,0 +1,249 @@
+"""
+외부 API(TTS, Gemini) 호출 복원력 계층
+- 호출별 타임아웃과 전체 데드라인
+- 재시도 가능한 gRPC 오류(UNAVAILABLE 등)에 대한 지터 지수 백오프 재시도
+- 제공자가 다운되었을 때 즉시 실패하는 서킷 브레이커
+설정은 settings.RESILIENCE[이름] 에서 읽습니다.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 오류 (gRPC: UNAVAILABLE, DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, INTERNAL, ABORTED)
+RETRYABLE_EXCEPTIONS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.Aborted,
+    google_exceptions.GatewayTimeout,
+)
+
+DEFAULT_POLICY = {
+    'timeout': 10.0,  # 호출 1회 타임아웃 (초)
+    'deadline': 30.0,  # 재시도를 포함한 전체 데드라인 (초)
+    'max_attempts': 4,
+    'base_delay': 0.2,  # 백오프 기본 대기 (초)
+    'max_delay': 2.0,  # 백오프 최대 대기 (초)
+    'failure_threshold': 5,  # 연속 실패 횟수가 이 값에 도달하면 서킷 open
+    'recovery_timeout': 30.0,  # open 후 half-open 으로 전환하기까지 대기 (초)
+}
+
+
+class ProviderUnavailableError(Exception):
+    """재시도 후에도 제공자 호출이 실패했거나 서킷이 열려 있음"""
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    """서킷 브레이커가 열려 있어 호출하지 않고 즉시 실패"""
+
+
+def is_retryable(exc):
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+
+def get_policy(name):
+    policy = dict(DEFAULT_POLICY)
+    policy.update(getattr(settings, 'RESILIENCE', {}).get(name, {}))
+    return policy
+
+
+class CircuitBreaker:
+    """
+    연속 실패 기반 서킷 브레이커
+    closed → (연속 실패 임계치) → open → (recovery_timeout 경과) → half_open
+    half_open 에서는 시험 호출 1건만 허용하고, 성공하면 closed, 실패하면 다시 open.
+    재시도 불가능한 오류(잘못된 입력 등)는 어느 쪽으로도 세지 않고 시험 호출 자리만 돌려줍니다.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold, recovery_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"서킷 브레이커 closed: {self.name}")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"서킷 브레이커 open: {self.name} (연속 실패 {self.consecutive_failures}회)")
+                    metrics.increment(f"{self.name}.circuit_opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_s': retry_in,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            policy = get_policy(name)
+            _breakers[name] = CircuitBreaker(name, policy['failure_threshold'], policy['recovery_timeout'])
+        return _breakers[name]
+
+
+def breaker_states():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """full jitter 지수 백오프: [0, min(max_delay, base * 2^attempt)] 에서 균등 추출"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def _check_attempt(name, policy, breaker, started):
+    """시도 전 검사: 남은 데드라인(초)을 반환하고, 서킷이 열려 있으면 CircuitOpenError 를 발생시킵니다."""
+    remaining = policy['deadline'] - (time.monotonic() - started)
+    if remaining <= 0:
+        return None
+    if not breaker.allow_request():
+        metrics.increment(f"{name}.circuit_rejected")
+        raise CircuitOpenError(f"{name} 서킷이 열려 있습니다.")
+    metrics.increment(f"{name}.calls")
+    return remaining
+
+
+def _on_failure(name, policy, breaker, attempt, started, error):
+    """
+    실패 처리: 재시도 불가능한 오류는 그대로 발생시키고,
+    재시도할 경우 대기 시간(초)을, 더 이상 재시도하지 않을 경우 None 을 반환합니다.
+    """
+    if not is_retryable(error):
+        # 잘못된 입력 등 요청 자체의 문제는 제공자 장애도 정상 응답도 아님.
+        # 연속 실패 횟수는 그대로 두고 half-open 시험 호출 자리만 돌려줍니다.
+        breaker.release_trial()
+        raise error
+    breaker.record_failure()
+    metrics.increment(f"{name}.failures")
+    logger.warning(f"{name} 호출 실패 (시도 {attempt + 1}/{policy['max_attempts']}): {error}")
+
+    delay = backoff_delay(attempt, policy['base_delay'], policy['max_delay'])
+    if attempt + 1 >= policy['max_attempts'] or time.monotonic() - started + delay >= policy['deadline']:
+        return None
+    metrics.increment(f"{name}.retries")
+    return delay
+
+
+def _on_success(name, breaker, call_started):
+    breaker.record_success()
+    metrics.observe_latency(f"{name}.latency", time.monotonic() - call_started)
+
+
+def call_with_resilience(name, func):
+    """
+    func(timeout=초)를 서킷 브레이커/재시도/데드라인 정책 하에 호출합니다.
+    재시도 불가능한 오류는 그대로 전달하고, 재시도 가능한 오류가 소진되면
+    ProviderUnavailableError 를 발생시킵니다.
+    """
+    policy = get_policy(name)
+    breaker = get_breaker(name)
+    started = time.monotonic()
+    last_error = None
+
+    for attempt in range(policy['max_attempts']):
+        remaining = _check_attempt(name, policy, breaker, started)
+        if remaining is None:
+            break
+        call_started = time.monotonic()
+        try:
+            result = func(timeout=min(policy['timeout'], remaining))
+        except Exception as e:
+            last_error = e
+            delay = _on_failure(name, policy, breaker, attempt, started, e)
+            if delay is None:
+                break
+            time.sleep(delay)
+            continue
+        _on_success(name, breaker, call_started)
+        return result
+
+    raise ProviderUnavailableError(f"{name} 호출이 재시도 후에도 실패했습니다: {last_error}")
+
+
+async def acall_with_resilience(name, afunc):
+    """call_with_resilience 의 비동기 버전 (afunc(timeout=초)는 코루틴을 반환)"""
+    policy = get_policy(name)
+    breaker = get_breaker(name)
+    started = time.monotonic()
+    last_error = None
+
+    for attempt in range(policy['max_attempts']):
+        remaining = _check_attempt(name, policy, breaker, started)
+        if remaining is None:
+            break
+        call_started = time.monotonic()
+        try:
+            result = await afunc(timeout=min(policy['timeout'], remaining))
+        except asyncio.CancelledError:
+            # 헤지 패자 취소 등은 제공자 장애가 아니므로 시험 호출 슬롯만 반납
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            last_error = e
+            delay = _on_failure(name, policy, breaker, attempt, started, e)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            continue
+        _on_success(name, breaker, call_started)
+        return result
+
+    raise ProviderUnavailableError(f"{name} 호출이 재시도 후에도 실패했습니다: {last_error}")
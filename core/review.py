@@ -0,0 +1,265 @@
+"""
+보관함 복습 트랙
+보관함에 담긴 오디오들에서 문장을 골라 섞은 복습용 MP3 를 만듭니다. (TTS/Gemini 호출 없음)
+
+- 저장된 MP3 는 고정 비트레이트이므로 파일 앞부분만 읽어 프레임 길이를 알아내고,
+  문장 세트 구간(sync_data start/end)의 바이트 위치를 계산해 그 부분만 범위 요청으로 읽습니다.
+- 문장 세트의 앞뒤는 공백이므로 프레임 경계에서 잘라 다시 인코딩하지 않고 그대로 이어 붙입니다. (core.editing 과 같은 방식)
+  표본화율/채널이 다른 파일이 섞여 있으면 구간을 디코딩해 맞춘 뒤 한 번에 인코딩합니다.
+- 결과는 (보관함, 시드, 문장 수)별 ReviewMix 로 저장해 두고, 보관함 구성이 바뀌면 다시 만듭니다.
+"""
+import hashlib
+import json
+import math
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+
+from .encoding import (
+    LAME_DELAY_SAMPLES, count_mp3_samples, decode_mp3_to_pcm, encode_pcm_to_mp3, is_info_frame, iter_mp3_frames,
+)
+from .models import ReviewMix
+from .pipeline import PCM_SAMPLE_WIDTH, SET_BREAK_MS
+from .storage import read_range
+from .tiering import ensure_hot
+
+HEADER_PROBE_BYTES = 4096  # 첫 프레임 헤더를 찾으려고 읽는 파일 앞부분
+MARGIN_FRAMES = 2  # 계산한 바이트 위치 앞뒤로 더 읽는 프레임 수 (패딩 비트로 생기는 오차 보정)
+
+
+class ReviewMixError(ValueError):
+    """복습 트랙을 만들 수 없는 경우 (문장이 있는 오디오가 없음 등)"""
+
+
+class Mp3Layout(NamedTuple):
+    base: int  # 첫 오디오 프레임의 바이트 위치
+    frame_samples: int
+    sample_rate: int
+    channels: int
+    bytes_per_frame: float  # 고정 비트레이트 기준 평균 프레임 길이
+    shift: float  # Info 프레임이 있는 예전 파일은 재생기가 인코더 지연을 잘라내므로 타임스탬프를 그만큼 옮김
+
+
+class Segment(NamedTuple):
+    data: bytes  # 잘라낸 MP3 프레임
+    samples: int
+    sample_rate: int
+    channels: int
+    offset: float  # 잘라낸 구간 처음부터 문장 세트 시작까지 (초)
+    duration: float  # 문장 세트 길이 (초)
+
+
+def collection_signature(audios):
+    """보관함 구성(오디오와 파일 이름, 문장 타임스탬프)이 바뀌었는지 확인하는 값"""
+    digest = hashlib.sha256()
+    for audio in sorted(audios, key=lambda audio: audio.pk):
+        digest.update(f"{audio.pk}:{audio.audio_file.name}:{len(audio.sync_data or '')}\n".encode())
+    return digest.hexdigest()
+
+
+def select_sentences(audios, seed, count):
+    """보관함의 모든 문장 세트 중 count 개를 시드로 골라 섞습니다. 반환값: [(오디오, 문장 번호, sync 항목)]"""
+    candidates = []
+    for audio in sorted(audios, key=lambda audio: audio.pk):
+        if not audio.audio_file:
+            continue
+        try:
+            sync_data = json.loads(audio.sync_data or '[]')
+        except ValueError:
+            continue
+        candidates.extend((audio, index, entry) for index, entry in enumerate(sync_data))
+    rng = random.Random(seed)
+    return rng.sample(candidates, min(count, len(candidates)))
+
+
+def _first_frames(data):
+    """앞뒤 프레임 헤더가 이어지는 위치부터 프레임을 돌려줍니다. (범위 읽기 중간에서 시작하므로 가짜 동기 패턴을 거름)"""
+    for start in range(len(data) - 4):
+        frames = iter_mp3_frames(data[start:])
+        first = next(frames, None)
+        if first is None:
+            return []
+        second = next(frames, None)
+        if first.offset == 0 and (second is None or second.offset == first.length):
+            return [frame._replace(offset=frame.offset + start) for frame in iter_mp3_frames(data[start:])]
+    return []
+
+
+def probe_layout(storage, name):
+    """파일 앞부분에서 프레임 형식을 읽습니다. 가변 비트레이트(Xing)면 None (바이트 위치를 계산할 수 없음)"""
+    head = read_range(storage, name, 0, HEADER_PROBE_BYTES)
+    frame = next(iter_mp3_frames(head), None)
+    if frame is None:
+        return None
+    shift = 0.0
+    if is_info_frame(head, frame):
+        if b'Xing' in head[frame.offset:frame.offset + 64]:
+            return None
+        base = frame.offset + frame.length
+        shift = LAME_DELAY_SAMPLES / frame.sample_rate
+    else:
+        base = frame.offset
+    bytes_per_frame = frame.samples / 8 * frame.bitrate / frame.sample_rate
+    return Mp3Layout(base, frame.samples, frame.sample_rate, frame.channels, bytes_per_frame, shift)
+
+
+def cut_segment(storage, name, layout, entry, data=None):
+    """
+    문장 세트 구간을 프레임 경계에서 잘라냅니다. 세트 앞뒤 공백 안에서 자르므로 비트 저장소가 끊겨도 소리가 깨지지 않습니다.
+    data 가 있으면 (가변 비트레이트 등) 내려받은 전체 파일에서 자릅니다.
+    """
+    rate, frame_samples = layout.sample_rate, layout.frame_samples
+    start, end = entry['start'] + layout.shift, entry['end'] + layout.shift
+    first = int(start * rate // frame_samples)
+    last = int(math.ceil(end * rate / frame_samples))
+
+    if data is None:
+        low = max(layout.base, int(layout.base + (first - MARGIN_FRAMES) * layout.bytes_per_frame))
+        high = int(layout.base + (last + MARGIN_FRAMES) * layout.bytes_per_frame)
+        chunk = read_range(storage, name, low, high)
+        frames = _first_frames(chunk)
+        # 범위 안 프레임의 번호는 바이트 위치로 계산 (패딩 비트 차이는 반올림으로 흡수)
+        numbered = [(int(round((low + frame.offset - layout.base) / layout.bytes_per_frame)), frame) for frame in frames]
+    else:
+        chunk = data
+        frames = [frame for frame in iter_mp3_frames(data) if not is_info_frame(data, frame)]
+        numbered = list(enumerate(frames))
+
+    selected = [frame for number, frame in numbered if first <= number < last]
+    if not selected:
+        raise ReviewMixError(f"{name}: 문장 구간을 찾을 수 없습니다.")
+    first = next(number for number, frame in numbered if frame is selected[0])
+    return Segment(
+        data=b''.join(chunk[frame.offset:frame.offset + frame.length] for frame in selected),
+        samples=sum(frame.samples for frame in selected),
+        sample_rate=rate,
+        channels=layout.channels,
+        offset=start - first * frame_samples / rate,
+        duration=end - start,
+    )
+
+
+def fetch_segments(selected, workers=None):
+    """고른 문장 세트를 오디오별로 병렬로 잘라 옵니다. (오디오마다 앞부분 1회 + 문장마다 범위 요청 1회)"""
+    workers = workers or settings.REVIEW_MIX_FETCH_WORKERS
+    layouts = {}
+    full_files = {}
+
+    def layout_for(audio):
+        layout = probe_layout(audio.audio_file.storage, audio.audio_file.name)
+        if layout is None:
+            # 바이트 위치를 계산할 수 없는 파일은 전체를 내려받아 프레임을 셈
+            with audio.audio_file.open('rb') as f:
+                full_files[audio.pk] = f.read()
+            frame = next(frame for frame in iter_mp3_frames(full_files[audio.pk]))
+            shift = LAME_DELAY_SAMPLES / frame.sample_rate if is_info_frame(full_files[audio.pk], frame) else 0.0
+            layout = Mp3Layout(0, frame.samples, frame.sample_rate, frame.channels, 0.0, shift)
+        return audio.pk, layout
+
+    audios = {audio.pk: audio for audio, _, _ in selected}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        layouts.update(executor.map(layout_for, audios.values()))
+        return list(executor.map(
+            lambda item: cut_segment(
+                item[0].audio_file.storage, item[0].audio_file.name, layouts[item[0].pk], item[2],
+                full_files.get(item[0].pk),
+            ),
+            selected,
+        ))
+
+
+def assemble_segments(segments):
+    """
+    잘라낸 구간 사이에 세트 공백을 넣어 이어 붙입니다.
+    반환값: (MP3 바이트, 구간별 (시작, 끝) 초)
+    """
+    rates = {(segment.sample_rate, segment.channels) for segment in segments}
+    frame_rate = max(rate for rate, _ in rates)
+    channels = max(channels for _, channels in rates)
+    gap = int(round(SET_BREAK_MS * frame_rate / 1000))
+
+    if len(rates) == 1:
+        # 모두 같은 형식: 프레임을 그대로 이어 붙이고, 공백은 무음 MP3 를 한 번만 인코딩해 재사용
+        silence = encode_pcm_to_mp3([bytes(gap * PCM_SAMPLE_WIDTH * channels)], frame_rate, channels)
+        silence_samples = count_mp3_samples(silence)
+        parts, times, cursor = [], [], 0
+        for i, segment in enumerate(segments):
+            if i > 0:
+                parts.append(silence)
+                cursor += silence_samples
+            start = cursor / frame_rate + segment.offset
+            times.append((start, start + segment.duration))
+            parts.append(segment.data)
+            cursor += segment.samples
+        return b''.join(parts), times
+
+    # 형식이 섞여 있음: 구간을 디코딩해 가장 높은 표본화율/채널 수로 맞춘 뒤 한 번에 인코딩
+    silence_pcm = bytes(gap * PCM_SAMPLE_WIDTH * channels)
+    pcm_parts, times, cursor = [], [], LAME_DELAY_SAMPLES
+    for i, segment in enumerate(segments):
+        if i > 0:
+            pcm_parts.append(silence_pcm)
+            cursor += gap
+        pcm = decode_mp3_to_pcm(segment.data, channels, frame_rate)
+        start = cursor / frame_rate + segment.offset
+        times.append((start, start + segment.duration))
+        pcm_parts.append(pcm)
+        cursor += len(pcm) // (PCM_SAMPLE_WIDTH * channels)
+    return encode_pcm_to_mp3(pcm_parts, frame_rate, channels), times
+
+
+def build_review_mix(collection, seed, count):
+    """
+    복습 트랙을 만듭니다. 반환값: (MP3 바이트, sync_data)
+    sync_data 항목은 원래 문장(text/translation)과 원래 오디오(audio_id, index), 새 트랙 기준 start/end 입니다.
+    """
+    selected = select_sentences(collection.audio_contents.all(), seed, count)
+    if not selected:
+        raise ReviewMixError("복습할 문장이 있는 오디오가 없습니다.")
+    ensure_hot({audio.pk: audio for audio, _, _ in selected}.values())
+    mp3_bytes, times = assemble_segments(fetch_segments(selected))
+    sync_data = [
+        {
+            'text': entry.get('text', ''),
+            'translation': entry.get('translation', ''),
+            'start': round(start, 3),
+            'end': round(end, 3),
+            'audio_id': audio.pk,
+            'index': index,
+        }
+        for (audio, index, entry), (start, end) in zip(selected, times)
+    ]
+    return mp3_bytes, sync_data
+
+
+def get_review_mix(collection, seed, count):
+    """
+    (보관함, 시드, 문장 수)의 복습 트랙을 돌려줍니다. 저장된 트랙이 현재 보관함 구성과 맞으면 그대로 쓰고,
+    없거나 구성이 바뀌었으면 새로 만들어 저장합니다.
+    """
+    signature = collection_signature(collection.audio_contents.all())
+    mix = ReviewMix.objects.filter(collection=collection, seed=seed, sentence_count=count).first()
+    if mix is not None and mix.signature == signature:
+        return mix
+
+    mp3_bytes, sync_data = build_review_mix(collection, seed, count)
+    new_mix = ReviewMix(
+        collection=collection, seed=seed, sentence_count=count, signature=signature,
+        sync_data=json.dumps(sync_data), file_size=len(mp3_bytes),
+    )
+    new_mix.audio_file.save(f"review-{uuid.uuid4().hex}.mp3", ContentFile(mp3_bytes), save=False)
+    try:
+        with transaction.atomic():
+            if mix is not None:
+                mix.delete()  # 이전 트랙 파일은 post_delete 신호에서 정리
+            new_mix.save()
+    except IntegrityError:
+        # 같은 트랙을 동시에 만든 요청이 먼저 저장함
+        new_mix.audio_file.delete(save=False)
+        return ReviewMix.objects.get(collection=collection, seed=seed, sentence_count=count)
+    return new_mix
@@ -1,8 +1,19 @@
+import logging
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import UserProfile
+from .models import AudioContent, ReviewMix, UserProfile
+from .orphans import delete_prefix, discard_file, user_audio_prefix
+from .playlist import invalidate_playlists
+from .tiering import delete_cold_files
+from .usage import audio_usage, negate, record_usage
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -11,6 +22,71 @@ def create_profile_on_user_create(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.get_or_create(user=instance)
 
+
+@receiver(post_delete, sender=ReviewMix)
+def delete_review_mix_file(sender, instance, **kwargs):
+    """복습 트랙 행이 지워지면 (보관함 삭제로 함께 지워질 때 포함) 커밋 후 MP3 도 지웁니다."""
+    if not instance.audio_file:
+        return
+    storage, name = instance.audio_file.storage, instance.audio_file.name
+    transaction.on_commit(lambda: discard_file(storage, name))
+
+
+@receiver(m2m_changed, sender=AudioContent.collections.through)
+def invalidate_playlists_on_membership_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """보관함에 오디오가 추가/제거되면 해당 보관함의 재생목록 캐시를 지웁니다. (양쪽 방향 모두)"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, AudioContent):
+        collection_ids = pk_set if action != 'pre_clear' else instance.collections.values_list('pk', flat=True)
+    else:
+        collection_ids = [instance.pk]
+    invalidate_playlists(list(collection_ids or []))
+
+
+@receiver(pre_delete, sender=AudioContent)
+def invalidate_playlists_on_audio_delete(sender, instance, **kwargs):
+    """오디오가 지워지면 (보관함 연결 행은 신호 없이 지워지므로) 담겨 있던 보관함의 재생목록 캐시를 지웁니다."""
+    invalidate_playlists(list(instance.collections.values_list('pk', flat=True)))
+
+@receiver(pre_delete, sender=AudioContent)
+def record_usage_on_audio_delete(sender, instance, origin=None, **kwargs):
+    """
+    오디오가 지워지면 (QuerySet.delete 포함) 사용량에서 뺍니다. 파생 파일 행이 CASCADE 로 지워지기 전에 크기를 합산합니다.
+    사용자 삭제로 함께 지워질 때는 장부도 함께 지워지므로 건너뜁니다.
+    """
+    if getattr(origin, 'model', type(origin)) is User:
+        return
+    variant_bytes = instance.variants.aggregate(total=Sum('file_size'))['total'] or 0
+    record_usage(instance.user_id, **negate(audio_usage(instance, variant_bytes)))
+
+@receiver(pre_delete, sender=AudioContent)
+def delete_cold_files_on_audio_delete(sender, instance, **kwargs):
+    """콜드 티어 오디오가 지워지면 콜드 위치의 파일도 지웁니다. (원래 이름의 파일은 이미 없음)"""
+    delete_cold_files(instance)
+
+@receiver(post_delete, sender=User)
+def delete_user_files(sender, instance, **kwargs):
+    """
+    사용자가 지워지면 (오디오 행은 CASCADE 로 파일 삭제 없이 지워짐) 커밋 후 사용자 접두사 아래 파일을 한꺼번에 지웁니다.
+    예전 경로 구조의 파일이나 STORAGE_DEFER_DELETES 일 때는 고아 파일 정리에 맡깁니다.
+    """
+    if settings.STORAGE_DEFER_DELETES:
+        return
+    storage = AudioContent._meta.get_field('audio_file').storage
+    prefix = user_audio_prefix(instance.pk)
+
+    def delete_files():
+        try:
+            deleted, failed = delete_prefix(storage, prefix)
+        except Exception as e:
+            logger.warning(f"사용자 파일 삭제 실패 (접두사: {prefix}): {e}")
+            return
+        if failed:
+            logger.warning(f"사용자 파일 {len(failed)}개 삭제 실패 (접두사: {prefix}): {failed[:5]}")
+
+    transaction.on_commit(delete_files)
+
 # allauth 가입 신호
 try:
     from allauth.account.signals import user_signed_up
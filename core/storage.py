@@ -1,9 +1,85 @@
 # core/storage_backends.py
 import json
 import requests
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
 from urllib.parse import quote
 
+
+def read_range(storage, name, start, end):
+    """
+    파일의 [start, end) 바이트만 읽습니다.
+    S3 계열은 Range 요청으로 해당 부분만 받고, 그 밖의 스토리지는 열어서 seek 후 읽습니다.
+    """
+    if end <= start:
+        return b''
+    if isinstance(storage, S3Boto3Storage):
+        key = storage._normalize_name(clean_name(name))
+        response = storage.bucket.Object(key).get(Range=f'bytes={start}-{end - 1}')
+        return response['Body'].read()
+    with storage.open(name, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def copy_file(src_storage, src_name, dst_storage, dst_name, content=None):
+    """
+    파일을 정확히 dst_name 에 씁니다. content 가 없고 둘 다 S3 이면 서버 측 복사(CopyObject)
+    (boto3 client 로 복사하므로 여러 스레드에서 동시에 불러도 됨)
+    """
+    if content is None and isinstance(src_storage, S3Boto3Storage) and isinstance(dst_storage, S3Boto3Storage):
+        dst_storage.connection.meta.client.copy_object(
+            Bucket=dst_storage.bucket_name,
+            Key=dst_storage._normalize_name(clean_name(dst_name)),
+            CopySource={'Bucket': src_storage.bucket_name, 'Key': src_storage._normalize_name(clean_name(src_name))},
+        )
+        return
+    if content is None:
+        with src_storage.open(src_name, 'rb') as f:
+            content = f.read()
+    if dst_storage.exists(dst_name):
+        dst_storage.delete(dst_name)
+    saved = dst_storage.save(dst_name, ContentFile(content))
+    if saved != dst_name:
+        dst_storage.delete(saved)
+        raise IOError(f"{dst_name}: 같은 이름으로 저장하지 못했습니다. ({saved})")
+
+
+def cached_url(field_file):
+    """
+    파일 URL 을 캐시해서 돌려줍니다. SupabaseStorage.url() 은 호출마다 서명 API 를 부르므로
+    서명 유효 시간(AWS_QUERYSTRING_EXPIRE)의 절반 동안 같은 URL 을 재사용합니다.
+    (스토리지 파일 이름은 수정 시 바뀌므로 이름을 키로 씀)
+    """
+    from django.conf import settings
+    key = f"signed_url:{field_file.name}"
+    url = cache.get(key)
+    if url is None:
+        url = field_file.url
+        cache.set(key, url, max(1, (getattr(settings, 'AWS_QUERYSTRING_EXPIRE', 3600) or 3600) // 2))
+    return url
+
+
+def iter_chunks(storage, name, start=0, chunk_size=64 * 1024):
+    """
+    파일을 start 바이트부터 chunk_size 단위로 읽어 돌려줍니다. (전체를 메모리에 올리지 않음)
+    S3 계열의 File 객체는 처음 읽을 때 전체를 내려받으므로 Range 요청의 응답 본문을 조각내어 읽습니다.
+    """
+    if isinstance(storage, S3Boto3Storage):
+        key = storage._normalize_name(clean_name(name))
+        response = storage.bucket.Object(key).get(Range=f'bytes={start}-')
+        yield from response['Body'].iter_chunks(chunk_size)
+        return
+    with storage.open(name, 'rb') as f:
+        f.seek(start)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
 class SupabasePublicStorage(S3Boto3Storage):
     """
     Supabase Storage (public bucket)
@@ -1,3 +1,287 @@
-from django.test import TestCase
+import io
+import json
+import math
+import shutil
+import tempfile
+import wave
+from array import array
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import OperationalError, router, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from pydub import AudioSegment
+
+from core import dbrouting
+from core.dbrouting import replica_reads
+from core.editing import EditError, edit_sentence, splice_sentence
+from core.encoding import count_mp3_samples, decode_mp3_to_pcm, iter_mp3_frames
+from core.middleware import ReplicaReadMiddleware
+from core.models import AudioContent, AudioVariant
+from core.pipeline import REPEAT_BREAK_MS, Clip, encode_lesson, plan_lesson
+
+FRAME_RATE = 24000
+TONE_AMPLITUDE = 8000
+ffmpeg_available = shutil.which(AudioSegment.converter) is not None
+
+
+def tone_pcm(seconds, frequency=440.0):
+    count = int(round(seconds * FRAME_RATE))
+    samples = array('h', (
+        int(TONE_AMPLITUDE * math.sin(2 * math.pi * frequency * i / FRAME_RATE)) for i in range(count)
+    ))
+    return samples.tobytes()
+
+
+def tone_clip(seconds, frequency=440.0):
+    audio = AudioSegment(data=tone_pcm(seconds, frequency), sample_width=2, frame_rate=FRAME_RATE, channels=1)
+    return Clip(audio, TONE_AMPLITUDE / audio.max_possible_amplitude)
+
+
+def build_lesson(durations):
+    """문장마다 길이가 다른 사인파 클립으로 만든 강의 MP3 (libmp3lame 기본값, 고정 비트레이트)"""
+    synthesized = [
+        ({'text': f'Frase {i}', 'translation': f'문장 {i}'}, tone_clip(seconds))
+        for i, seconds in enumerate(durations)
+    ]
+    plan, sync_data = plan_lesson(synthesized)
+    return encode_lesson(plan, sync_data)
+
+
+def sound_onsets(mp3_bytes, sync_data):
+    """문장마다 start 뒤에서 처음 소리가 나는 위치 (초). 디코딩 결과에는 인코더 지연이 그대로 남아 있음"""
+    samples = np.abs(np.frombuffer(decode_mp3_to_pcm(mp3_bytes), dtype='<i2').astype(np.int32))
+    loud = samples > TONE_AMPLITUDE // 4
+    onsets = []
+    for entry in sync_data:
+        start = int(round(entry['start'] * FRAME_RATE))
+        onsets.append((start + int(np.argmax(loud[start:]))) / FRAME_RATE)
+    return onsets
+
+
+def frame_index_at(frames, seconds):
+    cursor = 0
+    for i, frame in enumerate(frames):
+        if cursor + frame.samples > seconds * FRAME_RATE:
+            return i
+        cursor += frame.samples
+    return len(frames)
+
+
+@override_settings(GENERATION_SEGMENTED_ENCODE=False)
+class SpliceSentenceTests(SimpleTestCase):
+    """문장 수정: 기존 MP3 프레임 사이에 새 문장 세트를 끼워 넣기"""
+
+    def setUp(self):
+        if not ffmpeg_available:
+            self.skipTest('ffmpeg 가 없습니다.')
+        self.mp3, self.sync_data = build_lesson([0.6, 0.9, 0.7])
+        self.frames = list(iter_mp3_frames(self.mp3))
+        self.pair = {'text': 'Frase nueva', 'translation': '새 문장'}
+
+    def splice(self, index, seconds=1.4):
+        return splice_sentence(self.mp3, self.sync_data, index, self.pair, tone_clip(seconds, frequency=660.0))
+
+    def formats(self, frames):
+        return {(frame.sample_rate, frame.bitrate) for frame in frames}
+
+    def test_fixture_is_constant_bitrate(self):
+        self.assertEqual(len(self.formats(self.frames)), 1)
+
+    def test_frames_outside_the_sentence_are_copied(self):
+        new_mp3, _ = self.splice(1)
+        head = self.frames[frame_index_at(self.frames, self.sync_data[0]['end'])]
+        tail = self.frames[frame_index_at(self.frames, self.sync_data[2]['start'])]
+        self.assertTrue(new_mp3.startswith(self.mp3[:head.offset]))
+        self.assertTrue(new_mp3.endswith(self.mp3[tail.offset:]))
+
+    def test_frame_count_and_duration(self):
+        new_mp3, new_sync = self.splice(1)
+        new_frames = list(iter_mp3_frames(new_mp3))
+        self.assertEqual(self.formats(new_frames), self.formats(self.frames))
+
+        # 통째로 바뀐 프레임 수만큼 길이가 늘어나고, 뒤 문장은 정확히 그만큼 밀림
+        samples_per_frame = self.frames[0].samples
+        added_samples = count_mp3_samples(new_mp3) - count_mp3_samples(self.mp3)
+        self.assertEqual((len(new_frames) - len(self.frames)) * samples_per_frame, added_samples)
+        self.assertGreater(added_samples, 0)
+        shift = new_sync[2]['start'] - self.sync_data[2]['start']
+        self.assertAlmostEqual(shift, added_samples / FRAME_RATE, delta=0.002)
+        self.assertAlmostEqual(new_sync[2]['end'] - self.sync_data[2]['end'], shift, delta=0.002)
+
+    def test_timestamps_after_edit(self):
+        _, new_sync = self.splice(1)
+        self.assertEqual(new_sync[0], self.sync_data[0])
+        edited = new_sync[1]
+        self.assertEqual((edited['text'], edited['translation']), ('Frase nueva', '새 문장'))
+        self.assertAlmostEqual(edited['start'], self.sync_data[1]['start'], delta=0.001)
+        # 공백 - 원문 × 3 - 공백
+        _, planned = plan_lesson([(self.pair, tone_clip(1.4))])
+        self.assertAlmostEqual(edited['end'] - edited['start'], planned[0]['end'] - planned[0]['start'], delta=0.002)
+        self.assertEqual(new_sync[2]['text'], self.sync_data[2]['text'])
+
+    def test_audio_matches_timestamps(self):
+        """인코더 지연 보정: 문장마다 start 뒤 첫 공백이 끝나는 곳에서 소리가 시작됨"""
+        lead = REPEAT_BREAK_MS / 1000
+        for index in (0, 1, 2):
+            with self.subTest(index=index):
+                new_mp3, new_sync = self.splice(index)
+                for entry, onset in zip(new_sync, sound_onsets(new_mp3, new_sync)):
+                    self.assertAlmostEqual(onset, entry['start'] + lead, delta=0.01)
+
+    def test_last_sentence(self):
+        new_mp3, new_sync = self.splice(2)
+        self.assertEqual(new_sync[:2], self.sync_data[:2])
+        head = self.frames[frame_index_at(self.frames, self.sync_data[1]['end'])]
+        self.assertTrue(new_mp3.startswith(self.mp3[:head.offset]))
+        self.assertGreaterEqual(count_mp3_samples(new_mp3) / FRAME_RATE, new_sync[2]['end'])
+
+
+class FakeTTS:
+    """글자 수에 비례하는 길이의 사인파 WAV 를 돌려주는 TTS"""
+    audio_format = 'wav'
+
+    def synthesize(self, text, voice, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(FRAME_RATE)
+            f.writeframes(tone_pcm(0.1 * len(text)))
+        return buffer.getvalue()
+
+
+@override_settings(GENERATION_SEGMENTED_ENCODE=False, STORAGE_DEFER_DELETES=False)
+class EditSentenceTests(TestCase):
+
+    def setUp(self):
+        if not ffmpeg_available:
+            self.skipTest('ffmpeg 가 없습니다.')
+        self.storage = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.storage.location, True)
+        for model, name in ((AudioContent, 'audio_file'), (AudioVariant, 'file')):
+            field = model._meta.get_field(name)
+            self.addCleanup(setattr, field, 'storage', field.storage)
+            field.storage = self.storage
+
+        user = User.objects.create_user('editor', password='x')
+        mp3, sync_data = build_lesson([0.6, 0.9, 0.7])
+        self.audio = AudioContent.objects.create(
+            user=user, title='hola',
+            original_text='\n'.join(entry['text'] for entry in sync_data),
+            translated_text='\n'.join(entry['translation'] for entry in sync_data),
+            sync_data=json.dumps(sync_data), file_size=len(mp3),
+        )
+        self.audio.audio_file.save('lesson.mp3', ContentFile(mp3))
+        self.sync_data = sync_data
+
+    def test_edit_sentence(self):
+        old_name = self.audio.audio_file.name
+        audio, new_sync = edit_sentence(self.audio, 1, ' Frase nueva ', '새 문장', FakeTTS(), 'es')
+
+        self.assertNotEqual(audio.audio_file.name, old_name)
+        self.assertFalse(self.storage.exists(old_name))
+        with audio.audio_file.open('rb') as f:
+            mp3 = f.read()
+        self.assertEqual(audio.file_size, len(mp3))
+        self.assertEqual(json.loads(audio.sync_data), new_sync)
+        self.assertEqual(audio.original_text.split('\n'), ['Frase 0', 'Frase nueva', 'Frase 2'])
+        self.assertEqual(audio.translated_text.split('\n'), ['문장 0', '새 문장', '문장 2'])
+        self.assertGreaterEqual(count_mp3_samples(mp3) / FRAME_RATE, new_sync[-1]['end'])
+
+    def test_rejects_bad_index_and_empty_text(self):
+        with self.assertRaises(EditError):
+            edit_sentence(self.audio, 3, 'x', '', FakeTTS(), 'es')
+        with self.assertRaises(EditError):
+            edit_sentence(self.audio, 0, '  ', '', FakeTTS(), 'es')
+
+
+def read_db_view(request):
+    """이 요청에서 읽기 쿼리가 갈 DB"""
+    return HttpResponse(router.db_for_read(AudioContent))
+
+
+def write_then_read_view(request):
+    before = router.db_for_read(AudioContent)
+    router.db_for_write(AudioContent)
+    return HttpResponse(f"{before},{router.db_for_read(AudioContent)}")
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    settings/local.py 의 replica 별칭(테스트에서는 default 의 미러)으로 확인하는 복제본 라우팅
+    (TestCase 는 테스트 전체를 트랜잭션으로 감싸 트랜잭션 안의 읽기가 모두 primary 로 가므로 SimpleTestCase)
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        dbrouting._health.clear()
+        self.addCleanup(dbrouting._health.clear)
+        self.factory = RequestFactory()
+
+    def call(self, view, method='get', cookies=None):
+        request = getattr(self.factory, method)('/')
+        request.user = AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        return ReplicaReadMiddleware(view)(request)
+
+    def test_replica_view_reads_from_replica(self):
+        self.assertEqual(self.call(replica_reads(read_db_view)).content, b'replica')
+
+    def test_other_views_read_from_primary(self):
+        self.assertEqual(self.call(read_db_view).content, b'default')
+        self.assertEqual(router.db_for_read(AudioContent), 'default')  # 요청 밖
+
+    def test_write_request_sets_pin_cookie(self):
+        response = self.call(replica_reads(read_db_view), method='post')
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[dbrouting.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], dbrouting.get_config()['pin_seconds'])
+        self.assertNotIn(dbrouting.PIN_COOKIE, self.call(replica_reads(read_db_view)).cookies)
+
+    def test_pin_cookie_keeps_reads_on_primary(self):
+        response = self.call(replica_reads(read_db_view), cookies={dbrouting.PIN_COOKIE: '1'})
+        self.assertEqual(response.content, b'default')
+
+    def test_write_inside_replica_view_switches_to_primary(self):
+        self.assertEqual(self.call(replica_reads(write_then_read_view)).content, b'replica,default')
+
+    def test_reads_inside_transaction_use_primary(self):
+        def view(request):
+            with transaction.atomic():
+                return read_db_view(request)
+
+        self.assertEqual(self.call(replica_reads(view)).content, b'default')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch.object(dbrouting, 'replica_lag', return_value=99.0), self.assertLogs('core.dbrouting'):
+            self.assertEqual(self.call(replica_reads(read_db_view)).content, b'default')
+
+    def test_unreachable_replica_is_skipped_for_retry_window(self):
+        with mock.patch.object(dbrouting, 'replica_lag', side_effect=OperationalError('down')), \
+                self.assertLogs('core.dbrouting'):
+            self.assertEqual(self.call(replica_reads(read_db_view)).content, b'default')
+        # 복구되어도 retry_seconds 동안은 다시 확인하지 않음
+        self.assertEqual(self.call(replica_reads(read_db_view)).content, b'default')
+        dbrouting._health.clear()
+        self.assertEqual(self.call(replica_reads(read_db_view)).content, b'replica')
+
+    def test_async_view(self):
+        @replica_reads
+        async def view(request):
+            return read_db_view(request)
+
+        async def call():
+            request = AsyncRequestFactory().get('/')
+            request.user = AnonymousUser()
+            return await ReplicaReadMiddleware(view)(request)
+
+        response = async_to_sync(call)()
+        self.assertEqual(response.content, b'replica')
+        self.assertIsNone(dbrouting._state.get())
@@ -0,0 +1,165 @@
+"""
+콜드 티어 (잘 재생하지 않는 오디오를 싼 위치로 옮기기)
+대부분의 오디오는 처음 며칠 뒤 다시 재생되지 않으므로, 오래됐고 최근에 접근하지 않았으며 조회수가 적은 오디오의
+MP3 와 파생 파일을 콜드 위치(다른 접두사 또는 다른 버킷)로 옮기고, 다시 접근하면 원래 이름으로 되돌립니다.
+
+- DB 의 파일 이름은 바꾸지 않고 storage_tier 만 바꿉니다. 콜드 위치의 키는 {prefix}/{원래 이름} 입니다.
+  (고아 파일 정리는 {환경}/audios/ 만 보므로 콜드 파일을 건드리지 않음)
+- bitrate 를 설정하면 MP3 를 낮은 비트레이트로 다시 인코딩해 보관합니다. 되돌릴 때는 그 파일을 그대로 씁니다.
+- 같은 버킷/같은 S3 엔드포인트 안에서는 서버 측 복사(CopyObject)를 쓰고, 다시 인코딩할 때만 내려받습니다.
+- 되돌리기는 행을 잠그고 하므로 여러 요청이 동시에 접근해도 한 번만 복사합니다.
+정책은 settings.AUDIO_COLD_TIER 에 있고, 옮기기는 tier_cold_audios 커맨드로 실행합니다.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .encoding import EncodingError, transcode_mp3
+from .models import AudioContent
+from .storage import copy_file
+from .usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+HOT = 'hot'
+COLD = 'cold'
+
+_cold_storages = {}
+
+
+def get_config():
+    return settings.AUDIO_COLD_TIER
+
+
+def get_cold_storage(hot_storage):
+    """콜드 파일을 둘 스토리지. bucket 이 설정돼 있으면 그 버킷, 아니면 원래 스토리지 (다른 접두사)"""
+    bucket = get_config()['bucket']
+    if not bucket or not isinstance(hot_storage, S3Boto3Storage):
+        return hot_storage
+    if bucket not in _cold_storages:
+        _cold_storages[bucket] = S3Boto3Storage(bucket_name=bucket, default_acl='private')
+    return _cold_storages[bucket]
+
+
+def cold_name(name):
+    return f"{get_config()['prefix'].strip('/')}/{name}"
+
+
+def cold_candidates(now=None):
+    """콜드로 옮길 오디오. (생성 후 min_age_days 이상, idle_days 동안 접근 없음, 조회수 max_views 이하)"""
+    config = get_config()
+    now = now or timezone.now()
+    idle_before = now - timedelta(days=config['idle_days'])
+    return (
+        AudioContent.objects.filter(storage_tier=HOT, view_count__lte=config['max_views'])
+        .filter(created_at__lt=now - timedelta(days=config['min_age_days']))
+        .filter(Q(last_accessed_at__lt=idle_before) | Q(last_accessed_at__isnull=True, created_at__lt=idle_before))
+        .exclude(audio_file='').exclude(audio_file__isnull=True)
+    )
+
+
+def _delete(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.warning(f"티어 이동 후 파일 삭제 실패 (파일: {name}): {e}")
+
+
+def _files(audio):
+    """(스토리지, 이름) 목록. MP3 가 첫 번째"""
+    return [(audio.audio_file.storage, audio.audio_file.name)] + [
+        (variant.file.storage, variant.file.name) for variant in audio.variants.all() if variant.file
+    ]
+
+
+def freeze(audio):
+    """
+    오디오 파일을 콜드 위치로 옮깁니다. 반환값: 옮긴 뒤 MP3 바이트 수, 그사이 수정/이동됐으면 None
+    """
+    files = _files(audio)
+    storage, name = files[0]
+    cold_storage = get_cold_storage(storage)
+
+    mp3_content, new_size = None, audio.file_size
+    bitrate = get_config()['bitrate']
+    if bitrate:
+        with storage.open(name, 'rb') as f:
+            original = f.read()
+        try:
+            transcoded = transcode_mp3(original, bitrate)
+        except EncodingError as e:
+            logger.warning(f"콜드 티어 재인코딩 실패, 원본 유지 (audio {audio.pk}): {e}")
+            transcoded = original
+        mp3_content = transcoded if len(transcoded) < len(original) else original
+        new_size = len(mp3_content)
+
+    copied = []
+    try:
+        for i, (file_storage, file_name) in enumerate(files):
+            copy_file(file_storage, file_name, cold_storage, cold_name(file_name), mp3_content if i == 0 else None)
+            copied.append(cold_name(file_name))
+        updated = AudioContent.objects.filter(pk=audio.pk, storage_tier=HOT, audio_file=name).update(
+            storage_tier=COLD, file_size=new_size
+        )
+    except Exception:
+        _delete(cold_storage, copied)
+        raise
+    if not updated:
+        _delete(cold_storage, copied)
+        return None
+
+    if mp3_content is not None:
+        # 같은 이름의 내용이 바뀌므로 이름으로 캐시한 크기/CRC 를 지움
+        from .export import invalidate_file_cache
+        invalidate_file_cache(name)
+    if audio.file_size and new_size != audio.file_size:
+        record_usage(audio.user_id, storage_bytes=new_size - audio.file_size)
+    for file_storage, file_name in files:
+        # DB 가 이름을 계속 참조하므로 고아 정리에 맡길 수 없어 바로 지움
+        _delete(file_storage, [file_name])
+    audio.storage_tier, audio.file_size = COLD, new_size
+    return new_size
+
+
+def rehydrate(audio):
+    """콜드 오디오의 파일을 원래 이름으로 되돌립니다. (이미 되돌려졌으면 아무것도 하지 않음)"""
+    with transaction.atomic():
+        current = AudioContent.objects.select_for_update().only('storage_tier').get(pk=audio.pk)
+        if current.storage_tier == COLD:
+            files = _files(audio)
+            cold_storage = get_cold_storage(files[0][0])
+            for file_storage, file_name in files:
+                copy_file(cold_storage, cold_name(file_name), file_storage, file_name)
+            AudioContent.objects.filter(pk=audio.pk).update(storage_tier=HOT, last_accessed_at=timezone.now())
+            transaction.on_commit(
+                lambda: _delete(cold_storage, [cold_name(file_name) for _, file_name in files])
+            )
+            logger.info(f"콜드 오디오 복원: audio {audio.pk}")
+    audio.storage_tier = HOT
+
+
+def delete_cold_files(audio):
+    """콜드 오디오가 지워질 때 콜드 위치의 파일을 지웁니다. (커밋 후)"""
+    if audio.storage_tier != COLD:
+        return
+    files = _files(audio)
+    cold_storage = get_cold_storage(files[0][0])
+    transaction.on_commit(lambda: _delete(cold_storage, [cold_name(file_name) for _, file_name in files]))
+
+
+def ensure_hot(audios, touch=True):
+    """
+    재생 전에 콜드 오디오를 되돌립니다. touch 이면 마지막 접근 시각도 갱신합니다. (UPDATE 한 번)
+    """
+    audios = [audio for audio in audios if audio.audio_file]
+    for audio in audios:
+        if audio.storage_tier == COLD:
+            rehydrate(audio)
+    if touch and audios:
+        AudioContent.objects.filter(pk__in=[audio.pk for audio in audios]).update(last_accessed_at=timezone.now())
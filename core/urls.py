@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     # 홈 페이지
@@ -10,6 +10,11 @@ urlpatterns = [
     path('process/', views.process_file_view, name='process'),
     # AI 문장 생성
     path('generate/', views.generate_sentences_view, name='generate_sentences'),
+    # 비동기 생성 (ASGI 배포 시 사용)
+    path('process/async/', async_views.process_file_view_async, name='process_async'),
+    path('generate/async/', async_views.generate_sentences_view_async, name='generate_sentences_async'),
+    # 생성 진행 상황 (SSE)
+    path('progress/<str:job_id>/', views.generation_progress_view, name='generation_progress'),
     # 음성 파일 목록
     path('audios/', views.audio_list, name='audio_list'),
     # 카테고리 추가
@@ -20,14 +25,32 @@ urlpatterns = [
     path('audio/<int:audio_id>/update/', views.update_audio, name='update_audio'),
     # 음성 파일 상세
     path('audio/<int:audio_id>/', views.audio_detail, name='audio_detail'),
+    # 말하기 속도 버전 (재생 URL + 타임스탬프)
+    path('audio/<int:audio_id>/variants/<int:variant_id>/', views.audio_variant_view, name='audio_variant'),
+    # 오디오 파일 전송 (로컬 디스크 캐시 + X-Accel-Redirect)
+    path('audio/<int:audio_id>/file/', views.audio_file_view, name='audio_file'),
+    path('audio/<int:audio_id>/variants/<int:variant_id>/file/', views.audio_file_view, name='audio_variant_file'),
+    # 파형 피크 (바이너리)
+    path('audio/<int:audio_id>/peaks/', views.audio_peaks_view, name='audio_peaks'),
+    # 문장 하나 수정 (해당 문장만 다시 합성)
+    path('audio/<int:audio_id>/sentences/<int:index>/edit/', views.edit_sentence_view, name='edit_sentence'),
     
     # 보관함 관련
     path('collections/', views.collection_list, name='collection_list'),
     path('collections/<int:collection_id>/', views.collection_detail, name='collection_detail'),
+    path('collections/<int:collection_id>/review/', views.collection_review_view, name='collection_review'),
+    path('collections/<int:collection_id>/export/', views.export_collection_view, name='export_collection'),
+    path('collections/<int:collection_id>/playlist.m3u8', views.collection_playlist_view, {'fmt': 'm3u8'},
+         name='collection_playlist_m3u8'),
+    path('collections/<int:collection_id>/playlist.json', views.collection_playlist_view, {'fmt': 'json'},
+         name='collection_playlist_json'),
     path('collections/create/', views.create_collection, name='create_collection'),
     path('collections/<int:collection_id>/delete/', views.delete_collection, name='delete_collection'),
     path('collections/<int:collection_id>/update/', views.update_collection, name='update_collection'),
     path('collections/list-json/', views.get_user_collections, name='get_user_collections'),
     path('audio/<int:audio_id>/add-to-collection/', views.add_to_collection, name='add_to_collection'),
     path('collections/<int:collection_id>/remove/<int:audio_id>/', views.remove_from_collection, name='remove_from_collection'),
+
+    # 운영 메트릭 (staff 전용)
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
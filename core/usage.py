@@ -0,0 +1,73 @@
+"""
+사용자별 사용량 집계 (UsageLedger)
+스토리지를 훑지 않고 사용자별 보유 바이트/재생 시간/문장 수/TTS 글자 수를 바로 알 수 있게
+생성, 문장 수정, 삭제 때 증감분만 한 번의 UPDATE 로 반영합니다.
+
+- 생성: pipeline.save_audio_content / asave_audio_content (MP3 + 파생 파일, 합성한 글자 수)
+- 수정: editing.edit_sentence (바뀐 바이트/길이, 다시 합성한 글자 수)
+- 삭제: AudioContent pre_delete 신호 (QuerySet.delete 포함, 사용자 삭제로 함께 지워질 때는 제외)
+- 렌디션 백필: backfill_renditions
+집계가 어긋났거나 (기존 데이터, 실패한 작업) 장부가 없으면 reconcile_usage 커맨드로 다시 계산합니다.
+"""
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UsageLedger
+from .playlist import audio_duration
+
+# 보유량 (오디오를 지우면 줄어듦, reconcile_usage 로 다시 계산 가능)
+OWNED_FIELDS = ('audio_count', 'storage_bytes', 'duration_seconds', 'sentence_count')
+
+
+def sentence_count(audio):
+    try:
+        return len(json.loads(audio.sync_data or '[]'))
+    except ValueError:
+        return 0
+
+
+def audio_usage(audio, variant_bytes=0):
+    """오디오 하나가 차지하는 사용량 (TTS 글자 수 제외)"""
+    return {
+        'audio_count': 1,
+        'storage_bytes': audio.file_size + variant_bytes,
+        'duration_seconds': audio_duration(audio),
+        'sentence_count': sentence_count(audio),
+    }
+
+
+def negate(usage):
+    return {field: -value for field, value in usage.items()}
+
+
+def record_usage(user_id, **deltas):
+    """
+    사용량 증감을 반영합니다. (UPDATE 한 번)
+    장부가 없으면 만드는데, 감소분만 있으면 만들지 않습니다. (기존 데이터가 빠진 장부에서 음수가 되지 않도록)
+    """
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if UsageLedger.objects.filter(user_id=user_id).update(**changes, updated_at=timezone.now()):
+        return
+    if any(value < 0 for value in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            UsageLedger.objects.create(user_id=user_id, **deltas)
+    except IntegrityError:
+        # 동시에 다른 요청이 장부를 만듦
+        UsageLedger.objects.filter(user_id=user_id).update(**changes, updated_at=timezone.now())
+
+
+def record_generation(audio, sentences, variants):
+    """새로 만든 오디오의 사용량 (sentences 는 TTS 로 합성을 요청한 문장 전체)"""
+    record_usage(
+        audio.user_id,
+        **audio_usage(audio, sum(len(variant.content) for variant in variants)),
+        tts_characters=sum(len(sentence['text']) for sentence in sentences),
+    )
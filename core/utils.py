@@ -1,13 +1,20 @@
+import asyncio
+import math
+import weakref
 from google.cloud import texttospeech
-from django.core.exceptions import ImproperlyConfigured 
+from google.oauth2.service_account import Credentials
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 def get_tts_client():
-    """Google Cloud Text-to-Speech 클라이언트를 초기화합니다."""
-    # 환경 변수나 Django 설정을 통해 인증 정보가 설정되어 있어야 합니다.
-    # Google Application Default Credentials(ADC)를 사용하는 것이 일반적입니다.
+    """settings에 정의된 서비스 계정 자격 증명으로 TTS 클라이언트를 초기화합니다."""
+    credentials_json = settings.GOOGLE_CLOUD_CREDENTIALS_JSON
+    if not credentials_json:
+        raise ImproperlyConfigured("GOOGLE_CLOUD_CREDENTIALS_JSON이 settings.py에 정의되어 있지 않습니다.")
+
     try:
-        client = texttospeech.TextToSpeechClient()
-        return client
+        credentials = Credentials.from_service_account_info(credentials_json)
+        return texttospeech.TextToSpeechClient(credentials=credentials)
     except Exception as e:
         raise ImproperlyConfigured(f"TTS 클라이언트 초기화 실패: {e}")
 
@@ -37,18 +44,61 @@ def get_voice_config(lang_code):
     # 기본 음성(언어 코드만 지정)
     return texttospeech.VoiceSelectionParams(language_code=lang_code)
 
-def generate_tts_audio(client, text, voice_config, speaking_rate=1.0, volume_gain_db=0.0):
-    """Google Cloud TTS API를 호출하여 오디오 콘텐츠(바이트)를 반환합니다."""
+def _build_synthesis_request(text, speaking_rate, volume_gain_db):
     synthesis_input = texttospeech.SynthesisInput(text=text)
     audio_config = texttospeech.AudioConfig(
         audio_encoding=texttospeech.AudioEncoding.MP3,
-        speaking_rate=speaking_rate, 
+        speaking_rate=speaking_rate,
         volume_gain_db=volume_gain_db
     )
-    
+    return synthesis_input, audio_config
+
+def generate_tts_audio(client, text, voice_config, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+    """Google Cloud TTS API를 호출하여 오디오 콘텐츠(바이트)를 반환합니다."""
+    synthesis_input, audio_config = _build_synthesis_request(text, speaking_rate, volume_gain_db)
     response = client.synthesize_speech(
         input=synthesis_input, 
         voice=voice_config, 
-        audio_config=audio_config
+        audio_config=audio_config,
+        timeout=timeout
+    )
+    return response.audio_content
+
+
+# 비동기 클라이언트는 생성된 이벤트 루프에 묶이므로 루프별로 캐시
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_tts_async_client():
+    """현재 이벤트 루프용 Google Cloud TTS 비동기 클라이언트를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        credentials_json = settings.GOOGLE_CLOUD_CREDENTIALS_JSON
+        if not credentials_json:
+            raise ImproperlyConfigured("GOOGLE_CLOUD_CREDENTIALS_JSON이 settings.py에 정의되어 있지 않습니다.")
+        try:
+            credentials = Credentials.from_service_account_info(credentials_json)
+            client = texttospeech.TextToSpeechAsyncClient(credentials=credentials)
+        except Exception as e:
+            raise ImproperlyConfigured(f"TTS 비동기 클라이언트 초기화 실패: {e}")
+        _async_clients[loop] = client
+    return client
+
+async def agenerate_tts_audio(client, text, voice_config, speaking_rate=1.0, volume_gain_db=0.0, timeout=None):
+    """generate_tts_audio의 비동기 버전"""
+    synthesis_input, audio_config = _build_synthesis_request(text, speaking_rate, volume_gain_db)
+    response = await client.synthesize_speech(
+        input=synthesis_input,
+        voice=voice_config,
+        audio_config=audio_config,
+        timeout=timeout
     )
-    return response.audio_content
\ No newline at end of file
+    return response.audio_content
+
+def percentile(values, pct):
+    """값 목록의 pct(0~100) 백분위수를 반환합니다. (nearest-rank 방식)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
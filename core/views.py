@@ -1,40 +1,51 @@
-import io
 import json
-import os
-import time
 import base64
+import hashlib
+import os
+import random
 from django.shortcuts import render
-from django.http import HttpResponse, HttpResponseRedirect, FileResponse
+from django.http import HttpResponse, HttpResponseRedirect, FileResponse, StreamingHttpResponse, Http404
 from django.urls import reverse
 from django.conf import settings
-from decouple import config
-from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import condition
 
-# Google Cloud TTS 관련 모듈
-from google.cloud import texttospeech
-from google.oauth2.service_account import Credentials
-from django.core.exceptions import ImproperlyConfigured
-from .utils import get_tts_client, get_voice_config, generate_tts_audio
+from google.api_core import exceptions as google_exceptions
 from pydub import AudioSegment
 from pydub.utils import which
 import logging
 logger = logging.getLogger(__name__)
-from django.utils.text import slugify
-from django.core.files.base import ContentFile
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, redirect
 from django.http import JsonResponse
-from .models import AudioContent, Category, Collection
-from .decorators import premium_required, owner_or_premium_required
-
-# Gemini AI 관련
-import google.generativeai as genai
+from .models import AudioContent, AudioVariant, Category, Collection
+from . import diskcache
+from .decorators import premium_required, owner_or_premium_required, idempotent_generation
+from .dbrouting import replica_reads
+from .editing import EditConflictError, EditError, edit_sentence
+from .encoding import CODECS, RENDITION_CODECS, EncodingError
+from .export import ExportTooLargeError, collection_entries, entries_etag, stream_zip, zip_size
+from .playlist import get_playlist, render_m3u8
+from .pipeline import (
+    SPEAKING_RATE, UPLOAD_SOURCE_LANGUAGE, UploadError, check_upload, collect_into, parse_generated_text, run_generation,
+    save_audio_content, stream_uploaded_sentences,
+)
+from .providers import get_tts_provider, get_sentence_provider
+from .memory import JobTooLargeError, MemoryBudgetError, generation_memory, get_memory_budget
+from .progress import ProgressReporter, is_valid_job_id, progress_snapshot, aprogress_events
+from .resilience import ProviderUnavailableError, breaker_states
+from .review import ReviewMixError, get_review_mix
+from .tiering import ensure_hot
+from . import metrics
 
 AudioSegment.converter = which("ffmpeg") or "/usr/bin/ffmpeg"
 AudioSegment.ffprobe   = which("ffprobe") or "/usr/bin/ffprobe"
 
+@replica_reads
 def home(request):
     """홈 페이지를 표시합니다. 카테고리별 최신 게시물을 보여줍니다."""
     # 게시물이 있는 카테고리만 가져오기
@@ -45,7 +56,9 @@ def home(request):
     # 각 카테고리별로 최신 게시물 5개씩 가져오기
     category_posts = []
     for category in categories_with_posts:
-        posts = AudioContent.objects.filter(category=category).order_by('-created_at')[:5]
+        posts = (
+            AudioContent.objects.filter(category=category).defer(*AudioContent.TEXT_FIELDS).order_by('-created_at')[:5]
+        )
         if posts.exists():
             category_posts.append({
                 'category': category,
@@ -53,7 +66,9 @@ def home(request):
             })
     
     # 카테고리 없는 게시물도 확인
-    uncategorized_posts = AudioContent.objects.filter(category__isnull=True).order_by('-created_at')[:5]
+    uncategorized_posts = (
+        AudioContent.objects.filter(category__isnull=True).defer(*AudioContent.TEXT_FIELDS).order_by('-created_at')[:5]
+    )
     if uncategorized_posts.exists():
         category_posts.append({
             'category': None,
@@ -71,27 +86,7 @@ def home(request):
 
 
 # -----------------------------------------------------------
-# 1. TTS 클라이언트 초기화 함수 (settings.py의 Secret 사용)
-# -----------------------------------------------------------
-
-def get_tts_client():
-    """settings.py에 정의된 JSON 자격 증명을 사용하여 TTS 클라이언트를 초기화합니다."""
-    
-    # 1. settings.py에서 인증 정보 로드
-    credentials_json = settings.GOOGLE_CLOUD_CREDENTIALS_JSON
-    
-    if not credentials_json:
-        raise ImproperlyConfigured("GOOGLE_CLOUD_CREDENTIALS_JSON이 settings.py에 정의되어 있지 않습니다.")
-    
-    # 2. JSON 데이터를 Credentials 객체로 변환
-    credentials = Credentials.from_service_account_info(credentials_json)
-    
-    # 3. 클라이언트 생성 시 credentials 인수로 전달
-    client = texttospeech.TextToSpeechClient(credentials=credentials)
-    return client
-
-# -----------------------------------------------------------
-# 2. View 함수들
+# View 함수들
 # -----------------------------------------------------------
 
 # TTS 음성 및 파일 이름 규칙 정의 (임시 설정, 실제 서비스 언어에 따라 조정)
@@ -100,16 +95,39 @@ LANG_CONFIG = {
     'ko': {'code': 'ko-KR', 'voice': 'ko-KR-Wavenet-D'}   # 한국어 번역
 }
 
+PROVIDER_UNAVAILABLE_MESSAGE = "음성/문장 생성 서비스가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해주세요."
+
+
+def provider_unavailable_response():
+    """TTS/Gemini 제공자 장애 시 즉시 돌려주는 503 응답"""
+    response = HttpResponse(PROVIDER_UNAVAILABLE_MESSAGE, status=503)
+    response['Retry-After'] = '30'
+    return response
+
+
+def memory_budget_response(error):
+    """메모리 예산 초과 응답: 작업이 너무 크면 413, 다른 작업 때문에 여유가 없으면 503"""
+    if isinstance(error, JobTooLargeError):
+        return HttpResponse(f"작업이 너무 커서 처리할 수 없습니다. 문장 수를 줄여주세요. ({error})", status=413)
+    response = HttpResponse("서버가 다른 생성 작업을 처리 중입니다. 잠시 후 다시 시도해주세요.", status=503)
+    response['Retry-After'] = '30'
+    return response
+
+
 @login_required
 @premium_required
 def upload_file_view(request):
     """파일 업로드 폼을 표시합니다. (프리미엄 멤버 전용)"""
     # 템플릿은 중앙 templates 폴더에서 'core/upload_form.html'로 찾습니다.
     categories = Category.objects.all()
-    return render(request, 'core/upload_form.html', {'categories': categories}) 
+    return render(request, 'core/upload_form.html', {
+        'categories': categories,
+        'async_generation': settings.ASYNC_GENERATION,
+    })
 
 @login_required
 @premium_required
+@idempotent_generation
 def process_file_view(request):
     """
     업로드된 TXT 파일을 처리하여,
@@ -120,8 +138,8 @@ def process_file_view(request):
     """
     if request.method != 'POST':
         return HttpResponseRedirect(reverse('upload'))
+    progress = ProgressReporter(request.POST.get('job_id'), request.user.id)
 
-    # ... (기존의 파일 검증 및 파싱 코드는 그대로 사용) ...
     # 1. 파일 검증
     if 'input_file' not in request.FILES:
         return HttpResponse("파일을 첨부해주세요.", status=400)
@@ -129,138 +147,78 @@ def process_file_view(request):
     if not uploaded_file.name.endswith('.txt'):
         return HttpResponse("TXT 파일만 업로드할 수 있습니다.", status=400)
 
-    # 2. 파일 내용 읽기 및 파싱
-    sentences_to_process = []
+    # 2. 파일 검사 (크기/인코딩/문장 수) - 합성 전에 제한 초과를 알림
     try:
-        file_content = uploaded_file.read().decode('utf-8')
-        all_valid_lines = [
-            line.strip() for line in file_content.split('\n') if line.strip()
-        ]
-        if len(all_valid_lines) % 2 != 0:
-            print("WARNING: 파일의 유효한 줄 수가 홀수입니다. 마지막 줄이 버려집니다.")
-        
-        for i in range(0, len(all_valid_lines) - 1, 2):
-            sentences_to_process.append({
-                'text': all_valid_lines[i],
-                'translation': all_valid_lines[i+1]
-            })
+        sentence_count = check_upload(uploaded_file)
+    except UploadError as e:
+        return HttpResponse(str(e), status=400)
     except Exception as e:
         return HttpResponse(f"파일 처리 중 오류 발생: {e}", status=500)
 
-    # 3. TTS 클라이언트 생성 및 오디오 설정
+    # 3. TTS 제공자 생성 및 오디오 설정
     try:
-        tts_client = get_tts_client()
-        original_voice_config = get_voice_config('es')
+        tts = get_tts_provider()
+        original_voice_config = tts.get_voice(UPLOAD_SOURCE_LANGUAGE)
     except Exception as e:
         return HttpResponse(f"API 클라이언트 초기화 오류: {e}", status=500)
 
-    # 오디오 및 타임스탬프 데이터 준비
-    combined_audio = AudioSegment.empty()
-    sync_data = []  # 💡 [핵심 추가] 문장과 시간 정보를 저장할 리스트
-    current_time_ms = 0.0  # 현재까지의 오디오 길이를 추적 (밀리초 단위)
-
-    silent_break_between_sets = AudioSegment.silent(duration=2000)
-    silent_break_for_repeat = AudioSegment.silent(duration=1000)
-
-    # 4. 오디오 생성, 합치기 및 타임스탬프 계산
-    for i, sentence_pair in enumerate(sentences_to_process):
-        original_text = sentence_pair['text']
-        try:
-            audio_bytes = generate_tts_audio(tts_client, original_text, original_voice_config, speaking_rate=0.8, volume_gain_db=3.0)
-            original_audio_clip = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
-            
-            repeated_audio_clip = (
-                silent_break_for_repeat + original_audio_clip +
-                silent_break_for_repeat + original_audio_clip +
-                silent_break_for_repeat + original_audio_clip +
-                silent_break_for_repeat
+    # 4. 파싱되는 대로 합성, 합치기 및 타임스탬프 계산 (파싱된 문장 쌍은 저장용으로 모음)
+    #    워커 메모리 예산을 넘는 작업은 거부하고, 여유가 없으면 잠시 대기
+    sentences_to_process = []
+    try:
+        with generation_memory(sentence_count, f"upload user={request.user.id}"):
+            mp3_bytes, sync_data, variants = run_generation(
+                tts, collect_into(stream_uploaded_sentences(uploaded_file), sentences_to_process),
+                original_voice_config, progress, total=sentence_count
             )
-
-            # 💡 [핵심 추가] 타임스탬프 정보 계산 및 저장
-            start_time = current_time_ms / 1000.0  # 초 단위로 변환
-            duration = len(repeated_audio_clip) / 1000.0  # 초 단위로 변환
-            end_time = start_time + duration
-            
-            sync_data.append({
-                'text': sentence_pair['text'],
-                'translation': sentence_pair['translation'],
-                'start': start_time,
-                'end': end_time
-            })
-            
-            # 전체 오디오에 현재 클립 추가
-            combined_audio += repeated_audio_clip
-            current_time_ms += len(repeated_audio_clip)
-
-            # 마지막 문장이 아니면 문장 세트 간의 공백 추가
-            if i < len(sentences_to_process) - 1:
-                combined_audio += silent_break_between_sets
-                current_time_ms += len(silent_break_between_sets)
-
-        except Exception as e:
-            print(f"TTS 생성 중 오류 발생 for text: '{original_text[:20]}...'. Error: {e}")
-            if i < len(sentences_to_process) - 1:
-                combined_audio += silent_break_between_sets
-                current_time_ms += len(silent_break_between_sets)
-
-    # 5. 최종 오디오 데이터를 Base64로 인코딩하여 HTML에 삽입 준비
-    if not combined_audio:
-        return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
-        
-    combined_audio = combined_audio.normalize(headroom=-1.0)
-    
-    output_mp3_io = io.BytesIO()
-    combined_audio.export(output_mp3_io, format="mp3")
-    mp3_bytes = output_mp3_io.getvalue()
-    
-    # 💡 [핵심 추가] 오디오 데이터를 Base64로 인코딩하여 Data URI 생성
-    mp3_base64 = base64.b64encode(mp3_bytes).decode('utf-8')
-    audio_data_uri = f"data:audio/mpeg;base64,{mp3_base64}"
-    
-    # DB에 저장: 사용자가 로그인한 상태여야 함
-    if request.user.is_authenticated:
-        title = request.POST.get('title', 'Untitled')
-        category_id = request.POST.get('category')
-        category = None
-        if category_id:
-            try:
-                category = Category.objects.get(id=int(category_id))
-            except Category.DoesNotExist:
+            if mp3_bytes is None:
+                progress('error', message="생성된 오디오 클립이 없습니다.")
+                return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
+
+            # DB에 저장: 사용자가 로그인한 상태여야 함
+            if request.user.is_authenticated:
+                title = request.POST.get('title', 'Untitled')
+                category_id = request.POST.get('category')
                 category = None
-
-        # 원문 및 번역(간단히 첫 쌍만 저장, 필요하면 전체 구조로 확장 가능)
-        original_texts = '\n'.join([s['text'] for s in sentences_to_process])
-        translated_texts = '\n'.join([s['translation'] for s in sentences_to_process])
-
-        # create object without file first
-        audio_obj = AudioContent.objects.create(
-            user=request.user,
-            title=title,
-            category=category,
-            original_text=original_texts,
-            translated_text=translated_texts,
-            sync_data=json.dumps(sync_data)
-        )
-
-        # save mp3 bytes to FileField
-        filename = f"{slugify(title) or 'audio'}-{int(time.time())}.mp3"
-        audio_obj.audio_file.save(filename, ContentFile(mp3_bytes))
-
-        # 생성된 오디오의 상세 페이지로 리디렉트
-        return redirect('audio_detail', audio_id=audio_obj.id)
-
-    # 로그인하지 않은 경우 플레이어 페이지만 표시
+                if category_id:
+                    try:
+                        category = Category.objects.get(id=int(category_id))
+                    except Category.DoesNotExist:
+                        category = None
+
+                audio_obj = save_audio_content(
+                    request.user, title, category, UPLOAD_SOURCE_LANGUAGE, sentences_to_process, sync_data, mp3_bytes,
+                    progress=progress, variants=variants
+                )
+                progress('done', audio_id=audio_obj.id, url=reverse('audio_detail', args=[audio_obj.id]))
+                request.generated_audio = audio_obj
+
+                # 생성된 오디오의 상세 페이지로 리디렉트
+                return redirect('audio_detail', audio_id=audio_obj.id)
+    except MemoryBudgetError as e:
+        logger.warning(f"메모리 예산으로 생성 거부: {e}")
+        progress('error', message=str(e))
+        return memory_budget_response(e)
+    except ProviderUnavailableError as e:
+        logger.error(f"TTS 제공자 장애로 생성 중단: {e}")
+        progress('error', message=PROVIDER_UNAVAILABLE_MESSAGE)
+        return provider_unavailable_response()
+
+    # 로그인하지 않은 경우 플레이어 페이지만 표시 (오디오를 Data URI로 삽입)
+    mp3_base64 = base64.b64encode(mp3_bytes).decode('utf-8')
     context = {
-        'audio_data_uri': audio_data_uri,
+        'audio_data_uri': f"data:audio/mpeg;base64,{mp3_base64}",
         'sync_data_json': json.dumps(sync_data)  # JavaScript에서 사용할 수 있도록 JSON 문자열로 변환
     }
     return render(request, 'core/player.html', context)
 
 
+@replica_reads
 @login_required
 def audio_list(request):
     """사용자가 생성한 오디오 목록을 보여줍니다. 제목/카테고리로 필터링 가능."""
-    qs = AudioContent.objects.filter(user=request.user)
+    # 목록에는 제목/카테고리/조회수만 쓰므로 압축된 본문은 읽지 않음
+    qs = AudioContent.objects.filter(user=request.user).defer(*AudioContent.TEXT_FIELDS)
     q = request.GET.get('q')
     category = request.GET.get('category')
     if q:
@@ -291,7 +249,10 @@ def audio_detail(request, audio_id):
     
     # 조회수 증가
     audio.view_count += 1
-    audio.save(update_fields=['view_count'])
+    audio.last_accessed_at = timezone.now()
+    audio.save(update_fields=['view_count', 'last_accessed_at'])
+    # 콜드 티어로 옮겨진 오디오는 재생 전에 되돌림 (core.tiering)
+    ensure_hot([audio], touch=False)
 
     # original_text, translated_text를 줄 단위로 파싱하여 쌍으로 전달
     orig_lines = [ln.strip() for ln in (audio.original_text or '').splitlines() if ln.strip()]
@@ -327,6 +288,9 @@ def audio_detail(request, audio_id):
         for o, t in sentences:
             sentences_with_times.append({'text': o, 'translation': t, 'start': 0, 'end': 0})
 
+    # 말하기 속도 버전과 저비트레이트 렌디션
+    variants = list(audio.variants.all())
+
     # 이 오디오가 사용자의 보관함에 이미 추가되어 있는지 확인
     is_in_collection = Collection.objects.filter(
         user=request.user,
@@ -340,10 +304,161 @@ def audio_detail(request, audio_id):
         'sync_data_json': json.dumps(sentences_with_times),
         'categories': Category.objects.all(),
         'is_in_collection': is_in_collection,
+        'base_speaking_rate': SPEAKING_RATE,
+        'rate_variants': [variant for variant in variants if variant.codec == 'mp3'],
+        # 작은 렌디션부터 나열하면 브라우저가 지원하는 것 중 가장 작은 파일을 고름 (MP3 는 마지막 대체용)
+        'audio_url': playback_url(audio),
+        'renditions': [
+            {'url': playback_url(audio, variant), 'mime_type': CODECS[variant.codec]['mime_type']}
+            for variant in sorted(variants, key=lambda variant: variant.file_size)
+            if variant.codec in RENDITION_CODECS
+        ],
+        # 파형 URL 에 피크 파일 버전을 붙여 문장 수정 후 브라우저 캐시가 이전 파형을 쓰지 않게 함
+        'peaks_variant': next((variant for variant in variants if variant.codec == 'peaks'), None),
     }
     return render(request, 'core/audio_detail.html', context)
 
 
+PEAKS_CACHE_TIMEOUT = 60 * 60  # 스토리지에서 읽은 피크 파일을 캐시하는 시간 (초)
+
+
+def _get_peaks_variant(request, audio_id):
+    return AudioVariant.objects.filter(audio_id=audio_id, audio__user=request.user, codec='peaks').first()
+
+
+def _peaks_etag(request, audio_id):
+    variant = _get_peaks_variant(request, audio_id)
+    return f"{variant.pk}-{variant.file_size}" if variant else None
+
+
+@login_required
+@condition(etag_func=_peaks_etag)
+def audio_peaks_view(request, audio_id):
+    """파형 피크 바이너리 (core.waveform 형식). 생성 후 바뀌지 않으므로 브라우저 캐시와 ETag 를 사용합니다."""
+    variant = _get_peaks_variant(request, audio_id)
+    if variant is None:
+        raise Http404("파형 정보가 없습니다.")
+
+    def read_peaks():
+        with variant.file.open('rb') as f:
+            return f.read()
+
+    data = cache.get_or_set(f"audio_peaks:{variant.file.name}", read_peaks, PEAKS_CACHE_TIMEOUT)
+    response = HttpResponse(data, content_type=CODECS['peaks']['mime_type'])
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@login_required
+def audio_variant_view(request, audio_id, variant_id):
+    """말하기 속도 버전의 재생 URL과 문장별 타임스탬프를 돌려줍니다. (선택했을 때만 signed URL 생성)"""
+    variant = get_object_or_404(AudioVariant, id=variant_id, audio_id=audio_id, audio__user=request.user)
+    ensure_hot([variant.audio], touch=False)
+    try:
+        sync_data = json.loads(variant.sync_data or '[]')
+    except ValueError:
+        sync_data = []
+    return JsonResponse({
+        'speaking_rate': variant.speaking_rate,
+        'url': playback_url(variant.audio, variant),
+        'times': [[entry.get('start', 0), entry.get('end', 0)] for entry in sync_data],
+    })
+
+
+def playback_url(audio, variant=None):
+    """
+    재생용 URL. 디스크 캐시를 쓰면 audio_file_view, 아니면 스토리지 URL
+    audio_file_view 의 URL 은 수정해도 같으므로 스토리지 파일 이름(수정 시 바뀜)의 해시를 ?v= 로 붙여
+    브라우저가 예전 MP3 를 캐시에서 재생하지 않게 합니다.
+    """
+    field_file = variant.file if variant else audio.audio_file
+    if not diskcache.is_enabled():
+        return field_file.url
+    if variant:
+        url = reverse('audio_variant_file', args=[audio.pk, variant.pk])
+    else:
+        url = reverse('audio_file', args=[audio.pk])
+    return f"{url}?v={hashlib.sha1(field_file.name.encode('utf-8')).hexdigest()[:12]}"
+
+
+@login_required
+def audio_file_view(request, audio_id, variant_id=None):
+    """
+    오디오 파일 전송. 로컬 디스크 캐시에 채운 뒤 X-Accel-Redirect 로 nginx 가 보내게 합니다. (core.diskcache)
+    캐시를 쓰지 않으면 스토리지 URL 로 보내고, accel_prefix 가 비어 있으면 Django 가 직접 보냅니다. (개발용)
+    """
+    audio = get_object_or_404(AudioContent, id=audio_id, user=request.user)
+    if variant_id is None:
+        field_file, mime_type = audio.audio_file, 'audio/mpeg'
+    else:
+        variant = get_object_or_404(AudioVariant, id=variant_id, audio=audio)
+        field_file, mime_type = variant.file, CODECS[variant.codec]['mime_type']
+    if not field_file:
+        raise Http404("오디오 파일이 없습니다.")
+    ensure_hot([audio], touch=False)
+    if not diskcache.is_enabled():
+        return redirect(field_file.url)
+
+    relative = diskcache.ensure_cached(field_file)
+    accel_prefix = diskcache.get_config()['accel_prefix']
+    if accel_prefix:
+        response = HttpResponse(content_type=mime_type)
+        response['X-Accel-Redirect'] = accel_prefix + relative.replace(os.sep, '/')
+    else:
+        response = FileResponse(open(os.path.join(diskcache.get_config()['dir'], relative), 'rb'), content_type=mime_type)
+    # 재생 URL 에는 파일 이름 해시(?v=)가 붙어 수정하면 URL 도 바뀌므로 (playback_url) 같은 URL 의 내용은 그대로
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+@login_required
+@premium_required
+def edit_sentence_view(request, audio_id, index):
+    """
+    문장 하나를 수정합니다. (본인 게시물만 가능)
+    수정한 문장만 다시 합성해 기존 오디오의 해당 구간에 끼워 넣고, 뒤 문장들의 타임스탬프를 옮깁니다.
+    """
+    audio = get_object_or_404(AudioContent, id=audio_id, user=request.user)
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': '잘못된 요청 형식입니다.'}, status=400)
+
+    try:
+        tts = get_tts_provider()
+        audio, sync_data = edit_sentence(
+            audio, index, str(data.get('text', '')), str(data.get('translation', '')), tts, tts.get_voice(audio.source_language)
+        )
+    except EditConflictError as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except EditError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ProviderUnavailableError as e:
+        logger.error(f"TTS 제공자 장애로 문장 수정 중단: {e}")
+        return JsonResponse({'error': PROVIDER_UNAVAILABLE_MESSAGE}, status=503)
+    except google_exceptions.InvalidArgument as e:
+        # call_with_resilience 가 재시도하지 않고 그대로 넘긴 요청 오류 (합성할 수 없는 문장 등)
+        logger.warning(f"문장 합성 거부 (오디오: {audio_id}): {e}")
+        return JsonResponse({'error': '이 문장은 음성으로 합성할 수 없습니다. 내용을 바꿔 다시 시도해주세요.'}, status=400)
+    except google_exceptions.GoogleAPICallError as e:
+        logger.error(f"TTS 호출 오류로 문장 수정 중단 (오디오: {audio_id}): {e}")
+        return JsonResponse({'error': '음성 합성 서비스 오류로 문장을 수정하지 못했습니다.'}, status=502)
+    except EncodingError as e:
+        logger.error(f"문장 수정 인코딩 실패 (오디오: {audio_id}): {e}")
+        return JsonResponse({'error': '오디오 인코딩에 실패했습니다. 잠시 후 다시 시도해주세요.'}, status=502)
+
+    return JsonResponse({
+        'success': True,
+        'index': index,
+        'sentence': sync_data[index],
+        'sync_data': sync_data,
+    })
+
+
 @login_required
 def add_category(request):
     # staff 권한 확인
@@ -425,6 +540,7 @@ def update_audio(request, audio_id):
 
 @login_required
 @premium_required
+@idempotent_generation
 def generate_sentences_view(request):
     """Gemini AI를 사용하여 학습용 문장을 생성합니다. (프리미엄 멤버 전용)"""
     if request.method != 'POST':
@@ -436,184 +552,83 @@ def generate_sentences_view(request):
     source_language = request.POST.get('source_language')
     target_word = request.POST.get('target_word')
     sentence_count = int(request.POST.get('sentence_count', 5))
-    
-    # 언어 이름 매핑
-    language_names = {
-        'es': '스페인어',
-        'en': '영어',
-        'fr': '프랑스어',
-        'de': '독일어',
-        'ja': '일본어',
-        'zh': '중국어'
-    }
-    
+    progress = ProgressReporter(request.POST.get('job_id'), request.user.id)
+
     try:
-        # Gemini API 초기화
-        gemini_api_key = config('GEMINI_API_KEY')
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # 프롬프트 생성
-        lang_name = language_names.get(source_language, source_language)
-        prompt = f"""당신은 외국어 학습 전문가입니다. 다음 조건에 맞는 문장을 생성해주세요:
-
-        언어: {lang_name}
-        학습할 단어/표현: {target_word}
-        문장 개수: {sentence_count}개
-
-        각 문장은 다음 형식으로 작성해주세요:
-        1. {lang_name} 원문
-        2. 한국어 번역
-
-        요구사항:
-        - '{target_word}'를 반드시 포함해야 합니다
-        - 다양한 문맥에서 사용되는 예문
-        - 스페인어의 경우 활용형(인칭,단수,복수,시제 등)을 다양하게 사용
-        - 각 문장 쌍 사이에 빈 줄 추가
-
-        **[필수 지침: 응답은 오직 요청된 문장 쌍만 포함해야 하며, 어떠한 설명, 서문, 제목도 포함해서는 안 됩니다. 첫 번째 줄은 반드시 {lang_name} 원문 문장으로 시작해야 합니다.]**
-
-        출력 형식 (반드시 이 형식을 따라주세요):
-        원문 문장
-        한국어 번역
-        ...
-        """
-        
-        # AI 생성
-        response = model.generate_content(prompt)
-        generated_text = response.text.strip()
-
-        # 생성된 텍스트를 파싱하여 문장 쌍으로 변환
-        # 1. generated_text를 줄바꿈 기준으로 분리하고, 각 줄의 양 끝 공백과 빈 줄을 제거
-        lines = [line.strip() for line in generated_text.split('\n') if line.strip()]
-
-        # ------------------------------------------------------------
-        # 2. [추가된 후처리 로직]: 첫 줄에 불필요한 서문이 있는지 확인하고 제거
-        # ------------------------------------------------------------
-
-        # 첫 줄이 있고, 해당 줄이 AI가 추가한 서문일 가능성이 높은지 확인 (예: 목록 시작, 설명 문구)
-        # 스페인어 원문을 기대하므로, 한국어 설명 문구에 흔히 쓰이는 키워드가 포함되면 서문으로 간주합니다.
-        if lines:
-            first_line = lines[0].lower()
-            # '다음은', '여기', '목록', '아래', '입니다' 등의 키워드가 포함되어 있으면 서문일 가능성이 높음
-            if any(keyword in first_line for keyword in ['다음은', '여기', '목록', '아래', '입니다', '다음과']):
-                # 첫 줄이 서문일 경우, 해당 줄을 제거합니다.
-                lines = lines[1:]
-
-        # ------------------------------------------------------------
-        # 3. 파싱 로직 (기존 코드)
-        # ------------------------------------------------------------
-        sentences_to_process = []
-        i = 0
-        while i < len(lines):
-            if i + 1 < len(lines):
-                original = lines[i]
-                translation = lines[i + 1]
-                sentences_to_process.append({
-                    'text': original,
-                    'translation': translation
-                })
-                i += 2
-            else:
-                # 홀수 번째 줄만 남는 경우 (번역이 없는 경우), 해당 줄은 무시하고 종료
-                i += 1
-                
+        # AI 생성 후 문장 쌍으로 파싱 (첫 줄 서문 제거 포함)
+        generated_text = get_sentence_provider().generate_sentences(source_language, target_word, sentence_count)
+        sentences_to_process = parse_generated_text(generated_text)
+
         if not sentences_to_process:
             # 후처리 후에도 문장 쌍이 없으면 에러 처리
+            progress('error', message="문장 생성에 실패했습니다. 다시 시도해주세요.")
             return HttpResponse("문장 생성에 실패했습니다. 다시 시도해주세요.", status=500)
-        
-        # TTS 처리 (기존 process_file_view와 동일한 로직)
+        progress('gemini_done', count=len(sentences_to_process))
+
+        # TTS 처리 (process_file_view와 동일한 파이프라인)
         try:
-            tts_client = get_tts_client()
-            original_voice_config = get_voice_config(source_language)
+            tts = get_tts_provider()
+            original_voice_config = tts.get_voice(source_language)
         except Exception as e:
             return HttpResponse(f"TTS 클라이언트 초기화 오류: {e}", status=500)
-        
-        combined_audio = AudioSegment.empty()
-        sync_data = []
-        current_time_ms = 0.0
-        
-        silent_break_between_sets = AudioSegment.silent(duration=2000)
-        silent_break_for_repeat = AudioSegment.silent(duration=1000)
-        
-        for i, sentence_pair in enumerate(sentences_to_process):
-            original_text = sentence_pair['text']
-            try:
-                audio_bytes = generate_tts_audio(tts_client, original_text, original_voice_config, speaking_rate=0.8, volume_gain_db=3.0)
-                original_audio_clip = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
-                
-                repeated_audio_clip = (
-                    silent_break_for_repeat + original_audio_clip +
-                    silent_break_for_repeat + original_audio_clip +
-                    silent_break_for_repeat + original_audio_clip +
-                    silent_break_for_repeat
-                )
-                
-                start_time = current_time_ms / 1000.0
-                duration = len(repeated_audio_clip) / 1000.0
-                end_time = start_time + duration
-                
-                sync_data.append({
-                    'text': sentence_pair['text'],
-                    'translation': sentence_pair['translation'],
-                    'start': start_time,
-                    'end': end_time
-                })
-                
-                combined_audio += repeated_audio_clip
-                current_time_ms += len(repeated_audio_clip)
-                
-                if i < len(sentences_to_process) - 1:
-                    combined_audio += silent_break_between_sets
-                    current_time_ms += len(silent_break_between_sets)
-                    
-            except Exception as e:
-                logger.error(f"TTS 생성 중 오류: {e}")
-                if i < len(sentences_to_process) - 1:
-                    combined_audio += silent_break_between_sets
-                    current_time_ms += len(silent_break_between_sets)
-        
-        if not combined_audio:
-            return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
-        
-        combined_audio = combined_audio.normalize(headroom=-1.0)
-        
-        output_mp3_io = io.BytesIO()
-        combined_audio.export(output_mp3_io, format="mp3")
-        mp3_bytes = output_mp3_io.getvalue()
-        
-        mp3_base64 = base64.b64encode(mp3_bytes).decode('utf-8')
-        
-        # DB에 저장
-        category = None
-        if category_id:
-            try:
-                category = Category.objects.get(id=int(category_id))
-            except Category.DoesNotExist:
-                pass
-        
-        original_texts = '\n'.join([s['text'] for s in sentences_to_process])
-        translated_texts = '\n'.join([s['translation'] for s in sentences_to_process])
-        
-        audio_obj = AudioContent.objects.create(
-            user=request.user,
-            title=title,
-            category=category,
-            original_text=original_texts,
-            translated_text=translated_texts,
-            sync_data=json.dumps(sync_data)
-        )
-        
-        filename = f"{slugify(title) or 'ai-audio'}-{int(time.time())}.mp3"
-        audio_obj.audio_file.save(filename, ContentFile(mp3_bytes))
-        
+
+        with generation_memory(len(sentences_to_process), f"ai user={request.user.id}"):
+            mp3_bytes, sync_data, variants = run_generation(
+                tts, sentences_to_process, original_voice_config, progress
+            )
+            if mp3_bytes is None:
+                progress('error', message="생성된 오디오 클립이 없습니다.")
+                return HttpResponse("생성된 오디오 클립이 없습니다.", status=500)
+
+            # DB에 저장
+            category = None
+            if category_id:
+                try:
+                    category = Category.objects.get(id=int(category_id))
+                except Category.DoesNotExist:
+                    pass
+
+            audio_obj = save_audio_content(
+                request.user, title, category, source_language, sentences_to_process, sync_data, mp3_bytes,
+                progress=progress, variants=variants
+            )
+        progress('done', audio_id=audio_obj.id, url=reverse('audio_detail', args=[audio_obj.id]))
+        request.generated_audio = audio_obj
+
         return redirect('audio_detail', audio_id=audio_obj.id)
-        
+
+    except MemoryBudgetError as e:
+        logger.warning(f"메모리 예산으로 생성 거부: {e}")
+        progress('error', message=str(e))
+        return memory_budget_response(e)
+    except ProviderUnavailableError as e:
+        logger.error(f"AI 문장 생성 제공자 장애: {e}")
+        progress('error', message=PROVIDER_UNAVAILABLE_MESSAGE)
+        return provider_unavailable_response()
     except Exception as e:
         logger.error(f"AI 문장 생성 오류: {e}")
+        progress('error', message="문장 생성 중 오류가 발생했습니다.")
         return HttpResponse(f"문장 생성 중 오류가 발생했습니다: {e}", status=500)
 
 
+@login_required
+def generation_progress_view(request, job_id):
+    """
+    생성 작업의 진행 상황. ASGI(ASYNC_GENERATION)에서는 Server-Sent Events 로 전달하고,
+    WSGI 에서는 동기 워커를 점유하지 않도록 최신 이벤트 하나를 JSON 으로 돌려줍니다. (페이지가 짧게 반복 요청)
+    """
+    if not is_valid_job_id(job_id):
+        raise Http404("잘못된 작업 ID입니다.")
+    if not settings.ASYNC_GENERATION:
+        response = JsonResponse(progress_snapshot(job_id, request.user.id))
+        response['Cache-Control'] = 'no-cache'
+        return response
+    response = StreamingHttpResponse(aprogress_events(job_id, request.user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 버퍼링 해제
+    return response
+
+
 # -----------------------------------------------------------
 # 보관함 관련 뷰
 # -----------------------------------------------------------
@@ -628,17 +643,116 @@ def collection_list(request):
     return render(request, 'core/collection_list.html', {'collections': collections})
 
 
+@replica_reads
 @login_required
 def collection_detail(request, collection_id):
     """보관함의 상세 정보와 포함된 오디오를 보여줍니다."""
     collection = get_object_or_404(Collection, id=collection_id, user=request.user)
-    audios = collection.audio_contents.all()
+    audios = collection.audio_contents.defer(*AudioContent.TEXT_FIELDS)
     return render(request, 'core/collection_detail.html', {
         'collection': collection,
         'audios': audios
     })
 
 
+@login_required
+def collection_review_view(request, collection_id):
+    """
+    보관함 복습 트랙: 보관함의 오디오들에서 문장을 골라 섞은 MP3 의 URL과 타임스탬프를 돌려줍니다.
+    seed 가 없으면 새로 뽑아 응답에 담으며, 같은 seed/count 로 다시 요청하면 저장된 트랙을 그대로 씁니다.
+    """
+    collection = get_object_or_404(Collection, id=collection_id, user=request.user)
+    try:
+        seed = int(request.GET.get('seed') or random.randrange(1_000_000))
+        count = int(request.GET.get('count') or settings.REVIEW_MIX_SENTENCES)
+    except ValueError:
+        return JsonResponse({'error': '잘못된 요청 형식입니다.'}, status=400)
+    if seed < 0:
+        return JsonResponse({'error': '잘못된 요청 형식입니다.'}, status=400)
+    count = max(1, min(count, settings.REVIEW_MIX_MAX_SENTENCES))
+
+    try:
+        mix = get_review_mix(collection, seed, count)
+    except ReviewMixError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"복습 트랙 생성 오류 (collection={collection_id}): {e}", exc_info=True)
+        return JsonResponse({'error': '복습 트랙을 만들지 못했습니다.'}, status=500)
+
+    return JsonResponse({
+        'seed': mix.seed,
+        'count': mix.sentence_count,
+        'url': mix.audio_file.url,
+        'sync_data': json.loads(mix.sync_data),
+    })
+
+
+def parse_byte_range(header, size):
+    """'bytes=시작-끝' 형식의 단일 Range 헤더를 [start, end) 로 바꿉니다. 해석할 수 없으면 None"""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start, end = int(first), (int(last) + 1 if last else size)
+        else:
+            start, end = size - int(last), size
+    except ValueError:
+        return None
+    start, end = max(0, start), min(size, end)
+    return (start, end) if start < end else None
+
+
+@login_required
+def export_collection_view(request, collection_id):
+    """
+    보관함 ZIP 내보내기: 항목별 MP3 와 대본(.txt)/타임스탬프(.json)를 메모리에 모으지 않고 바로 흘려보냅니다.
+    전체 길이를 미리 계산해 Content-Length 를 주고, Range/If-Range 로 이어받기를 지원합니다.
+    """
+    collection = get_object_or_404(Collection, id=collection_id, user=request.user)
+    try:
+        entries = collection_entries(collection)
+    except ExportTooLargeError as e:
+        return HttpResponse(str(e), status=413)
+
+    size = zip_size(entries)
+    etag = entries_etag(entries)
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_byte_range(request.headers.get('Range'), size)
+        if request.headers.get('Range') and byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size)
+    response = StreamingHttpResponse(stream_zip(entries, start, end), content_type='application/zip')
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+    response['Content-Length'] = str(end - start)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = content_disposition_header(True, f"{collection.name}.zip")
+    return response
+
+
+@login_required
+def collection_playlist_view(request, collection_id, fmt):
+    """
+    보관함 연속 재생 재생목록 (M3U8 또는 JSON). 저장된 MP3 를 그대로 세그먼트로 쓰며, 재생목록은 캐시합니다.
+    """
+    collection = get_object_or_404(Collection, id=collection_id, user=request.user)
+    playlist = get_playlist(collection)
+    if fmt == 'm3u8':
+        response = HttpResponse(render_m3u8(playlist), content_type='application/vnd.apple.mpegurl')
+    else:
+        response = JsonResponse(playlist)
+    # 서명 URL 이 들어 있으므로 공유 캐시에는 두지 않음
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
 @login_required
 def create_collection(request):
     """새 보관함을 생성합니다."""
@@ -802,3 +916,18 @@ def get_user_collections(request):
     ]
     return JsonResponse({'collections': data})
 
+
+# -----------------------------------------------------------
+# 운영 메트릭
+# -----------------------------------------------------------
+
+@login_required
+def metrics_view(request):
+    """프로세스 내 메트릭과 서킷 브레이커 상태를 JSON으로 반환합니다. (staff 전용)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': '권한이 없습니다.'}, status=403)
+
+    data = metrics.snapshot()
+    data['circuit_breakers'] = breaker_states()
+    data['memory_budget'] = get_memory_budget().snapshot()
+    return JsonResponse(data)
@@ -0,0 +1,71 @@
+"""
+파형 피크
+생성 파이프라인이 이미 흘려보내는 PCM 에서 구간별 최소/최댓값을 구해 int8 로 저장하면,
+플레이어가 MP3 를 내려받아 디코딩하지 않고도 바로 파형과 문장 경계를 그릴 수 있습니다.
+
+파일 형식 (리틀 엔디언)
+    b'AMPK' | 버전 u8 | 예약 u8 | 초당 피크 수 u16 | 피크 수 u32 | 문장 수 u32
+    문장 수 × (시작 피크 번호 u32, 끝 피크 번호 u32)
+    피크 수 × (최소 i8, 최대 i8)
+"""
+import struct
+
+import numpy as np
+
+PEAKS_MAGIC = b'AMPK'
+PEAKS_VERSION = 1
+PEAKS_PER_SECOND = 20
+_HEADER = struct.Struct('<4sBBHII')
+_BOUNDARY = struct.Struct('<II')
+
+
+def compute_peaks(pcm_chunks, frame_rate, channels, peaks_per_second=PEAKS_PER_SECOND):
+    """
+    16bit PCM 조각들을 구간마다 (최소, 최대) int8 쌍으로 줄입니다. 채널은 섞지 않고 전체 샘플 기준입니다.
+    조각 경계와 구간 경계가 맞지 않아도 되며, 마지막 자투리 구간도 포함합니다.
+    """
+    bucket_samples = max(1, frame_rate // peaks_per_second) * channels
+    bucket_bytes = bucket_samples * 2
+    peaks = bytearray()
+    pending = b''
+
+    def add(data, width):
+        # 구간마다 한 행으로 모아 한 번에 최소/최대 (상위 8bit 로 줄임)
+        samples = np.frombuffer(data, dtype='<i2').reshape(-1, width)
+        pairs = np.stack([samples.min(axis=1), samples.max(axis=1)], axis=1) >> 8
+        peaks.extend(pairs.astype(np.int8).tobytes())
+
+    for chunk in pcm_chunks:
+        data = pending + chunk if pending else chunk
+        usable = len(data) - len(data) % bucket_bytes
+        if usable:
+            add(data[:usable], bucket_samples)
+        pending = data[usable:]
+    if pending:
+        add(pending, len(pending) // 2)
+    return bytes(peaks)
+
+
+def pack_peaks(peaks, sync_data, peaks_per_second=PEAKS_PER_SECOND):
+    """피크와 sync_data 의 문장 경계(피크 번호)를 하나의 바이너리로 묶습니다."""
+    peak_count = len(peaks) // 2
+    boundaries = b''.join(
+        _BOUNDARY.pack(
+            min(peak_count, int(entry['start'] * peaks_per_second)),
+            min(peak_count, int(entry['end'] * peaks_per_second)),
+        )
+        for entry in sync_data
+    )
+    header = _HEADER.pack(PEAKS_MAGIC, PEAKS_VERSION, 0, peaks_per_second, peak_count, len(sync_data))
+    return header + boundaries + peaks
+
+
+def unpack_peaks(data):
+    """pack_peaks 의 역변환. 반환값: (초당 피크 수, [(시작, 끝)], 피크 바이트)"""
+    magic, version, _, peaks_per_second, peak_count, sentence_count = _HEADER.unpack_from(data)
+    if magic != PEAKS_MAGIC or version != PEAKS_VERSION:
+        raise ValueError("파형 피크 형식이 아닙니다.")
+    offset = _HEADER.size
+    boundaries = [_BOUNDARY.unpack_from(data, offset + i * _BOUNDARY.size) for i in range(sentence_count)]
+    offset += sentence_count * _BOUNDARY.size
+    return peaks_per_second, boundaries, data[offset:offset + peak_count * 2]
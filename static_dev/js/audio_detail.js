@@ -254,6 +254,189 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 
 
+    // 9. 말하기 속도 버전 전환 (음높이를 유지한 채 속도를 바꾼 별도 파일, 선택 시 URL/타임스탬프를 받아옴)
+    const rateOptions = document.querySelectorAll('.rate-option');
+    const rateLabel = document.getElementById('rateLabel');
+    const readTimes = () => sentenceItems.map(item => [
+        parseFloat(item.getAttribute('data-start')) || 0,
+        parseFloat(item.getAttribute('data-end')) || 0,
+    ]);
+    const rateVersions = {};
+    let currentTimes = readTimes();
+    if (rateOptions.length) {
+        // 기본 속도는 url 없이 <source> 목록에서 브라우저가 다시 고르게 함
+        rateVersions[rateOptions[0].getAttribute('data-rate')] = { url: null, times: currentTimes };
+    }
+
+    // 현재 문장 안의 위치를 문장 길이 비율로 옮겨 새 버전의 같은 지점을 찾음
+    function mapTime(time, fromTimes, toTimes) {
+        let i = fromTimes.findIndex(([, end]) => time < end);
+        if (i === -1) i = fromTimes.length - 1;
+        if (i < 0 || !toTimes[i]) return time;
+        const [start, end] = fromTimes[i];
+        const [newStart, newEnd] = toTimes[i];
+        const scale = end > start ? (newEnd - newStart) / (end - start) : 1;
+        return Math.max(0, newStart + (time - start) * scale);
+    }
+
+    function applyRateVersion(version) {
+        const wasPlaying = !audio.paused;
+        const newTime = mapTime(audio.currentTime || 0, currentTimes, version.times);
+        const playbackRate = audio.playbackRate;
+
+        sentenceItems.forEach((item, idx) => {
+            if (!version.times[idx]) return;
+            item.setAttribute('data-start', version.times[idx][0]);
+            item.setAttribute('data-end', version.times[idx][1]);
+        });
+        currentTimes = version.times;
+        isRepeating = false;
+        repeatBtn.classList.remove('active');
+
+        audio.addEventListener('loadedmetadata', () => {
+            audio.currentTime = newTime;
+            audio.playbackRate = playbackRate;
+            if (wasPlaying) audio.play().catch(playPromiseHandler);
+        }, { once: true });
+        if (version.url) {
+            audio.src = version.url;
+        } else {
+            audio.removeAttribute('src');
+        }
+        audio.load();
+    }
+
+    rateOptions.forEach(option => {
+        option.addEventListener('click', async (e) => {
+            e.preventDefault();
+            if (option.classList.contains('active')) return;
+            const rate = option.getAttribute('data-rate');
+            try {
+                if (!rateVersions[rate]) {
+                    const response = await fetch(option.getAttribute('data-url'));
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    rateVersions[rate] = await response.json();
+                }
+                applyRateVersion(rateVersions[rate]);
+                rateLabel.textContent = rate;
+                rateOptions.forEach(opt => opt.classList.remove('active'));
+                option.classList.add('active');
+            } catch (error) {
+                console.error('말하기 속도 버전 로딩 오류:', error);
+                alert('선택한 속도의 오디오를 불러오지 못했습니다.');
+            }
+        });
+    });
+
+
+    // 10. 파형 (서버가 미리 계산한 피크로 그림, 문장 구간 표시 / 클릭 시 이동)
+    //     속도 버전은 전체를 같은 비율로 늘이므로 재생 위치를 길이 대비 비율로 그림
+    const waveform = document.getElementById('waveform');
+    let waveformData = null;
+
+    function parsePeaks(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'AMPK' || view.getUint8(4) !== 1) throw new Error('알 수 없는 파형 형식');
+        const count = view.getUint32(8, true);
+        const sentenceCount = view.getUint32(12, true);
+        const boundaries = [];
+        let offset = 16;
+        for (let i = 0; i < sentenceCount; i++, offset += 8) {
+            boundaries.push([view.getUint32(offset, true), view.getUint32(offset + 4, true)]);
+        }
+        return { count, boundaries, peaks: new Int8Array(buffer, offset, count * 2) };
+    }
+
+    function drawWaveform() {
+        if (!waveformData || !waveformData.count) return;
+        const { count, boundaries, peaks } = waveformData;
+        const width = waveform.clientWidth;
+        const height = waveform.height;
+        if (waveform.width !== width) waveform.width = width;
+        const ctx = waveform.getContext('2d');
+        const played = audio.duration ? (audio.currentTime / audio.duration) * width : 0;
+        ctx.clearRect(0, 0, width, height);
+
+        // 문장 구간 (활성 문장은 강조)
+        boundaries.forEach(([start, end], idx) => {
+            ctx.fillStyle = idx === _currentActiveIndex ? '#fff0f0' : (idx % 2 ? '#f8f9fa' : '#f1f3f5');
+            ctx.fillRect(start / count * width, 0, (end - start) / count * width, height);
+        });
+
+        const middle = height / 2;
+        for (let x = 0; x < width; x++) {
+            const from = Math.floor(x * count / width);
+            const to = Math.max(from + 1, Math.floor((x + 1) * count / width));
+            let low = 0, high = 0;
+            for (let i = from; i < to && i < count; i++) {
+                low = Math.min(low, peaks[i * 2]);
+                high = Math.max(high, peaks[i * 2 + 1]);
+            }
+            ctx.fillStyle = x < played ? '#0d6efd' : '#adb5bd';
+            ctx.fillRect(x, middle - high / 128 * middle, 1, Math.max(1, (high - low) / 128 * middle));
+        }
+    }
+
+    if (waveform) {
+        fetch(waveform.getAttribute('data-url'))
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.arrayBuffer();
+            })
+            .then(buffer => {
+                waveformData = parsePeaks(buffer);
+                drawWaveform();
+            })
+            .catch(error => {
+                console.warn('파형 로딩 실패:', error);
+                waveform.remove();
+            });
+
+        audio.addEventListener('timeupdate', drawWaveform);
+        audio.addEventListener('loadedmetadata', drawWaveform);
+        window.addEventListener('resize', drawWaveform);
+        waveform.addEventListener('click', (e) => {
+            if (!Number.isFinite(audio.duration)) return;
+            const rect = waveform.getBoundingClientRect();
+            seekWithFade(audio, (e.clientX - rect.left) / rect.width * audio.duration, updateActiveSentenceByTime);
+        });
+    }
+
+
+    // 11. 문장 수정 (해당 문장만 다시 합성되며, 저장되면 새 오디오/타임스탬프로 다시 불러옴)
+    document.querySelectorAll('.edit-sentence-btn').forEach(button => {
+        button.addEventListener('click', async (e) => {
+            e.stopPropagation();  // 문장 클릭(이동)으로 전달되지 않게
+            const item = button.closest('.sentence-item');
+            const text = prompt('수정할 문장', item.querySelector('.original').textContent.trim());
+            if (text === null) return;
+            const translation = prompt('수정할 번역', item.querySelector('.translation').textContent.trim());
+            if (translation === null) return;
+
+            button.disabled = true;
+            try {
+                const response = await fetch(button.getAttribute('data-url'), {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'X-CSRFToken': CONFIG.CSRF_TOKEN },
+                    body: JSON.stringify({ text: text, translation: translation })
+                });
+                const data = await response.json();
+                if (response.ok) {
+                    location.reload();
+                } else {
+                    alert(data.error || '문장을 수정하지 못했습니다.');
+                }
+            } catch (error) {
+                alert('문장 수정 중 네트워크 오류가 발생했습니다: ' + error.message);
+                console.error('Error:', error);
+            } finally {
+                button.disabled = false;
+            }
+        });
+    });
+
+
     // --- [보관함에 추가 기능] ---
     let userCollections = [];
 
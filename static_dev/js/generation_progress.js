@@ -0,0 +1,58 @@
+// 생성 진행 상황 구독
+// ASGI(ASYNC_GENERATION)에서는 SSE 스트림을, WSGI 에서는 최신 이벤트 JSON 을 짧게 반복 요청합니다.
+// (동기 워커에서 스트림을 열어 두면 진행 페이지마다 워커 하나를 점유하므로)
+
+const GENERATION_PROGRESS_STAGES = ['gemini_done', 'synthesizing', 'assembling', 'uploading', 'done', 'error'];
+const GENERATION_PROGRESS_POLL_MS = 1500;
+
+/**
+ * 진행 이벤트를 onEvent(stage, data) 로 전달합니다. done/error 를 받으면 멈춥니다.
+ * 반환값: 구독을 멈추는 함수
+ */
+function watchGenerationProgress(url, stream, onEvent) {
+    if (stream && window.EventSource) {
+        const source = new EventSource(url);
+        GENERATION_PROGRESS_STAGES.forEach(stage => {
+            source.addEventListener(stage, event => {
+                // 연결 오류(데이터 없는 error 이벤트)는 EventSource 가 자동 재연결
+                if (!event.data) {
+                    return;
+                }
+                if (stage === 'done' || stage === 'error') {
+                    source.close();
+                }
+                onEvent(stage, JSON.parse(event.data));
+            });
+        });
+        return () => source.close();
+    }
+
+    let lastSeq = 0;
+    let stopped = false;
+    let timer = null;
+    const poll = () => {
+        fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+            .then(response => response.ok ? response.json() : null)
+            .catch(() => null)  // 일시적인 오류는 다음 요청에서 다시 시도
+            .then(data => {
+                if (stopped) {
+                    return;
+                }
+                if (data && data.seq > lastSeq && GENERATION_PROGRESS_STAGES.includes(data.stage)) {
+                    lastSeq = data.seq;
+                    if (data.stage === 'done' || data.stage === 'error') {
+                        stopped = true;
+                    }
+                    onEvent(data.stage, data);
+                }
+                if (!stopped) {
+                    timer = setTimeout(poll, GENERATION_PROGRESS_POLL_MS);
+                }
+            });
+    };
+    poll();
+    return () => {
+        stopped = true;
+        clearTimeout(timer);
+    };
+}